@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Local fake of the read-only Kubernetes API, for exercising the native API backend without a cluster.
+
+Serves discovery, get and list (as JSON, metadata only or Table), pod logs and events from an
+in-memory cluster, by default a small "payments" namespace with a crashing checkout pod. Point the
+assistant at it with K8S_ASSISTANT_BACKEND=api and K8S_ASSISTANT_API_SERVER=<url>.
+
+    python benchmarks/fake_apiserver.py --port 8001
+    python benchmarks/fake_apiserver.py --check
+
+--check runs get, describe and logs through KubeAPIBackend, and the fallback from the backend to
+kubectl through KubectlTool with the fake kubectl (for an unsupported command, an unreachable API
+server and a switch of the kube context), and exits non-zero when any of them fails.
+"""
+import copy
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# (group version, plural, kind, namespaced, short names)
+RESOURCES = [
+    ("v1", "pods", "Pod", True, ["po"]),
+    ("v1", "events", "Event", True, ["ev"]),
+    ("v1", "services", "Service", True, ["svc"]),
+    ("v1", "nodes", "Node", False, ["no"]),
+    ("v1", "namespaces", "Namespace", False, ["ns"]),
+    ("apps/v1", "deployments", "Deployment", True, ["deploy"]),
+]
+
+CLUSTER = {
+    "pods": [
+        {
+            "metadata": {
+                "name": "checkout-7d9f8b6c5-x2k4p", "namespace": "payments", "resourceVersion": "4711",
+                "labels": {"app": "checkout"}, "creationTimestamp": "2024-01-01T00:00:00Z",
+            },
+            "spec": {"nodeName": "node-1", "containers": [{"name": "checkout", "image": "shop/checkout:1.4.2"}]},
+            "status": {
+                "phase": "Running",
+                "containerStatuses": [{
+                    "name": "checkout", "ready": False, "restartCount": 14,
+                    "state": {"waiting": {"reason": "CrashLoopBackOff"}},
+                }],
+            },
+        },
+        {
+            "metadata": {
+                "name": "ledger-6b5f7d8c9-p8q2r", "namespace": "payments", "resourceVersion": "4620",
+                "labels": {"app": "ledger"}, "creationTimestamp": "2024-01-01T00:00:00Z",
+            },
+            "spec": {"nodeName": "node-1", "containers": [{"name": "ledger", "image": "shop/ledger:2.0.1"}]},
+            "status": {
+                "phase": "Running",
+                "containerStatuses": [{"name": "ledger", "ready": True, "restartCount": 0, "state": {"running": {}}}],
+            },
+        },
+    ],
+    "events": [
+        {
+            "metadata": {"name": "checkout-7d9f8b6c5-x2k4p.17a", "namespace": "payments", "resourceVersion": "4712"},
+            "type": "Warning", "reason": "BackOff", "message": "Back-off restarting failed container checkout",
+            "involvedObject": {"kind": "Pod", "name": "checkout-7d9f8b6c5-x2k4p", "namespace": "payments"},
+            "lastTimestamp": "2024-01-01T00:48:00Z",
+        },
+    ],
+    "services": [],
+    "nodes": [
+        {"metadata": {"name": "node-1", "resourceVersion": "900"}, "status": {"allocatable": {"cpu": "4", "memory": "16Gi"}}},
+    ],
+    "namespaces": [
+        {"metadata": {"name": "payments", "resourceVersion": "10"}},
+    ],
+    "deployments": [],
+    "logs": {
+        "payments/checkout-7d9f8b6c5-x2k4p": "starting checkout 1.4.2\nERROR dial tcp: lookup db.payments: no such host\n",
+        "payments/ledger-6b5f7d8c9-p8q2r": "ledger ready\n",
+    },
+}
+
+
+class FakeAPIServer:
+    """Threaded HTTP server answering read requests of the Kubernetes API from an in-memory cluster."""
+
+    def __init__(self, cluster: Dict[str, Any] | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.cluster = copy.deepcopy(cluster if cluster is not None else CLUSTER)
+        self.requests: List[str] = []
+        self.lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with fake.lock:
+                    fake.requests.append(url.path)
+                status, body, content_type = fake._handle(url.path, parse_qs(url.query), self.headers.get("Accept", ""))
+                data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAPIServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handle(self, path: str, query: Dict[str, List[str]], accept: str) -> Tuple[int, Any, str]:
+        if path == "/api/v1":
+            return 200, _discovery("v1"), "application/json"
+        if path == "/apis":
+            versions = sorted({version for version, *_ in RESOURCES if "/" in version})
+            groups = [{"name": version.split("/")[0], "preferredVersion": {"groupVersion": version}} for version in versions]
+            return 200, {"kind": "APIGroupList", "groups": groups}, "application/json"
+        if path.startswith("/apis/") and path.count("/") == 3:
+            return 200, _discovery(path[len("/apis/"):]), "application/json"
+
+        parts = path.strip("/").split("/")
+        parts = parts[2:] if parts[0] == "api" else parts[3:]
+        namespace = None
+        if len(parts) >= 2 and parts[0] == "namespaces" and parts[1] != "" and len(parts) > 2:
+            namespace, parts = parts[1], parts[2:]
+        if not parts or parts[0] not in {plural for _, plural, *_ in RESOURCES}:
+            return _not_found(path)
+
+        plural = parts[0]
+        items = [item for item in self.cluster.get(plural, []) if namespace is None or item["metadata"].get("namespace") == namespace]
+        items = [item for item in items if _matches(item, query)]
+        if len(parts) == 3 and parts[2] == "log" and plural == "pods":
+            logs = self.cluster.get("logs", {}).get(f"{namespace}/{parts[1]}")
+            return (200, logs, "text/plain") if logs is not None else _not_found(path)
+        if len(parts) == 2:
+            matching = [item for item in items if item["metadata"]["name"] == parts[1]]
+            if not matching:
+                return _not_found(path)
+            items = matching
+
+        kind = next(kind for _, name, kind, *_ in RESOURCES if name == plural)
+        items = [{"kind": kind, **item} for item in items]
+        if "as=Table" in accept:
+            return 200, _table(plural, items), "application/json"
+        if len(parts) == 2:
+            return 200, items[0], "application/json"
+        return 200, {"kind": f"{kind}List", "metadata": {"resourceVersion": "5000"}, "items": items}, "application/json"
+
+
+def _discovery(group_version: str) -> Dict[str, Any]:
+    resources = [
+        {
+            "name": plural, "singularName": kind.lower(), "kind": kind, "namespaced": namespaced,
+            "verbs": ["get", "list", "watch"], "shortNames": short_names,
+        }
+        for version, plural, kind, namespaced, short_names in RESOURCES if version == group_version
+    ]
+    return {"kind": "APIResourceList", "groupVersion": group_version, "resources": resources}
+
+
+def _matches(item: Dict[str, Any], query: Dict[str, List[str]]) -> bool:
+    """Apply equality label and field selectors, which is all the fake supports."""
+
+    for selector, lookup in (("labelSelector", lambda key: (item["metadata"].get("labels") or {}).get(key)), ("fieldSelector", lambda key: _field(item, key))):
+        for requirement in (query.get(selector) or [""])[0].split(","):
+            if requirement:
+                key, _, value = requirement.partition("=")
+                if lookup(key) != value.lstrip("="):
+                    return False
+    return True
+
+
+def _field(item: Dict[str, Any], path: str) -> Any:
+    value: Any = item
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _table(plural: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a meta.k8s.io Table, with the pod columns kubectl shows and name and age for anything else."""
+
+    if plural == "pods":
+        columns = [("Name", "string", 0), ("Ready", "string", 0), ("Status", "string", 0), ("Restarts", "integer", 0), ("Age", "date", 0), ("Node", "string", 1)]
+    else:
+        columns = [("Name", "string", 0), ("Age", "date", 0)]
+
+    rows = []
+    for item in items:
+        metadata = item["metadata"]
+        if plural == "pods":
+            statuses = item.get("status", {}).get("containerStatuses", [])
+            waiting = [status["state"]["waiting"]["reason"] for status in statuses if "waiting" in status.get("state", {})]
+            cells = [
+                metadata["name"],
+                f"{sum(1 for status in statuses if status.get('ready'))}/{len(statuses)}",
+                waiting[0] if waiting else item.get("status", {}).get("phase", ""),
+                sum(status.get("restartCount", 0) for status in statuses),
+                metadata.get("creationTimestamp"),
+                item.get("spec", {}).get("nodeName"),
+            ]
+        else:
+            cells = [metadata["name"], metadata.get("creationTimestamp")]
+        rows.append({"cells": cells, "object": {"metadata": metadata}})
+    return {
+        "kind": "Table",
+        "columnDefinitions": [{"name": name, "type": kind, "priority": priority} for name, kind, priority in columns],
+        "rows": rows,
+    }
+
+
+def _not_found(path: str) -> Tuple[int, Dict[str, Any], str]:
+    return 404, {"kind": "Status", "status": "Failure", "reason": "NotFound", "message": f"{path} not found", "code": 404}, "application/json"
+
+
+def check() -> List[str]:
+    """Run the backend against the fake server, and the fallback to the fake kubectl. Returns the failures."""
+
+    sys.path.insert(0, REPO_DIR)
+    from k8s_assistant.tools.KubectlTool import KubectlTool
+    from k8s_assistant.tools.command import KubectlCommand
+    from k8s_assistant.tools.k8s_api import KubeAPIBackend
+
+    work_dir = tempfile.mkdtemp(prefix="k8s-assistant-fakeapi-")
+    fixtures_path = os.path.join(work_dir, "fixtures.json")
+    with open(fixtures_path, "w") as f:
+        json.dump({
+            "get pods -o yaml -n payments": {"stdout": "apiVersion: v1\nkind: List\n"},
+            "get pods -n payments": {"stdout": "NAME                       READY   STATUS    RESTARTS   AGE\nfrom-kubectl-0             1/1     Running   0          1d\n"},
+        }, f)
+    shim = os.path.join(work_dir, "kubectl")
+    with open(shim, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCH_DIR, "fake_kubectl.py")}" "$@"\n')
+    os.chmod(shim, os.stat(shim).st_mode | stat.S_IEXEC)
+    os.environ.update({
+        "PATH": work_dir + os.pathsep + os.environ.get("PATH", ""),
+        "FAKE_KUBECTL_FIXTURES": fixtures_path,
+        "KUBECONFIG": os.path.join(work_dir, "kubeconfig"),
+    })
+
+    server = FakeAPIServer().start()
+    backend = KubeAPIBackend(server.url)
+    unreachable = KubeAPIBackend("http://127.0.0.1:9", timeout=1)
+    failures = []
+
+    def expect(name: str, result: Dict[str, Any], *texts: str, api: bool = True) -> None:
+        output = result.get("stdout", "")
+        missing = [text for text in texts if text not in output]
+        if result.get("status") != "success" or missing:
+            failures.append(f"{name}: expected {missing} in {result}")
+        else:
+            print(f"ok   {name}")
+
+    try:
+        expect("get", backend.run(KubectlCommand("get pods", "payments")), "checkout-7d9f8b6c5-x2k4p", "CrashLoopBackOff", "0/1")
+        expect("get by label", backend.run(KubectlCommand("get po -l app=ledger -o name", "payments")), "pod/ledger-6b5f7d8c9-p8q2r")
+        expect("describe", backend.run(KubectlCommand("describe pod checkout-7d9f8b6c5-x2k4p", "payments")), "Namespace:    payments", "BackOff")
+        expect("logs", backend.run(KubectlCommand("logs checkout-7d9f8b6c5-x2k4p", "payments")), "no such host")
+
+        not_found = backend.run(KubectlCommand("get pod missing", "payments"))
+        if not_found.get("status") != "error" or "NotFound" not in not_found.get("stderr", ""):
+            failures.append(f"get missing: expected a NotFound error, got {not_found}")
+        else:
+            print("ok   get missing")
+
+        requests = len(server.requests)
+        tool = KubectlTool(backend=backend)
+        expect("fallback for an unsupported output format", tool.run("get pods -o yaml", "payments"), "kind: List")
+        if len(server.requests) != requests:
+            failures.append("fallback for an unsupported output format: the API server was called")
+        expect("fallback for an unreachable API server", KubectlTool(backend=unreachable).run("get pods", "payments"), "from-kubectl-0")
+
+        # The backend was built for the context current at startup, so after a switch kubectl must answer
+        with open(os.environ["KUBECONFIG"], "w") as f:
+            f.write("current-context: other\n")
+        requests = len(server.requests)
+        expect("fallback after a context switch", KubectlTool(backend=backend).run("get pods", "payments"), "from-kubectl-0")
+        if len(server.requests) != requests:
+            failures.append("fallback after a context switch: the API server was called")
+    finally:
+        backend.close()
+        unreachable.close()
+        server.stop()
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake Kubernetes API server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--cluster", help="JSON file with the objects to serve, in the shape of CLUSTER")
+    parser.add_argument("--check", action="store_true", help="Check the API backend and its kubectl fallback, then exit")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check()
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1 if failures else 0)
+
+    cluster = None
+    if args.cluster:
+        with open(args.cluster) as f:
+            cluster = json.load(f)
+    server = FakeAPIServer(cluster, port=args.port)
+    print(f"Fake Kubernetes API server listening on {server.url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Fake kubectl that replays recorded outputs.
+
+Fixtures are read from the JSON file named by FAKE_KUBECTL_FIXTURES, mapping a command line
+(without the leading "kubectl") to its recorded output:
+
+    {"get pods -n default": {"stdout": "...", "stderr": "", "code": 0, "delay_ms": 150}}
+
+A fixture can also generate large outputs with {"repeat": "<line>", "count": 50000}.
+Commands are matched exactly first, then with namespace flags ignored on both sides.
+"""
+import json
+import os
+import sys
+import time
+
+
+def strip_namespace(args):
+    stripped, skip = [], False
+    for arg in args:
+        if skip:
+            skip = False
+            continue
+        if arg in ("-n", "--namespace"):
+            skip = True
+            continue
+        if arg.startswith("--namespace="):
+            continue
+        stripped.append(arg)
+    return stripped
+
+
+def main(args):
+    with open(os.environ["FAKE_KUBECTL_FIXTURES"]) as f:
+        fixtures = json.load(f)
+
+    fixture = fixtures.get(" ".join(args))
+    if fixture is None:
+        stripped = {" ".join(strip_namespace(key.split())): value for key, value in fixtures.items()}
+        fixture = stripped.get(" ".join(strip_namespace(args)))
+    if fixture is None:
+        sys.stderr.write("No resources found.\n")
+        return 0
+
+    time.sleep(fixture.get("delay_ms", 0) / 1000)
+    if "repeat" in fixture:
+        line = fixture["repeat"].rstrip("\n") + "\n"
+        for idx in range(fixture.get("count", 1)):
+            sys.stdout.write(line.replace("{i}", str(idx)))
+    else:
+        sys.stdout.write(fixture.get("stdout", ""))
+    sys.stderr.write(fixture.get("stderr", ""))
+    return fixture.get("code", 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,357 @@
+"""
+Local mock of the Anthropic Messages API and the OpenAI Chat Completions API.
+
+Responses are scripted per scenario: the mock finds the latest user query in the request,
+looks up the scenario for it and replays the turn matching the number of assistant messages
+sent since that query. Latency is configurable so benchmarks can model slow providers, and faults
+can be injected to exercise the LLM scheduler: random 429s, randomly slow responses, a per minute
+request limit reported in rate limit headers, and models that do not exist.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class MockLLMServer:
+    """Threaded HTTP server serving /v1/messages and /v1/chat/completions from a scenario script."""
+
+    def __init__(
+        self,
+        scenarios: List[Dict[str, Any]],
+        anthropic_latency: float = 0.0,
+        openai_latency: float = 0.0,
+        token_delay: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        slow_rate: float = 0.0,
+        slow_delay: float = 0.0,
+        requests_per_minute: int = 0,
+        unavailable_models: List[str] | None = None,
+        seed: int | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.scenarios = scenarios
+        self.anthropic_latency = anthropic_latency
+        self.openai_latency = openai_latency
+        self.token_delay = token_delay
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.requests_per_minute = requests_per_minute
+        self.unavailable_models = set(unavailable_models or [])
+        self.random = random.Random(seed)
+        self.recent = {"anthropic": [], "openai": []}
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                mock._count("bytes_in", len(body))
+                request = json.loads(body or b"{}")
+                if self.path.endswith("/messages"):
+                    mock._handle_anthropic(self, request)
+                elif self.path.endswith("/chat/completions"):
+                    mock._handle_openai(self, request)
+                else:
+                    mock._send_json(self, 404, {"error": {"type": "not_found", "message": self.path}})
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_stats(self) -> Dict[str, int]:
+        """Reset the request counters and return their previous values."""
+
+        with self.lock:
+            previous = dict(getattr(self, "stats", {}))
+            self.stats = {
+                "anthropic_requests": 0, "openai_requests": 0, "bytes_in": 0, "bytes_out": 0,
+                "rate_limited": 0, "slowed": 0, "unavailable": 0,
+            }
+        return previous
+
+    # Fault injection
+
+    def _admit(self, provider: str, handler, request: Dict[str, Any]) -> Dict[str, str] | None:
+        """
+        Apply the injected faults to a request. Returns the rate limit headers for the response,
+        or None when an error response has already been sent.
+        """
+
+        now = time.time()
+        with self.lock:
+            recent = self.recent[provider] = [sent for sent in self.recent[provider] if sent > now - 60]
+            over_limit = self.requests_per_minute and len(recent) >= self.requests_per_minute
+            if not over_limit:
+                recent.append(now)
+            injected = self.random.random() < self.rate_limit_rate
+            slow = self.random.random() < self.slow_rate
+
+        headers = {}
+        if self.requests_per_minute:
+            reset = 60 - (now - recent[0]) if recent else 0.0
+            remaining = max(0, self.requests_per_minute - len(recent))
+            if provider == "anthropic":
+                reset_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now + reset + 1))
+                headers = {
+                    "anthropic-ratelimit-requests-limit": str(self.requests_per_minute),
+                    "anthropic-ratelimit-requests-remaining": str(remaining),
+                    "anthropic-ratelimit-requests-reset": reset_at,
+                }
+            else:
+                headers = {
+                    "x-ratelimit-limit-requests": str(self.requests_per_minute),
+                    "x-ratelimit-remaining-requests": str(remaining),
+                    "x-ratelimit-reset-requests": f"{reset:.3f}s",
+                }
+
+        if request.get("model") in self.unavailable_models:
+            self._count("unavailable")
+            self._send_error(handler, provider, 404, "not_found_error", f"model: {request.get('model')}", headers)
+            return None
+        if over_limit or injected:
+            self._count("rate_limited")
+            wait = reset if over_limit else self.retry_after
+            headers["retry-after"] = str(max(1, round(wait)))
+            self._send_error(handler, provider, 429, "rate_limit_error", "Rate limit exceeded", headers)
+            return None
+        if slow:
+            self._count("slowed")
+            time.sleep(self.slow_delay)
+        return headers
+
+    def _send_error(self, handler, provider: str, status: int, kind: str, message: str, headers: Dict[str, str]) -> None:
+        if provider == "anthropic":
+            payload = {"type": "error", "error": {"type": kind, "message": message}}
+        else:
+            payload = {"error": {"message": message, "type": kind, "param": None, "code": kind}}
+        self._send_json(handler, status, payload, headers)
+
+    # Anthropic
+
+    def _handle_anthropic(self, handler, request: Dict[str, Any]) -> None:
+        self._count("anthropic_requests")
+        headers = self._admit("anthropic", handler, request)
+        if headers is None:
+            return
+        time.sleep(self.anthropic_latency)
+
+        query, step = _find_step(request.get("messages", []))
+        turn = self._scenario(query).get("turns", [])
+        content = turn[step] if step < len(turn) else "I have completed the task."
+        blocks = []
+        if isinstance(content, str):
+            blocks.append({"type": "text", "text": content})
+        else:
+            for call in content:
+                blocks.append({
+                    "type": "tool_use",
+                    "id": f"toolu_{uuid.uuid4().hex[:20]}",
+                    "name": call.get("tool", "kubectl"),
+                    "input": call.get("input", {}),
+                })
+
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:20]}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "mock"),
+            "content": blocks,
+            "stop_reason": "tool_use" if any(block["type"] == "tool_use" for block in blocks) else "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": len(json.dumps(request)) // 4,
+                "output_tokens": len(json.dumps(blocks)) // 4,
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": 0,
+            },
+        }
+        if request.get("stream"):
+            self._stream_anthropic(handler, message, headers)
+        else:
+            self._send_json(handler, 200, message, headers)
+
+    def _stream_anthropic(self, handler, message: Dict[str, Any], headers: Dict[str, str] | None = None) -> None:
+        events = [("message_start", {"type": "message_start", "message": {**message, "content": [], "stop_reason": None}})]
+        for index, block in enumerate(message["content"]):
+            if block["type"] == "text":
+                events.append(("content_block_start", {"type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""}}))
+                for token in _tokens(block["text"]):
+                    events.append(("content_block_delta", {"type": "content_block_delta", "index": index, "delta": {"type": "text_delta", "text": token}}))
+            else:
+                events.append(("content_block_start", {"type": "content_block_start", "index": index, "content_block": {**block, "input": {}}}))
+                events.append(("content_block_delta", {"type": "content_block_delta", "index": index, "delta": {"type": "input_json_delta", "partial_json": json.dumps(block["input"])}}))
+            events.append(("content_block_stop", {"type": "content_block_stop", "index": index}))
+        events.append(("message_delta", {"type": "message_delta", "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None}, "usage": {"output_tokens": message["usage"]["output_tokens"]}}))
+        events.append(("message_stop", {"type": "message_stop"}))
+        self._send_sse(handler, [f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events], headers)
+
+    # OpenAI
+
+    def _handle_openai(self, handler, request: Dict[str, Any]) -> None:
+        self._count("openai_requests")
+        headers = self._admit("openai", handler, request)
+        if headers is None:
+            return
+        time.sleep(self.openai_latency)
+
+        messages = [message for message in request.get("messages", []) if message.get("role") == "user"]
+        query = next((message["content"] for message in reversed(messages) if isinstance(message.get("content"), str) and self._has_scenario(message["content"])), "")
+        text = self._scenario(query).get("summary", "## Root Cause Analysis (RCA)\nNo issues found.")
+        created = int(time.time())
+
+        if request.get("stream"):
+            chunks = []
+            for token in _tokens(text):
+                chunk = {
+                    "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": request.get("model", "mock"),
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}, "finish_reason": None}],
+                }
+                chunks.append(f"data: {json.dumps(chunk)}\n\n")
+            chunks.append("data: [DONE]\n\n")
+            self._send_sse(handler, chunks, headers)
+            return
+
+        self._send_json(handler, 200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": created,
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(json.dumps(request)) // 4, "completion_tokens": len(text) // 4, "total_tokens": 0},
+        }, headers)
+
+    # Helpers
+
+    def _scenario(self, query: str) -> Dict[str, Any]:
+        for scenario in self.scenarios:
+            if scenario["query"] == query:
+                return scenario
+        return {}
+
+    def _has_scenario(self, query: str) -> bool:
+        return any(scenario["query"] == query for scenario in self.scenarios)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+    def _send_json(self, handler, status: int, payload: Dict[str, Any], headers: Dict[str, str] | None = None) -> None:
+        body = json.dumps(payload).encode()
+        self._count("bytes_out", len(body))
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _send_sse(self, handler, chunks: List[str], headers: Dict[str, str] | None = None) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        for chunk in chunks:
+            data = chunk.encode()
+            self._count("bytes_out", len(data))
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            handler.wfile.flush()
+            time.sleep(self.token_delay)
+        handler.wfile.write(b"0\r\n\r\n")
+
+
+def _find_step(messages: List[Dict[str, Any]]):
+    """Find the latest user query and the number of assistant turns sent since it."""
+
+    query, start = "", 0
+    for idx, message in enumerate(messages):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            texts = [block.get("text", "") for block in content if isinstance(block, dict) and block.get("type") == "text"]
+            if len(texts) != len(content):
+                continue
+            content = "".join(texts)
+        if isinstance(content, str):
+            query, start = content, idx
+    step = sum(1 for message in messages[start:] if message.get("role") == "assistant")
+    return query, step
+
+
+def _tokens(text: str) -> List[str]:
+    """Split text into word sized tokens, keeping the whitespace."""
+
+    tokens, current = [], ""
+    for char in text:
+        current += char
+        if char in " \n":
+            tokens.append(current)
+            current = ""
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the mock Anthropic/OpenAI server")
+    parser.add_argument("--scenarios", default="benchmarks/scenarios.json")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--anthropic-latency", type=float, default=0.0)
+    parser.add_argument("--openai-latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Seconds in the retry-after header of injected 429s")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests delayed by --slow-delay")
+    parser.add_argument("--slow-delay", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=0, help="Request limit per provider, 0 for none")
+    parser.add_argument("--unavailable-models", nargs="*", default=[], help="Models answered with a 404")
+    args = parser.parse_args()
+
+    with open(args.scenarios) as f:
+        server = MockLLMServer(
+            json.load(f)["scenarios"],
+            anthropic_latency=args.anthropic_latency,
+            openai_latency=args.openai_latency,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after,
+            slow_rate=args.slow_rate,
+            slow_delay=args.slow_delay,
+            requests_per_minute=args.requests_per_minute,
+            unavailable_models=args.unavailable_models,
+            port=args.port
+        )
+    print(f"Mock LLM server listening on {server.url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,239 @@
+"""
+Offline end-to-end benchmark for K8sCommandClient.process_query.
+
+Runs the real client and server.py over MCP stdio, with a fake kubectl replaying recorded
+outputs and a local mock of the Anthropic and OpenAI APIs. Reports per query wall time,
+LLM turns, tool calls and bytes moved, plus p50/p95 per scenario.
+
+    python benchmarks/run_benchmark.py --repeats 5 --output bench.json
+    python benchmarks/run_benchmark.py --baseline bench.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_llm import MockLLMServer
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest rank percentile."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def prepare_environment(fixtures: Dict[str, Any], mock_url: str) -> Dict[str, str]:
+    """Write the fake kubectl shim and fixtures, and build the environment for the client and server."""
+
+    work_dir = tempfile.mkdtemp(prefix="k8s-assistant-bench-")
+    fixtures_path = os.path.join(work_dir, "fixtures.json")
+    with open(fixtures_path, "w") as f:
+        json.dump(fixtures, f)
+
+    shim = os.path.join(work_dir, "kubectl")
+    with open(shim, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCH_DIR, "fake_kubectl.py")}" "$@"\n')
+    os.chmod(shim, os.stat(shim).st_mode | stat.S_IEXEC)
+
+    env = {
+        **os.environ,
+        "PATH": work_dir + os.pathsep + os.environ.get("PATH", ""),
+        "PYTHONPATH": REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "FAKE_KUBECTL_FIXTURES": fixtures_path,
+        "KUBECONFIG": os.path.join(work_dir, "kubeconfig"),
+        "ANTHROPIC_BASE_URL": mock_url,
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "ANTHROPIC_API_KEY": "mock-key",
+        "GPT_API_KEY": "mock-key",
+    }
+    # The LLM clients live in this process, so they need the mock endpoints as well
+    os.environ.update({key: env[key] for key in ("ANTHROPIC_BASE_URL", "OPENAI_BASE_URL", "ANTHROPIC_API_KEY", "GPT_API_KEY")})
+    return env
+
+
+def instrument_tools(client, counters: Dict[str, int]) -> None:
+    """Count tool calls and result bytes sent over the client's MCP session."""
+
+    send_tool_call = client._send_tool_call
+
+    async def counted_send_tool_call(name, arguments):
+        result = await send_tool_call(name, arguments)
+        counters["tool_calls"] += 1
+        counters["tool_bytes"] += sum(len(getattr(item, "text", "") or "") for item in result.content)
+        return result
+
+    client._send_tool_call = counted_send_tool_call
+
+
+async def run(args) -> Dict[str, Any]:
+    from mcp import StdioServerParameters
+    from k8s_assistant.client import K8sCommandClient
+
+    with open(args.scenarios) as f:
+        config = json.load(f)
+    scenarios = [scenario for scenario in config["scenarios"] if not args.only or scenario["name"] in args.only]
+
+    mock = MockLLMServer(
+        config["scenarios"],
+        anthropic_latency=args.anthropic_latency,
+        openai_latency=args.openai_latency,
+        token_delay=args.token_delay,
+        rate_limit_rate=args.rate_limit_rate,
+        slow_rate=args.slow_rate,
+        slow_delay=args.slow_delay,
+        unavailable_models=args.unavailable_models,
+        seed=args.seed
+    ).start()
+    env = prepare_environment(config.get("kubectl", {}), mock.url)
+    server_params = StdioServerParameters(
+        command=sys.executable,
+        args=[os.path.join(REPO_DIR, "k8s_assistant", "server.py")],
+        env=env,
+    )
+
+    startup = time.perf_counter()
+    client = K8sCommandClient(server_params)
+    await client.async_init()
+    startup = time.perf_counter() - startup
+
+    counters = {"tool_calls": 0, "tool_bytes": 0}
+    instrument_tools(client, counters)
+
+    runs = []
+    try:
+        for repeat in range(args.repeats):
+            for scenario in scenarios:
+                # Every query starts from an empty conversation so runs are comparable
+                client.llm.user_history.clear()
+                client.summary_llm.user_history.clear()
+                mock.reset_stats()
+                counters.update(tool_calls=0, tool_bytes=0)
+
+                start = time.perf_counter()
+                answer = await client.process_query(
+                    scenario["query"],
+                    on_token=(lambda text: None) if args.stream else None
+                )
+                wall = time.perf_counter() - start
+                llm = mock.reset_stats()
+
+                runs.append({
+                    "scenario": scenario["name"],
+                    "repeat": repeat,
+                    "wall_time": round(wall, 4),
+                    "llm_turns": llm["anthropic_requests"] + llm["openai_requests"],
+                    "tool_calls": counters["tool_calls"],
+                    "tool_bytes": counters["tool_bytes"],
+                    "llm_bytes_out": llm["bytes_in"],
+                    "llm_bytes_in": llm["bytes_out"],
+                    "answer_bytes": len(answer.encode()),
+                    "rate_limited": llm["rate_limited"],
+                })
+        scheduler = client.llm.scheduler.stats()
+        server = await client.server_stats()
+    finally:
+        await client.cleanup()
+        mock.stop()
+
+    summary = {}
+    for scenario in scenarios:
+        times = [run["wall_time"] for run in runs if run["scenario"] == scenario["name"]]
+        last = [run for run in runs if run["scenario"] == scenario["name"]][-1]
+        summary[scenario["name"]] = {
+            "p50": round(percentile(times, 50), 4),
+            "p95": round(percentile(times, 95), 4),
+            "llm_turns": last["llm_turns"],
+            "tool_calls": last["tool_calls"],
+            "bytes_moved": last["tool_bytes"] + last["llm_bytes_in"] + last["llm_bytes_out"],
+        }
+    all_times = [run["wall_time"] for run in runs]
+    summary["all"] = {"p50": round(percentile(all_times, 50), 4), "p95": round(percentile(all_times, 95), 4)}
+
+    return {"startup_seconds": round(startup, 4), "summary": summary, "scheduler": scheduler, "server": server, "runs": runs}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"Startup: {report['startup_seconds']:.3f}s")
+    print(f"{'scenario':<28}{'p50 (s)':>10}{'p95 (s)':>10}{'llm turns':>11}{'tools':>7}{'bytes':>12}")
+    for name, row in report["summary"].items():
+        print(
+            f"{name:<28}{row['p50']:>10.3f}{row['p95']:>10.3f}"
+            f"{row.get('llm_turns', ''):>11}{row.get('tool_calls', ''):>7}{row.get('bytes_moved', ''):>12}"
+        )
+    dedup = (report.get("server") or {}).get("dedup")
+    if dedup:
+        print(f"Tool calls: {dedup['executed']} executed, {dedup['shared']} shared with an identical call (dedup ratio {dedup['dedup_ratio']})")
+    for target, row in report["scheduler"]["targets"].items():
+        print(
+            f"{target}: {row['requests']} requests, {row['retries']} retries ({row['rate_limited']} rate limited), "
+            f"{row['hedges']} hedges ({row['hedge_wins']} won), {row['failovers']} failovers, "
+            f"{row['failures']} failures, p50/p95/p99 {row['p50'] or '-'}/{row['p95'] or '-'}/{row['p99'] or '-'}s"
+        )
+    end_to_end = report["scheduler"].get("end_to_end")
+    if end_to_end and end_to_end["p50"] is not None:
+        print(f"LLM calls end to end, with retries and failovers: p50/p95/p99 {end_to_end['p50']}/{end_to_end['p95']}/{end_to_end['p99']}s")
+
+
+def check_regression(report: Dict[str, Any], baseline_path: str, max_regression: float) -> List[str]:
+    """Compare p50 wall time per scenario against a baseline report and list the regressions."""
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)["summary"]
+    failures = []
+    for name, row in report["summary"].items():
+        if name in baseline and baseline[name]["p50"] > 0:
+            change = row["p50"] / baseline[name]["p50"] - 1
+            if change > max_regression:
+                failures.append(f"{name}: p50 {baseline[name]['p50']:.3f}s -> {row['p50']:.3f}s (+{change:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the k8s assistant")
+    parser.add_argument("--scenarios", default=os.path.join(BENCH_DIR, "scenarios.json"))
+    parser.add_argument("--only", nargs="*", help="Only run these scenario names")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--anthropic-latency", type=float, default=0.3, help="Seconds added to every Anthropic call")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Seconds added to every OpenAI call")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--stream", action="store_true", help="Exercise the streaming path")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of LLM calls answered with a 429")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of LLM calls delayed by --slow-delay")
+    parser.add_argument("--slow-delay", type=float, default=0.0)
+    parser.add_argument("--unavailable-models", nargs="*", default=[], help="Models the mock answers with a 404")
+    parser.add_argument("--seed", type=int, help="Seed for the injected faults")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Fail when p50 regresses against this report")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        failures = check_regression(report, args.baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
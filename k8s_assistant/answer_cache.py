@@ -0,0 +1,110 @@
+# answer_cache.py
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+
+from k8s_assistant.tool_cache import cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings ("What's wrong in payments?") share a cache entry."""
+
+    query = re.sub(r"\s+", " ", query.lower()).strip()
+    return query.rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    Whole answers persisted in SQLite, keyed by the normalized query and the cluster it was asked about.
+    Every entry stores the kubectl calls the answer was built from, with a fingerprint of the object
+    versions they read. An entry is only served while those fingerprints still match the cluster.
+    Entries expire after ttl seconds, and the least recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int = 500, ttl: float = 900):
+        self.path = path or os.path.join(cache_dir(), "answers.sqlite")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, query TEXT, answer TEXT, calls TEXT, created REAL, last_used REAL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(query: str, scope: str) -> str:
+        """Build the cache key; scope identifies the cluster, e.g. the tool server and kube context."""
+        return hashlib.sha256(f"{scope}\0{normalize_query(query)}".encode()).hexdigest()
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Get an unexpired entry as {"answer", "calls", "age"}, where calls hold their fingerprints."""
+
+        with self._lock:
+            row = self._db.execute("SELECT answer, calls, created FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if time.time() - row[2] > self.ttl:
+                self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return {"answer": row[0], "calls": json.loads(row[1]), "age": time.time() - row[2]}
+
+    def put(self, key: str, query: str, answer: str, calls: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+                (key, query, answer, json.dumps(calls), now, now)
+            )
+            self._db.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+            self._db.execute(
+                "DELETE FROM answers WHERE key NOT IN (SELECT key FROM answers ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._db.commit()
+
+    def record(self, hit: bool) -> None:
+        """Count a lookup whose entry was found but turned out current (hit) or stale."""
+
+        if hit:
+            self.hits += 1
+        else:
+            self.stale += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        lookups = self.hits + self.misses + self.stale
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        self._db.close()
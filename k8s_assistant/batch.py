@@ -0,0 +1,126 @@
+# batch.py
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+from k8s_assistant.client import K8sCommandClient
+
+logger = logging.getLogger(__name__)
+
+
+def load_queries(path: str) -> List[Dict[str, str]]:
+    """
+    Read queries from a JSONL file, one {"id": ..., "query": ...} object per line.
+    request_id/body are accepted as well, and the line number is used when there is no id.
+    """
+
+    queries = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            query = item.get("query") or item.get("body")
+            if not query:
+                raise ValueError(f"{path}:{line_number}: missing query")
+            queries.append({"id": str(item.get("id") or item.get("request_id") or line_number), "query": query})
+    return queries
+
+
+def completed_ids(path: str) -> set:
+    """Get the ids already answered in an output file, so an interrupted run can resume where it stopped."""
+
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by the interruption
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def trim_partial_line(path: str) -> None:
+    """Cut off a trailing line left half written by an interruption, so appended results start on a new line."""
+
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+async def run_batch(
+    server_params,
+    input_path: str,
+    output_path: str,
+    workers: int = 4,
+    timeout: float | None = None,
+    resume: bool = True
+) -> Dict[str, Any]:
+    """
+    Answer every query in input_path and append one JSON result per line to output_path as each finishes.
+    A pool of workers shares one tool server and LLM connection pool; every query gets its own session,
+    so no history leaks between queries. Failed queries are written with status "error" and retried on resume.
+    """
+
+    queries = load_queries(input_path)
+    if resume:
+        trim_partial_line(output_path)
+    done = completed_ids(output_path) if resume else set()
+    pending = [query for query in queries if query["id"] not in done]
+    stats = {"total": len(queries), "skipped": len(queries) - len(pending), "ok": 0, "error": 0}
+    if not pending:
+        return {**stats, "elapsed_seconds": 0.0}
+
+    client = K8sCommandClient(server_params, max_concurrent_queries=workers)
+    await client.async_init()
+
+    work: "asyncio.Queue[Dict[str, str]]" = asyncio.Queue()
+    for query in pending:
+        work.put_nowait(query)
+
+    started = time.perf_counter()
+    with open(output_path, "a" if resume else "w") as output:
+
+        async def worker():
+            while not work.empty():
+                item = work.get_nowait()
+                record = await answer(client, item, timeout)
+                stats[record["status"]] += 1
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+                print(f"[{stats['ok'] + stats['error']}/{len(pending)}] {item['id']}: {record['status']} in {record['elapsed_seconds']}s")
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+        finally:
+            await client.cleanup()
+
+    return {**stats, "elapsed_seconds": round(time.perf_counter() - started, 3)}
+
+
+async def answer(client: K8sCommandClient, item: Dict[str, str], timeout: float | None) -> Dict[str, Any]:
+    """Run one query in a fresh session and build its result record."""
+
+    session = client.new_session(item["id"])
+    record = {"id": item["id"], "query": item["query"], "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    start = time.perf_counter()
+    try:
+        record["answer"] = await asyncio.wait_for(client.process_query(item["query"], session=session, raise_errors=True), timeout)
+        record["status"] = "ok"
+    except asyncio.TimeoutError:
+        record.update(status="error", error=f"Timed out after {timeout} seconds")
+    except Exception as e:
+        logger.exception(f"Batch query {item['id']} failed")
+        record.update(status="error", error=str(e))
+    record["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    return record
@@ -1,14 +1,23 @@
 # mcp_k8s_client.py
 import os
 import sys
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
 import asyncio
+import contextlib
+import json
 from contextlib import AsyncExitStack
-from k8s_assistant.llms import claude
-from k8s_assistant.llms import gpt
+from k8s_assistant import tracing
+from k8s_assistant.delta import DeltaTracker, call_key
+from k8s_assistant.output_store import OutputStore
+from k8s_assistant.tool_cache import ToolListCache, server_fingerprint
 import logging
 import shutil
+import time
+import uuid
+from typing import TYPE_CHECKING
+# mcp, anthropic and openai take about a second to import, so they are imported where first used.
+# This lets the tool server start, and the LLM clients load, while the other is still importing.
+if TYPE_CHECKING:
+    from mcp import StdioServerParameters, types
 # logging.basicConfig(level=logging.WARNING, format='%(message)s')
 
 logger = logging.getLogger(__name__)
@@ -30,22 +39,8 @@ logging.getLogger('anyio').setLevel(logging.ERROR)
 
 exit_in_progress = False
 
-
-class SuppressOutput:
-    def __init__(self):
-        self.devnull = open(os.devnull, 'w')
-        
-    def __enter__(self):
-        self.original_stdout = sys.stdout
-        self.original_stderr = sys.stderr
-        sys.stdout = self.devnull
-        sys.stderr = self.devnull
-        return self
-        
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stdout = self.original_stdout
-        sys.stderr = self.original_stderr
-        self.devnull.close()
+# Tools the client calls itself, which are not offered to the model
+INTERNAL_TOOLS = {"resource_versions", "server_stats"}
 
 
 def get_separator(char="=", min_width=40):
@@ -61,104 +56,357 @@ def get_separator(char="=", min_width=40):
         return char * 60  # Default fallback width
 
 
+class Session:
+    """
+    Conversation state of one user: the Claude and GPT histories.
+    Queries in a session run one at a time, so its history stays consistent.
+    """
+    
+    def __init__(self, session_id: str, llm, summary_llm):
+        self.id = session_id
+        self.llm = llm
+        self.summary_llm = summary_llm
+        self.lock = asyncio.Lock()
+        self.created = self.last_used = time.monotonic()
+        self.queries = 0
+        self.deltas = DeltaTracker()  # Last full tool outputs, to send repeats as diffs
+        self.outputs = OutputStore()  # Tool outputs, held once and referred to by handle from both histories
+    
+    @property
+    def busy(self) -> bool:
+        return self.lock.locked()
+    
+    def idle_seconds(self) -> float:
+        return 0.0 if self.busy else time.monotonic() - self.last_used
+
+
 class K8sCommandClient:
     
-    def __init__(self, server_config: StdioServerParameters):
-        """Initialize the K8sCommandClient with server configuration."""
+    def __init__(
+        self,
+        server_config: "StdioServerParameters | str | None" = None,
+        max_concurrent_tools: int = 4,
+        tool_timeout: float = 30.0,
+        max_concurrent_queries: int | None = None
+    ):
+        """
+        Initialize the K8sCommandClient with server configuration.
+        server_config is either stdio parameters to spawn a private server, or the URL of a running
+        streamable HTTP server (e.g. http://localhost:8080/mcp) shared with other clients.
+        None spawns the bundled server.py, without importing mcp up front.
+        """
         
         self.server_config = server_config
         self.mcp_client = None  # Placeholder for MCP client
         self.tools = []  # This will be populated later
+        self.max_concurrent_tools = max(1, max_concurrent_tools)  # Cap on tool calls in flight per turn
+        self.tool_timeout = tool_timeout  # Per tool call timeout in seconds
+        # Cap on queries running at once across all sessions; waiting sessions get slots in arrival order
+        self.query_slots = asyncio.Semaphore(max_concurrent_queries) if max_concurrent_queries else None
+        self.running_queries = 0
+        self.tool_cache = ToolListCache()
+        self.startup_timings = {}  # Seconds spent in each startup step
+        self._ready = None  # Resolves to the MCP session once the server is connected
+        self._closing = None
+        self._connection = None  # Task that owns the MCP transport
+        self._llm_setup = None
+        self.server_tool_names = set()  # Every tool the connected server offers, including internal ones
+        # Whole answers are cached on disk when K8S_ASSISTANT_ANSWER_CACHE=1, and served while the objects they read are unchanged
+        self.answer_cache = None
+        if os.getenv("K8S_ASSISTANT_ANSWER_CACHE") == "1":
+            from k8s_assistant.answer_cache import AnswerCache
+            self.answer_cache = AnswerCache(ttl=float(os.getenv("K8S_ASSISTANT_ANSWER_TTL", "900")))
+        self._answer_stores = set()  # Background tasks fingerprinting and storing new answers
+        # Small talk and direct one command queries are answered without the LLMs when K8S_ASSISTANT_ROUTER=1
+        # Repeated tool calls in a session return only what changed when K8S_ASSISTANT_DELTA_RESULTS=1
+        self.delta_results = os.getenv("K8S_ASSISTANT_DELTA_RESULTS") == "1"
+        self.router = None
+        if os.getenv("K8S_ASSISTANT_ROUTER") == "1":
+            from k8s_assistant.router import IntentRouter
+            self.router = IntentRouter()
+        if not tracing.enabled():
+            tracing.configure("k8s-assistant-client")
 
-    async def async_init(self):
-        """Asynchronous initialization for MCP Client."""
+    async def async_init(self, wait: bool = True):
+        """
+        Asynchronous initialization for MCP Client.
+        The tool server is spawned first and the LLM clients are set up in a thread while it boots.
+        With wait=False and the server's tool list cached from an earlier run, this returns right away and
+        both finish in the background; the first query waits for them.
+        """
         
         logger.info("Initializing K8sCommandClient...")
+        started = time.perf_counter()
+        
+        fingerprint = server_fingerprint(self.server_config)
+        cached_tools = self.tool_cache.get(fingerprint)
+        self._ready = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._connection = asyncio.create_task(self.start_client(self.server_config, fingerprint))
+        self._llm_setup = asyncio.create_task(self._setup_llms(started))
+        
+        if cached_tools is not None:
+            self.tools = cached_tools
+            logger.info(f"Using cached tool list: {[tool['name'] for tool in self.tools]}")
+        if wait or cached_tools is None:
+            await self.wait_until_ready()
+        
+        self.system_prompt = self._create_system_prompt()
+        self.startup_timings["ready"] = time.perf_counter() - started
+    
+    async def _setup_llms(self, started: float):
+        """Import and create the LLM clients of the default session off the event loop."""
         
         try:
-            self.llm = claude.Claude()
-            self.summary_llm = gpt.GPT()
+            self.default_session = await asyncio.to_thread(self.new_session, "default")
+            self.llm = self.default_session.llm
+            self.summary_llm = self.default_session.summary_llm
+            self.startup_timings["llm_setup"] = time.perf_counter() - started
             logger.info("LLM clients initialized.")
         except Exception as e:
             logger.error(f"Failed to initialize LLM clients: {e}")
             raise
+    
+    async def wait_until_ready(self):
+        """Wait for the LLM clients and the MCP server."""
+        
+        await self._llm_setup
+        await self.wait_for_server()
+    
+    def new_session(self, session_id: str | None = None) -> Session:
+        """
+        Create a conversation with its own LLM histories.
+        All sessions share the MCP connection and the LLM connection pool of this client.
+        """
+        
+        from k8s_assistant.llms import claude, gpt
+        return Session(session_id or uuid.uuid4().hex, claude.AsyncClaude(), gpt.AsyncGPT())
+    
+    async def wait_for_server(self, timeout: float = 30):
+        """Wait until the MCP server is connected and return the session."""
         
         try:
-            # Suppress MCP debug output completely
-            with SuppressOutput():
-                self.mcp_client = await asyncio.wait_for(
-                    self.start_client(self.server_config), 
-                    timeout=30
-                )
-            logger.info("MCP client initialized.")
+            self.mcp_client = await asyncio.wait_for(asyncio.shield(self._ready), timeout=timeout)
         except Exception as e:
             logger.error(f"Failed to initialize MCP client: {e}")
             raise
-        
-        self.system_prompt = self._create_system_prompt()
+        return self.mcp_client
     
-    async def start_client(self, server_params: StdioServerParameters):
-        """Start the MCP client and return the session."""
+    async def start_client(self, server_params: "StdioServerParameters | str", fingerprint: str = ""):
+        """
+        Connect to the MCP server, list its tools and keep the connection open until cleanup.
+        This runs as its own task because the transports must be closed by the task that opened them.
+        """
         
-        self.exit_stack = AsyncExitStack()
+        from mcp import ClientSession
         
-        # Setup MCP client and get tools
-        async def setup_client(server_params: StdioServerParameters):
-            """Setup the MCP client and return the session."""
-            
-            stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
-            logger.info("Stdio transport initialized.")
-            self.stdio, self.write = stdio_transport
-            logger.info("Stdio transport set up.")
-            self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
-            logger.info("Client session initialized.")
-            await self.session.initialize()
-            logger.info("Connected to MCP server.")
-            self.mcp_client = self.session
-            if self.mcp_client:
-                logger.info("MCP client initialized.")
-                # List available tools
-                response = await self.mcp_client.list_tools()
-                for tool in response.tools:
-                    # print(f"Tool: {tool.name}, Description: {tool.description}")
-                    self.tools.append(
-                        {
-                            "name": tool.name,
-                            "description": tool.description,
-                            "input_schema": tool.inputSchema
-                        }
+        started = time.perf_counter()
+        server_params = server_params or server_parameters()
+        try:
+            async with AsyncExitStack() as exit_stack:
+                if isinstance(server_params, str):
+                    from mcp.client.streamable_http import streamablehttp_client
+                    
+                    # Connect to an already running server instead of spawning one
+                    http_transport = await exit_stack.enter_async_context(
+                        streamablehttp_client(server_params, timeout=self.tool_timeout)
                     )
-            
+                    read, write, _ = http_transport
+                    logger.info(f"Streamable HTTP transport connected to {server_params}.")
+                else:
+                    from mcp.client.stdio import stdio_client
+                    
+                    # Keep the server's log output off the terminal
+                    errlog = exit_stack.enter_context(open(os.devnull, "w"))
+                    read, write = await exit_stack.enter_async_context(stdio_client(server_params, errlog=errlog))
+                    logger.info("Stdio transport set up.")
+                session = await exit_stack.enter_async_context(ClientSession(read, write))
+                initialize_result = await session.initialize()
+                self.startup_timings["server_connect"] = time.perf_counter() - started
+                logger.info("Connected to MCP server.")
+                
+                # List available tools
+                response = await session.list_tools()
+                tools = [
+                    {
+                        "name": tool.name,
+                        "description": tool.description,
+                        "input_schema": tool.inputSchema
+                    }
+                    for tool in response.tools
+                    if tool.name not in INTERNAL_TOOLS
+                ]
+                self.server_tool_names = {tool.name for tool in response.tools}
                 logger.info(f"Available tools: {[tool.name for tool in response.tools]}")
-                # print(self.tools)
-                return self.mcp_client
-        
-        try:
-            self.mcp_client = await setup_client(server_params)  # Store the result where it should be
-            return self.mcp_client
-        except Exception as e:
-            logger.exception(f"Failed to initialize MCP client: {e}")
+                if tools != self.tools:
+                    # The cached list was stale, or there was none
+                    self.tools = tools
+                    self.system_prompt = self._create_system_prompt()
+                    self.tool_cache.put(fingerprint, initialize_result.serverInfo.version, tools)
+                self.startup_timings["server_ready"] = time.perf_counter() - started
+                
+                self._ready.set_result(session)
+                await self._closing.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e if isinstance(e, Exception) else ConnectionError("MCP connection closed"))
+            if not isinstance(e, asyncio.CancelledError):
+                logger.exception(f"MCP connection failed: {e}")
             raise
+        finally:
+            self.mcp_client = None
     
     async def cleanup(self):
         """Clean up resources when shutting down."""
-        if self.exit_stack:
+        if getattr(self, "llm", None) is not None:
+            logger.info(f"Session prompt cache report: {self.llm.prompt_cache_report()}")
+            logger.info(f"LLM scheduler: {self.llm.scheduler.stats()}")
+        
+        if self._answer_stores:
+            await asyncio.wait(self._answer_stores, timeout=2.0)
+        if self.router is not None:
+            logger.info(f"Intent router: {self.router.stats()}")
+        if getattr(self, "default_session", None) is not None:
+            logger.info(f"Session outputs: {self.default_session.outputs.stats()}")
+        if self.delta_results and getattr(self, "default_session", None) is not None:
+            logger.info(f"Delta encoded results: {self.default_session.deltas.stats()}")
+        if self.answer_cache is not None:
+            logger.info(f"Answer cache: {self.answer_cache.stats()}")
+            self.answer_cache.close()
+        if self.mcp_client is not None:
             try:
-                await asyncio.wait_for(self.exit_stack.aclose(), timeout=2.0)
-            except asyncio.CancelledError:
+                logger.info(f"Tool server: {await self.server_stats()}")
+            except Exception as e:
+                logger.debug(f"Could not get the tool server stats: {e}")
+        
+        if self._connection:
+            self._closing.set()
+            try:
+                await asyncio.wait_for(self._connection, timeout=2.0)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
                 pass
             except Exception as e:
-                logger.exception(f"Error during exit stack cleanup: {e}")
-            
+                logger.exception(f"Error during MCP connection cleanup: {e}")
             finally:
-                self.exit_stack = None
-                self.stdio = None
-                self.write = None
-                self.session = None
+                self._connection = None
                 self.mcp_client = None
+        
+        try:
+            from k8s_assistant.llms.LLM import close_shared_http_client
+            await close_shared_http_client()
+        except Exception as e:
+            logger.exception(f"Error while closing LLM connection pool: {e}")
             
         logger.info("Resources cleaned up")
     
+    async def _call_tool(self, call: dict, semaphore: asyncio.Semaphore) -> str:
+        """Execute a single tool call through the MCP client and return its text output."""
+        
+        async with semaphore:
+            print(f"Executing => {call['name']} {call['parameters'].get('command', '')}")
+            with tracing.span("tool.call", tool=call["name"], command=call["parameters"].get("command", "")) as span:
+                try:
+                    result = await asyncio.wait_for(
+                        self._send_tool_call(call["name"], call["parameters"]),
+                        timeout=self.tool_timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Tool call {call['id']} timed out after {self.tool_timeout}s")
+                    return f"Tool call timed out after {self.tool_timeout} seconds."
+                except Exception as e:
+                    logger.exception(f"Tool call {call['id']} failed: {e}")
+                    return f"Tool call failed: {e}"
+                
+                text = result.content[0].text if result.content else ""
+                if span:
+                    span.set(result_bytes=len(text.encode()))
+        
+        return text
+    
+    async def _send_tool_call(self, name: str, arguments: dict) -> "types.CallToolResult":
+        """Call a tool on the MCP server, passing the trace context in the request _meta when tracing is on."""
+        
+        mcp_client = self.mcp_client or await self.wait_for_server()
+        meta = tracing.inject()
+        if not meta:
+            return await mcp_client.call_tool(name, arguments)
+        
+        from mcp import types
+        request = types.ClientRequest(
+            types.CallToolRequest(
+                method="tools/call",
+                params=types.CallToolRequestParams(name=name, arguments=arguments, _meta=meta)
+            )
+        )
+        return await mcp_client.send_request(request, types.CallToolResult)
+    
+    async def _execute_tool_calls(self, tool_calls: list, started: dict | None = None) -> list:
+        """
+        Execute all tool calls requested in one LLM turn concurrently.
+        Calls already started while the response was streaming are passed in `started`, keyed by tool_use_id.
+        Results are returned in the same order as tool_calls, so they map back to their tool_use_id.
+        """
+        
+        started = started or {}
+        semaphore = asyncio.Semaphore(self.max_concurrent_tools)
+        outputs = await asyncio.gather(
+            *(started.get(call["id"]) or self._call_tool(call, semaphore) for call in tool_calls)
+        )
+        
+        return [
+            {
+                "id": call["id"],
+                "tool": call["name"],
+                "parameters": call["parameters"],
+                "result": output,
+            }
+            for call, output in zip(tool_calls, outputs)
+        ]
+    
+    async def _stream_llm_turn(self, on_token, started: dict, llm, **kwargs):
+        """
+        Stream one Claude turn, forwarding text deltas to on_token.
+        Each tool call is started as soon as its tool_use block is complete; the tasks are stored in `started`.
+        """
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_tools)
+        response = None
+        try:
+            async for event in llm.stream_response(**kwargs):
+                if event["type"] == "text":
+                    on_token(event["text"])
+                elif event["type"] == "tool_use":
+                    block = event["block"]
+                    on_token("\n")
+                    started[block.id] = asyncio.create_task(
+                        self._call_tool(
+                            {"id": block.id, "name": block.name, "parameters": block.input},
+                            semaphore
+                        )
+                    )
+                elif event["type"] == "message":
+                    response = event["message"]
+        except BaseException:
+            for task in started.values():
+                task.cancel()
+            raise
+        
+        logger.info(f"Claude time to first token: {llm.last_ttft}s")
+        return response
+    
+    async def _stream_summary(self, on_token, summary_llm, **kwargs) -> str:
+        """Stream the summary response, forwarding text deltas to on_token, and return the full text."""
+        
+        text = ""
+        async for event in summary_llm.stream_response(**kwargs):
+            if event["type"] == "text":
+                on_token(event["text"])
+            elif event["type"] == "message":
+                text = event["message"]
+        
+        logger.info(f"GPT time to first token: {summary_llm.last_ttft}s")
+        return text
+    
     def _create_system_prompt(self) -> str:
         """Create a system prompt that includes information about available tools."""
         
@@ -247,8 +495,199 @@ class K8sCommandClient:
         
         """
     
-    async def process_query(self, query: str) -> str:
-        """Process a natural language query about Kubernetes operations."""
+    async def process_query(self, query: str, on_token=None, session: Session | None = None, raise_errors: bool = False) -> str:
+        """
+        Process a natural language query about Kubernetes operations.
+        When on_token is given, responses are streamed and every token is passed to it as it arrives.
+        The query runs in the given session's conversation, or in the client's default session.
+        With raise_errors, a failure is raised instead of being answered with an error message.
+        """
+        
+        await self._llm_setup
+        session = session or self.default_session
+        # A session waits for its previous query before it queues for a slot, so one busy session cannot starve the others
+        async with session.lock, self.query_slots or contextlib.nullcontext():
+            self.running_queries += 1
+            try:
+                with tracing.span("query", query_bytes=len(query.encode()), session=session.id) as span:
+                    started = time.perf_counter()
+                    route = self.router.route(query) if self.router is not None else None
+                    response = await self._routed_answer(route, query, on_token, session) if route else None
+                    if span:
+                        span.set(route=route["intent"] if response is not None else "llm")
+                    if response is not None:
+                        self.router.record(route["intent"], time.perf_counter() - started)
+                    
+                    # Only a session's first query stands on its own; later ones depend on the conversation
+                    cache_key = None
+                    if response is None and self.answer_cache is not None and not session.llm.user_history:
+                        cache_key = self._answer_key(query)
+                        response = await self._cached_answer(cache_key, query, on_token, session)
+                    if span:
+                        span.set(answer_cache="hit" if response is not None and cache_key else ("miss" if cache_key else "off"))
+                    if response is None:
+                        rounds = [] if cache_key else None
+                        response = await self._process_query(query, on_token, session, rounds, raise_errors)
+                        if self.router is not None:
+                            self.router.record("llm", time.perf_counter() - started)
+                        if rounds:
+                            task = asyncio.create_task(self._store_answer(cache_key, query, response, rounds))
+                            self._answer_stores.add(task)
+                            task.add_done_callback(self._answer_stores.discard)
+                    if span:
+                        span.set(response_bytes=len(response.encode()))
+            finally:
+                self.running_queries -= 1
+                session.queries += 1
+                session.last_used = time.monotonic()
+            return response
+    
+    async def _routed_answer(self, route: dict, query: str, on_token, session: Session) -> str | None:
+        """Answer a query the router matched without the LLMs, or return None to fall through to them."""
+        
+        if route["intent"] == "small_talk":
+            answer = route["reply"]
+        else:
+            call = {"id": "router", "name": "kubectl", "parameters": {"command": route["command"], "namespace": route["namespace"]}}
+            try:
+                result = json.loads(await self._call_tool(call, asyncio.Semaphore(1)))
+            except ValueError:
+                return None
+            if result.get("status") != "success":
+                return None
+            command = f"kubectl {route['command']}" + (f" -n {route['namespace']}" if route["namespace"] else "")
+            answer = f"Output of `{command}`:\n\n```\n{result.get('stdout', '').rstrip() or 'No resources found.'}\n```"
+        
+        if on_token:
+            on_token(answer)
+        # Keep the conversation complete, so follow up questions have the context
+        session.llm.update_llm_history(role="user", content=query)
+        session.llm.update_llm_history(role="assistant", content=answer)
+        session.summary_llm.update_llm_history(role="user", content=query)
+        return answer
+    
+    def _answer_key(self, query: str) -> str:
+        """Answer cache key for a query against this client's tool server and kube context."""
+        
+        from k8s_assistant.tools.command import current_kube_context
+        
+        scope = f"{server_fingerprint(self.server_config)}\0{current_kube_context()}"
+        return self.answer_cache.key(query, scope)
+    
+    async def _cached_answer(self, key: str, query: str, on_token, session: Session) -> str | None:
+        """Return the cached answer for a query if the objects it was built from are unchanged."""
+        
+        entry = self.answer_cache.get(key)
+        if entry is None:
+            return None
+        
+        fingerprints = await self._fingerprint_calls(entry["calls"])
+        if fingerprints != [call["fingerprint"] for call in entry["calls"]]:
+            logger.info(f"Cached answer for '{query}' is stale, the cluster has changed")
+            self.answer_cache.invalidate(key)
+            self.answer_cache.record(hit=False)
+            return None
+        self.answer_cache.record(hit=True)
+        
+        answer = f"(Cached answer from {int(entry['age'])}s ago; the objects it was based on are unchanged.)\n\n{entry['answer']}"
+        if on_token:
+            on_token(answer)
+        # Keep the conversation complete, so follow up questions have the context
+        session.llm.update_llm_history(role="user", content=query)
+        session.llm.update_llm_history(role="assistant", content=answer)
+        session.summary_llm.update_llm_history(role="user", content=query)
+        return answer
+    
+    async def _store_answer(self, key: str, query: str, answer: str, rounds: list) -> None:
+        """
+        Cache an answer under the fingerprints its kubectl reads were taken with. Answers with failed reads are not cached,
+        nor are answers whose objects changed while the answer was written, since the fingerprints no longer match what was read.
+        """
+        
+        calls, fingerprints = [], []
+        for round_calls, task in rounds:
+            round_fingerprints = await task if task is not None else []
+            if round_calls is None or round_fingerprints is None or None in round_fingerprints:
+                return
+            calls.extend(round_calls)
+            fingerprints.extend(round_fingerprints)
+        
+        try:
+            current = await self._fingerprint_calls(calls)
+        except Exception as e:
+            logger.warning(f"Could not fingerprint the answer to '{query}': {e}")
+            return
+        if current != fingerprints:
+            logger.info(f"Not caching the answer to '{query}', the cluster changed while it was written")
+            return
+        self.answer_cache.put(key, query, answer, [{**call, "fingerprint": fp} for call, fp in zip(calls, fingerprints)])
+    
+    def _read_round(self, results: list) -> tuple:
+        """
+        Start fingerprinting a round of tool results right after the reads, while the model works on them.
+        Returns the kubectl calls and the fingerprint task, or None for the calls when the round cannot be cached.
+        """
+        
+        calls = []
+        for result in results:
+            if result["tool"] in ("read_output",):
+                continue
+            try:
+                status = json.loads(str(result["result"])).get("status")
+            except (ValueError, AttributeError):
+                return None, None
+            if result["tool"] != "kubectl" or status != "success":
+                return None, None
+            calls.append({
+                "command": result["parameters"].get("command", ""),
+                "namespace": result["parameters"].get("namespace", "default")
+            })
+        return calls, asyncio.create_task(self._read_fingerprints(calls)) if calls else None
+    
+    async def _read_fingerprints(self, calls: list) -> list | None:
+        """Fingerprint the calls of one round, or None when that fails."""
+        
+        try:
+            return await self._fingerprint_calls(calls)
+        except Exception as e:
+            logger.warning(f"Could not fingerprint {len(calls)} kubectl reads: {e}")
+            return None
+    
+    async def _fingerprint_calls(self, calls: list) -> list | None:
+        """Fingerprint the objects read by kubectl calls, with the server's internal resource_versions tool."""
+        
+        await self.wait_for_server()
+        if "resource_versions" not in self.server_tool_names:
+            return None
+        result = await asyncio.wait_for(
+            self._send_tool_call("resource_versions", {"calls": calls}),
+            timeout=self.tool_timeout
+        )
+        if result.isError or not result.content:
+            return None
+        return json.loads(result.content[0].text).get("fingerprints")
+    
+    async def server_stats(self) -> dict | None:
+        """Get the tool server's stats, such as its tool call dedup ratios, with its internal server_stats tool."""
+        
+        if "server_stats" not in self.server_tool_names:
+            return None
+        result = await asyncio.wait_for(self._send_tool_call("server_stats", {}), timeout=self.tool_timeout)
+        if result.isError or not result.content:
+            return None
+        stats = json.loads(result.content[0].text)
+        stats.pop("status", None)
+        return stats
+    
+    async def _process_query(self, query: str, on_token, session: Session, results_log: list | None = None, raise_errors: bool = False) -> str:
+        """
+        Run the agent loop and the summary for one query.
+        Each round of tool calls is appended to results_log when given, as its kubectl calls and their fingerprints
+        taken right after the reads, so the answer can be tied to what it read.
+        """
+        
+        emit = on_token or (lambda text: None)
+        llm, summary_llm = session.llm, session.summary_llm
         
         try:
               
@@ -257,24 +696,39 @@ class K8sCommandClient:
             max_commands = 10  # Safety limit to prevent infinite loops
             
             # Add the current query to the user history
-            self.llm.update_llm_history(role="user", content=query)
-            self.summary_llm.update_llm_history(role="user", content=query)
+            llm.update_llm_history(role="user", content=query)
+            summary_llm.update_llm_history(role="user", content=query)
             
             while command_count < max_commands:
                 
                 command_count += 1
                 tool_calls = []
-                results = []  
+                started = {}
                 
                 # print(f"Processing command {command_count} of {max_commands}")
                 
                 # Step 1: Ask Claude to interpret the query and decide on tools to use
-                response = self.llm.get_response(
-                    tools=self.tools,
-                    max_tokens=1024,
-                    model="claude-3-5-haiku-20241022",
-                    prompt=self._create_system_prompt()
-                )
+                llm_args = {
+                    "tools": self.tools,
+                    "max_tokens": 1024,
+                    "model": "claude-3-5-haiku-20241022",
+                    "prompt": self.system_prompt
+                }
+                with tracing.span("llm.turn", model=llm_args["model"], turn=command_count) as span:
+                    if on_token:
+                        response = await self._stream_llm_turn(on_token, started, llm, **llm_args)
+                    else:
+                        response = await llm.get_response(**llm_args)
+                    if span and getattr(response, "usage", None):
+                        span.set(
+                            input_tokens=response.usage.input_tokens,
+                            output_tokens=response.usage.output_tokens,
+                            cache_read_input_tokens=getattr(response.usage, "cache_read_input_tokens", 0) or 0,
+                            ttft_s=getattr(llm, "last_ttft", None) if on_token else None,
+                            answered_by=getattr(llm, "last_model", None)
+                        )
+                logger.info(f"Claude history: {llm.history_manager.stats()}")
+                logger.info(f"Claude prompt cache: {llm.prompt_cache_report()}")
                 
                 for content in response.content:
                     if content.type == 'text':
@@ -297,7 +751,9 @@ class K8sCommandClient:
                         break
                     
                     else:
-                        return "I'm your Kubernetes assistant. For non-Kubernetes queries, I'll respond conversationally. For Kubernetes operations, I'll execute commands to help you. How can I assist with your Kubernetes cluster today?"
+                        message = "I'm your Kubernetes assistant. For non-Kubernetes queries, I'll respond conversationally. For Kubernetes operations, I'll execute commands to help you. How can I assist with your Kubernetes cluster today?"
+                        emit(message)
+                        return message
                 
                     # Claude didn't decide to use any tools, just return its response
                     # if response.stop_reason == 'end_turn' and "I have completed the task" not in response.content[0].text.strip():
@@ -307,38 +763,37 @@ class K8sCommandClient:
                     #     break
                 
                 
-                # Step 2: Execute each tool call and collect results
-                for call in tool_calls:
-                    # Execute the tool call through MCP client
-                    print(f"Executing => {call['name']} {call['parameters']['command']}")
-                    result = await self.mcp_client.call_tool(
-                        call["name"],
-                        call["parameters"]
-                    )
-                    
-                    results.append({
-                        "tool": call["name"],
-                        "parameters": call["parameters"],
-                        "result": result.content[0].text,
-                    })
-                    
-                self.summary_llm.update_llm_history(role="user", content=result.content[0].text)
+                # Step 2: Execute the tool calls concurrently and collect results
+                results = await self._execute_tool_calls(tool_calls, started)
+                if results_log is not None:
+                    results_log.append(self._read_round(results))
+                if self.delta_results:
+                    for result in results:
+                        key = call_key(result["tool"], result["parameters"])
+                        result["result"] = session.deltas.encode(key, result["id"], session.queries, result["result"])
+                # From here on each output is held once, by handle, and only read back when a request is sent
+                for result in results:
+                    result["result"] = session.outputs.put(result["result"])
                 
-                final_text.append(result.content[0].text)
+                for result in results:
+                    summary_llm.update_llm_history(role="user", content=result["result"])
+                    final_text.append(result["result"])
                 # print("Tool call results:", results)
                 
                 tool_results_message = []
-                for idx, result in enumerate(results):
+                for result in results:
                     tool_results_message.append({
                         "type": "tool_result",
-                        "tool_use_id": tool_calls[idx]["id"],
+                        "tool_use_id": result["id"],
                         "content": result["result"]
                     })
-                self.llm.update_llm_history(role="user", content=tool_results_message)
+                llm.update_llm_history(role="user", content=tool_results_message)
             
             if command_count >= 1:
                 # If we reach here, it means we hit the command limit or completed the task
                 
+                # Stored outputs are materialized here, just before the summary request, and dropped after it
+                final_text = [str(text) for text in final_text]
                 result_prompt = f"""
                 I executed the Kubernetes commands based on your instructions. Based on our conversation history, please explain what does it mean and any next steps the user should take. 
                 Please summarize based on the below information, giving more priority to recent findings and correalting it with the past conversation history.
@@ -372,31 +827,57 @@ class K8sCommandClient:
                 
                 """
                 
+                return_response = "Analysis Limit Exceeded!\n" if command_count >= max_commands else ""
+                return_response += "Here is the summary of actions I have performed.\n\n"
+                
                 # Step 3: Summarize the results and provide next steps
-                final_response = self.summary_llm.get_response(
-                    max_tokens=2048,  # Increase max_tokens to handle larger responses
-                    # model="claude-3-7-sonnet-20250219",
-                    model="gpt-4.1-nano-2025-04-14",
-                    prompt=result_prompt   
-                )
+                summary_args = {
+                    "max_tokens": 2048,  # Increase max_tokens to handle larger responses
+                    # "model": "claude-3-7-sonnet-20250219",
+                    "model": "gpt-4.1-nano-2025-04-14",
+                    "prompt": result_prompt
+                }
+                if on_token:
+                    emit(f"\n\n{get_separator()}\n\n{return_response}")
+                    with tracing.span("llm.summary", model=summary_args["model"], prompt_bytes=len(result_prompt.encode())) as span:
+                        summary = await self._stream_summary(on_token, summary_llm, **summary_args)
+                        if span:
+                            span.set(response_bytes=len(summary.encode()), ttft_s=summary_llm.last_ttft)
+                    if not summary:
+                        emit("\n".join(final_text))
+                    return return_response + (summary or "\n".join(final_text))
+                
+                with tracing.span("llm.summary", model=summary_args["model"], prompt_bytes=len(result_prompt.encode())) as span:
+                    final_response = await summary_llm.get_response(**summary_args)
+                    if span and getattr(final_response, "usage", None):
+                        span.set(
+                            input_tokens=final_response.usage.prompt_tokens,
+                            output_tokens=final_response.usage.completion_tokens
+                        )
                 # print("Final response:", final_response)
                 
-                return_response = "Analysis Limit Exceeded!\n" if command_count >= max_commands else ""
-                return_response += f"Here is the summary of actions I have performed.\n\n"
                 return (return_response + final_response.choices[0].message.content) if (len(final_response.choices) > 0 and final_response.choices[0].message and final_response.choices[0].message.content) else (return_response + "\n".join(final_text))
 
             
             if final_text and len(final_text) > 0:
-                return f"Here is the summary of actions I have performed.\n {final_text}"
+                message = f"Here is the summary of actions I have performed.\n {[str(text) for text in final_text]}"
             else:
-                return "I'm your Kubernetes assistant. How can I help you with your Kubernetes cluster today?"
+                message = "I'm your Kubernetes assistant. How can I help you with your Kubernetes cluster today?"
+            emit(message)
+            return message
             
         except Exception as e:
             
             logger.exception("An error occurred while processing the query")
             import traceback
             logger.error(traceback.format_exc())
-            return "An unexpected error occurred while processing your request. Please try again later."
+            if results_log is not None:
+                results_log.clear()  # Never cache an answer that failed part way
+            if raise_errors:
+                raise
+            message = "An unexpected error occurred while processing your request. Please try again later."
+            emit(f"\n{message}")
+            return message
 
 async def force_exit(client: K8sCommandClient):
     """Force exit the application"""
@@ -417,24 +898,65 @@ async def force_exit(client: K8sCommandClient):
     os._exit(0)
 
 
-async def async_main():
+def render_token(text: str) -> None:
+    """Print a streamed token without a newline so the answer renders incrementally."""
+    print(text, end="", flush=True)
+
+
+def server_parameters(server_url: str | None = None) -> "StdioServerParameters | str":
+    """Get the URL of a shared tool server when one is configured, or the parameters to spawn a private one."""
+    
+    server_url = server_url or os.getenv("K8S_ASSISTANT_SERVER_URL")
+    if server_url:
+        # Share a long running server (server.py --transport streamable-http) with other sessions
+        return server_url
     
+    from mcp import StdioServerParameters
+    
+    # Create server parameters for stdio connection
+    server_path = os.path.join(os.path.dirname(__file__), "server.py")
+    return StdioServerParameters(
+        command=sys.executable,  # Run the server with the same interpreter and environment as the client
+        args=[server_path],  # Optional command line arguments
+        env=dict(os.environ),  # Pass KUBECONFIG and K8S_ASSISTANT_* settings through to the server
+    )
+
+
+def print_startup_timings(client: K8sCommandClient, started: float) -> None:
+    """Print where the time to the first prompt went."""
+    
+    timings = client.startup_timings
+    print(f"Startup: ready for input after {time.perf_counter() - started:.3f}s")
+    print(f"  imports           {timings.get('imports', 0):.3f}s")
+    if "llm_setup" in timings:
+        print(f"  LLM client setup  {timings['llm_setup']:.3f}s")
+    else:
+        print("  LLM client setup  in background")
+    if "server_ready" in timings:
+        print(f"  server connect    {timings['server_connect']:.3f}s (spawn and initialize)")
+        print(f"  tool listing      {timings['server_ready'] - timings['server_connect']:.3f}s")
+    else:
+        print("  server connect    in background (tool list loaded from cache)")
+
+
+async def async_main(server_url: str | None = None, timing: bool = False, started: float | None = None):
+    
+    started = started or time.perf_counter()
+    client = None
     try:
-        # Create server parameters for stdio connection
-        server_path = os.path.join(os.path.dirname(__file__), "server.py")
-        server_params = StdioServerParameters(
-            command="python3.12",  # Executable
-            args=[server_path],  # Optional command line arguments
-            env=None,  # Optional environment variables
-        )
-        
-        client = K8sCommandClient(server_params)
-        await client.async_init()  # Perform asynchronous initialization
+        # Without a URL the bundled server is spawned; its parameters are built once mcp is imported
+        client = K8sCommandClient(server_url or os.getenv("K8S_ASSISTANT_SERVER_URL"))
+        client.startup_timings["imports"] = time.perf_counter() - started
+        # Show the prompt as soon as possible; the server and LLM clients finish starting while the user types
+        await client.async_init(wait=False)  # Perform asynchronous initialization
         # print(f"Server parameters: {server_params}\n")
+        if timing:
+            print_startup_timings(client, started)
         
         while True:
             try:
-                query = input("How can I help you today ?\n")
+                # Read in a thread so the server connection keeps making progress while the user types
+                query = await asyncio.to_thread(input, "How can I help you today ?\n")
                 if not query or query.lower() == "exit" or query.lower() == "quit" or query.lower() == "q" or "bye" in query.lower() or "thank" in query.lower():
                     print("Exiting...")
                     break
@@ -445,12 +967,13 @@ async def async_main():
                     continue
                 # print(f"Query: {query}")
                 
-                result = await client.process_query(query)  # Ensure process_query is awaited
-                # print("Result from processing query:")
-                
                 separator = get_separator()
                 print(f"\n{separator}\n\n")
-                print(result)
+                
+                # Render tokens as they arrive instead of waiting for the whole answer
+                await client.process_query(query, on_token=render_token)  # Ensure process_query is awaited
+                # print("Result from processing query:")
+                
                 print(f"\n\n{separator}\n")
             
             except KeyboardInterrupt:
@@ -0,0 +1,229 @@
+# daemon.py
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from k8s_assistant.client import K8sCommandClient, Session
+from k8s_assistant.llms.scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLimitError(Exception):
+    """Raised when the session store is full and every session is busy."""
+
+
+class SessionStore:
+    """
+    Bounded store of conversations, kept in least recently used order.
+    Sessions idle for longer than idle_timeout are evicted by sweep(). When the store is full, the least
+    recently used idle session makes room for a new one.
+    """
+
+    def __init__(self, client: K8sCommandClient, max_sessions: int = 256, idle_timeout: float = 1800):
+        self.client = client
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.removed = 0
+
+    def get(self, session_id: str) -> Session | None:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: str | None = None) -> Session:
+        session = self.get(session_id) if session_id else None
+        if session is not None:
+            return session
+
+        if len(self._sessions) >= self.max_sessions:
+            victim = next((s for s in self._sessions.values() if not s.busy), None)
+            if victim is None:
+                raise SessionLimitError(f"All {self.max_sessions} sessions are busy")
+            self.remove(victim.id)
+
+        session = self.client.new_session(session_id)
+        self._sessions[session.id] = session
+        logger.info(f"Created session {session.id} ({len(self._sessions)} active)")
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.removed += 1
+        logger.info(f"Removed session {session_id} after {session.queries} queries")
+        return True
+
+    def sweep(self) -> int:
+        """Evict sessions idle for longer than idle_timeout and return how many were evicted."""
+
+        expired = [s.id for s in self._sessions.values() if s.idle_seconds() > self.idle_timeout]
+        for session_id in expired:
+            self.remove(session_id)
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "busy": sum(1 for s in self._sessions.values() if s.busy),
+            "max_sessions": self.max_sessions,
+            "removed": self.removed,
+        }
+
+
+class AssistantDaemon:
+    """
+    Serve process_query over a local HTTP API, with one conversation per session.
+    All sessions run on one event loop and share one K8sCommandClient, so they share its MCP connection,
+    LLM connection pool and its cap on concurrent queries.
+    """
+
+    def __init__(self, client: K8sCommandClient, max_sessions: int = 256, idle_timeout: float = 1800, sweep_interval: float = 60):
+        self.client = client
+        self.sessions = SessionStore(client, max_sessions, idle_timeout)
+        self.sweep_interval = sweep_interval
+        self._in_flight = 0
+        self._served = 0
+        self.app = Starlette(
+            routes=[
+                Route("/v1/query", self.handle_query, methods=["POST"]),
+                Route("/v1/sessions", self.handle_create_session, methods=["POST"]),
+                Route("/v1/sessions/{session_id}", self.handle_delete_session, methods=["DELETE"]),
+                Route("/v1/health", self.handle_health, methods=["GET"]),
+            ],
+            lifespan=self._lifespan,
+        )
+
+    async def run_query(self, session: Session, query: str, on_token=None) -> str:
+        self._in_flight += 1
+        try:
+            return await self.client.process_query(query, on_token=on_token, session=session)
+        finally:
+            self._in_flight -= 1
+            self._served += 1
+
+    async def handle_query(self, request: Request):
+        """
+        POST /v1/query {"query": "...", "session_id": "...", "stream": false}
+        An unknown session_id (e.g. a chat user id) starts a new conversation under that id.
+        With "stream": true the answer is sent as server-sent events, one per token.
+        """
+
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return JSONResponse({"error": "Request body must be JSON"}, status_code=400)
+        query = str(body.get("query") or "").strip()
+        if not query:
+            return JSONResponse({"error": "Missing query"}, status_code=400)
+
+        try:
+            session = self.sessions.get_or_create(body.get("session_id"))
+        except SessionLimitError as e:
+            return JSONResponse({"error": str(e)}, status_code=503)
+
+        if body.get("stream"):
+            return StreamingResponse(self._stream(session, query), media_type="text/event-stream")
+
+        started = time.perf_counter()
+        answer = await self.run_query(session, query)
+        return JSONResponse({
+            "session_id": session.id,
+            "answer": answer,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        })
+
+    async def _stream(self, session: Session, query: str):
+        """Run a query and yield its tokens as server-sent events. Stops the query if the caller goes away."""
+
+        tokens: "asyncio.Queue[str | None]" = asyncio.Queue()
+        task = asyncio.create_task(self.run_query(session, query, on_token=tokens.put_nowait))
+        task.add_done_callback(lambda _: tokens.put_nowait(None))
+        try:
+            yield f"event: session\ndata: {json.dumps({'session_id': session.id})}\n\n"
+            while (token := await tokens.get()) is not None:
+                yield f"data: {json.dumps({'text': token})}\n\n"
+            yield f"event: done\ndata: {json.dumps({'answer': await task})}\n\n"
+        finally:
+            task.cancel()
+
+    async def handle_create_session(self, request: Request):
+        try:
+            session = self.sessions.get_or_create()
+        except SessionLimitError as e:
+            return JSONResponse({"error": str(e)}, status_code=503)
+        return JSONResponse({"session_id": session.id}, status_code=201)
+
+    async def handle_delete_session(self, request: Request):
+        removed = self.sessions.remove(request.path_params["session_id"])
+        return JSONResponse({"removed": removed}, status_code=200 if removed else 404)
+
+    async def handle_health(self, request: Request):
+        try:
+            server = await self.client.server_stats()
+        except Exception as e:
+            server = {"error": str(e) or type(e).__name__}
+        return JSONResponse({
+            **self.sessions.stats(),
+            "running": self.client.running_queries,
+            "waiting": self._in_flight - self.client.running_queries,
+            "served": self._served,
+            **({"router": self.client.router.stats()} if self.client.router is not None else {}),
+            "llm": get_scheduler().stats(),
+            "server": server,
+        })
+
+    @contextlib.asynccontextmanager
+    async def _lifespan(self, app):
+        """Evict idle sessions in the background while the API is up."""
+
+        async def sweep():
+            while True:
+                await asyncio.sleep(self.sweep_interval)
+                evicted = self.sessions.sweep()
+                if evicted:
+                    logger.info(f"Evicted {evicted} idle sessions")
+
+        sweeper = asyncio.create_task(sweep())
+        try:
+            yield
+        finally:
+            sweeper.cancel()
+
+
+async def serve(
+    server_params,
+    host: str = "127.0.0.1",
+    port: int = 8081,
+    max_sessions: int = 256,
+    idle_timeout: float = 1800,
+    max_concurrent: int = 8
+):
+    """Start the shared client, then serve the HTTP API until interrupted."""
+
+    client = K8sCommandClient(server_params, max_concurrent_queries=max_concurrent)
+    await client.async_init()
+    daemon = AssistantDaemon(client, max_sessions, idle_timeout)
+
+    config = uvicorn.Config(daemon.app, host=host, port=port, log_level="warning")
+    print(f"k8s-assistant serving on http://{host}:{port}")
+    try:
+        await uvicorn.Server(config).serve()
+    finally:
+        await client.cleanup()
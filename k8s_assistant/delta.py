@@ -0,0 +1,148 @@
+# delta.py
+import difflib
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from k8s_assistant.tools.command import KubectlCommand
+
+logger = logging.getLogger(__name__)
+
+# Columns that change on every run without saying anything new
+VOLATILE_COLUMNS = {"AGE", "LAST SEEN", "FIRST SEEN"}
+
+# Table headers: upper case column names separated by two or more spaces, e.g. "NAME   READY   LAST SEEN"
+HEADER_COLUMN = re.compile(r"\S+(?: \S+)*")
+
+# "14 (2m ago)" in the RESTARTS column
+RELATIVE_TIME = re.compile(r"\s*\([^)]* ago\)")
+
+
+def call_key(tool: str, parameters: Dict[str, Any]) -> Tuple:
+    """Key a tool call so that equivalent calls match, e.g. "get po -n x" and "get pods --namespace=x"."""
+
+    if tool == "kubectl" and not parameters.get("contexts"):
+        return (tool, KubectlCommand(parameters.get("command", ""), parameters.get("namespace") or "default").key())
+    return (tool, json.dumps(parameters, sort_keys=True, default=str))
+
+
+def parse_table(text: str) -> Tuple[List[str], "OrderedDict[Tuple, Dict[str, Any]]"] | None:
+    """
+    Parse kubectl table output into its column names and rows keyed by the columns up to NAME.
+    Columns are cut at the header positions, so values with spaces such as "14 (2m ago)" stay whole.
+    Returns None for output that is not a table with unique row keys.
+    """
+
+    lines = text.rstrip("\n").splitlines()
+    if len(lines) < 2 or lines[0].upper() != lines[0]:
+        return None
+    matches = list(HEADER_COLUMN.finditer(lines[0]))
+    columns = [match.group() for match in matches]
+    if len(columns) < 2:
+        return None
+    starts = [match.start() for match in matches] + [None]
+    key_width = columns.index("NAME") + 1 if "NAME" in columns else 1
+
+    rows: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+    for line in lines[1:]:
+        values = [line[start:end].strip() for start, end in zip(starts, starts[1:])]
+        key = tuple(values[:key_width])
+        if key in rows:
+            return None
+        rows[key] = {"line": line, "values": dict(zip(columns, values))}
+    return columns, rows
+
+
+def diff_table(old: str, new: str) -> List[str] | None:
+    """Diff two tables by row: added and removed rows, and the changed fields of the others."""
+
+    old_table, new_table = parse_table(old), parse_table(new)
+    if old_table is None or new_table is None or old_table[0] != new_table[0]:
+        return None
+    columns, old_rows = old_table
+    new_rows = new_table[1]
+
+    lines = [f"+ {row['line']}" for key, row in new_rows.items() if key not in old_rows]
+    lines += [f"- {row['line']}" for key, row in old_rows.items() if key not in new_rows]
+    unchanged = 0
+    for key, row in new_rows.items():
+        if key not in old_rows:
+            continue
+        changes = []
+        for column in columns:
+            if column in VOLATILE_COLUMNS:
+                continue
+            before = RELATIVE_TIME.sub("", old_rows[key]["values"][column])
+            after = RELATIVE_TIME.sub("", row["values"][column])
+            if before != after:
+                changes.append(f"{column} {before} -> {after}")
+        if changes:
+            lines.append(f"~ {' '.join(key)}: {', '.join(changes)}")
+        else:
+            unchanged += 1
+    lines.append(f"{unchanged} rows unchanged" + (f" ({', '.join(sorted(VOLATILE_COLUMNS & set(columns)))} ignored)" if VOLATILE_COLUMNS & set(columns) else ""))
+    return lines
+
+
+def diff_text(old: str, new: str) -> List[str]:
+    """Diff two outputs line by line, keeping only the changed lines."""
+
+    return [
+        line for line in difflib.unified_diff(old.splitlines(), new.splitlines(), n=0, lineterm="")
+        if not line.startswith(("---", "+++", "@@"))
+    ]
+
+
+class DeltaTracker:
+    """
+    Remember the last full output of each tool call in a session, and replace repeats with a compact diff against it.
+    A diff always refers to a full result that is still verbatim in the recent history: once the base is max_age
+    queries old, which is when the history manager may compact it, the next repeat is sent in full as the new base.
+    Diffs that would not save at least a third of the output are not used either.
+    """
+
+    def __init__(self, max_age: int = 2, max_entries: int = 64, max_ratio: float = 0.66):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_ratio = max_ratio
+        self.snapshots: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.full = 0
+        self.deltas = 0
+        self.saved_chars = 0
+
+    def encode(self, key: Tuple, call_id: str, query_number: int, text: str) -> str:
+        """Get the text to give the model for a tool result: the result itself, or its changes since the base."""
+
+        try:
+            result = json.loads(text)
+        except ValueError:
+            return text
+        if not isinstance(result, dict) or result.get("status") != "success" or "truncated" in result:
+            return text
+
+        stdout = result.get("stdout", "")
+        base = self.snapshots.get(key)
+        if base is not None and query_number - base["query"] < self.max_age:
+            changes = diff_table(base["stdout"], stdout)
+            if changes is None:
+                changes = diff_text(base["stdout"], stdout)
+            delta = {name: value for name, value in result.items() if name not in ("stdout", "cached", "cache_age_seconds")}
+            delta["stdout"] = "\n".join(changes) + "\n" if changes else "No changes.\n"
+            delta["delta"] = f"Only the changes since tool result {base['id']} are shown: + added, - removed, ~ changed."
+            encoded = json.dumps(delta, indent=2)
+            if len(encoded) <= self.max_ratio * len(text):
+                self.deltas += 1
+                self.saved_chars += len(text) - len(encoded)
+                return encoded
+
+        self.snapshots[key] = {"id": call_id, "query": query_number, "stdout": stdout}
+        self.snapshots.move_to_end(key)
+        while len(self.snapshots) > self.max_entries:
+            self.snapshots.popitem(last=False)
+        self.full += 1
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {"full": self.full, "deltas": self.deltas, "saved_chars": self.saved_chars}
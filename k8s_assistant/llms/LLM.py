@@ -1,5 +1,35 @@
 from typing import Any
 from abc import ABC, abstractmethod
+import httpx
+
+
+# Connection pool shared by all async LLM clients, so concurrent requests reuse warm connections
+_shared_http_client: httpx.AsyncClient | None = None
+
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """Get the process wide pooled HTTP client used by the async LLM clients."""
+    
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(600, connect=5.0)
+        )
+    return _shared_http_client
+
+
+async def close_shared_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    
+    global _shared_http_client
+    if _shared_http_client is not None and not _shared_http_client.is_closed:
+        await _shared_http_client.aclose()
+    _shared_http_client = None
     
 
 class LLM(ABC):
@@ -22,3 +52,12 @@ class LLM(ABC):
     def get_api_key(self) -> str:
         """Get the API key for the LLM."""
         return self.api_key
+
+
+class AsyncLLM(LLM):
+    """LLM variant whose model calls are awaitable and do not block the event loop."""
+    
+    @abstractmethod
+    async def get_response(self, max_tokens: int, model: str, prompt: str, tools: list=[]) -> dict:
+        """Get a response from the LLM model without blocking the event loop."""
+        pass
@@ -1,17 +1,33 @@
 import anthropic
-from k8s_assistant.llms.LLM import LLM
+from k8s_assistant.llms.LLM import LLM, AsyncLLM, get_shared_http_client
+from k8s_assistant.llms.history import HistoryManager
+from k8s_assistant.llms.scheduler import get_scheduler, parse_targets
+from k8s_assistant.output_store import resolve_messages
+import logging
 import os
+import time
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
 
 class Claude(LLM):
     """Claude class for interacting with the Anthropic Claude model."""
     
-    def __init__(self):
+    def __init__(self, history_token_budget: int = 30000):
         
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
         self.anthropic_client = self._initialize_client()
         self.user_history = []
+        self.history_manager = HistoryManager(token_budget=history_token_budget, keep_recent_turns=2)
+        self._cached_prefix = None
+        self.cache_stats = {
+            "requests": 0,
+            "input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
 
 
     def _initialize_client(self) -> anthropic.Anthropic:
@@ -27,12 +43,9 @@ class Claude(LLM):
         
         # Call the Claude API to get a response
         response = self.anthropic_client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            system=prompt,
-            messages=self.user_history,
-            tools=tools
+            **self._request_args(max_tokens, model, prompt, tools)
         )
+        self._record_usage(response.usage)
         
         # Append the user history to the Claude model
         self.update_llm_history(
@@ -42,6 +55,69 @@ class Claude(LLM):
         
         return response
 
+    def _request_args(self, max_tokens: int, model: str, prompt: str, tools: list) -> dict:
+        """
+        Build the request arguments with prompt cache breakpoints on the system prompt, the tools
+        and the history prefix. The system and tool blocks are only rebuilt when the prompt or tool list changes.
+        """
+        
+        if self._cached_prefix is None or self._cached_prefix[0] != prompt or self._cached_prefix[1] is not tools:
+            system = [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+            cached_tools = [dict(tool) for tool in tools]
+            if cached_tools:
+                cached_tools[-1]["cache_control"] = {"type": "ephemeral"}
+            self._cached_prefix = (prompt, tools, system, cached_tools)
+        
+        _, _, system, cached_tools = self._cached_prefix
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "system": system,
+            "messages": self._messages_with_breakpoint(),
+            "tools": cached_tools,
+        }
+    
+    def _messages_with_breakpoint(self) -> list:
+        """
+        Copy the history with a cache breakpoint on its last block, so the next turn reads the whole
+        conversation so far from the cache. Stored outputs are materialized in the copy only; the stored
+        history itself is left untouched.
+        """
+        
+        messages = resolve_messages(self.user_history)
+        if not messages:
+            return messages
+        
+        last = messages[-1]
+        content = last["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        if isinstance(content, list) and content and isinstance(content[-1], dict):
+            content = [*content[:-1], {**content[-1], "cache_control": {"type": "ephemeral"}}]
+            messages[-1] = {**last, "content": content}
+        return messages
+    
+    def _record_usage(self, usage) -> None:
+        """Accumulate prompt cache usage reported by the API."""
+        
+        if usage is None:
+            return
+        self.cache_stats["requests"] += 1
+        for key in ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+            self.cache_stats[key] += getattr(usage, key, 0) or 0
+    
+    def prompt_cache_report(self) -> dict:
+        """Get the prompt cache hit rate and what the cache reads saved so far, in base input token prices."""
+        
+        read = self.cache_stats["cache_read_input_tokens"]
+        total = read + self.cache_stats["cache_creation_input_tokens"] + self.cache_stats["input_tokens"]
+        return {
+            **self.cache_stats,
+            "cache_hit_rate": round(read / total, 3) if total else 0.0,
+            # Cache reads are billed at a tenth of the base input price; the tokens read are in cache_read_input_tokens
+            "input_token_cost_saved_equiv": int(read * 0.9),
+        }
+    
     def update_llm_history(self, role: str, content: str|list) -> None:
         """Update the user history with the latest user input."""
         
@@ -52,3 +128,105 @@ class Claude(LLM):
             }
         )
         
+        # Keep the history within the token budget, so prompts do not grow with the session
+        self.history_manager.compact(self.user_history)
+
+
+class AsyncClaude(Claude, AsyncLLM):
+    """
+    Claude variant backed by the async Anthropic client and the shared connection pool.
+    Requests go through the shared LLM scheduler, which paces, retries and hedges them, and fails over
+    to the models in K8S_ASSISTANT_CLAUDE_FALLBACK.
+    """
+    
+    def __init__(self, history_token_budget: int = 30000):
+        
+        super().__init__(history_token_budget)
+        self.scheduler = get_scheduler()
+        self.fallbacks = []
+        for provider, model in parse_targets(os.getenv("K8S_ASSISTANT_CLAUDE_FALLBACK"), "anthropic"):
+            if provider != "anthropic":
+                # The history holds Anthropic tool_use blocks, so tool planning cannot move to another provider
+                logger.warning(f"Ignoring fallback {provider}:{model}, Claude can only fail over to Anthropic models")
+                continue
+            self.fallbacks.append((provider, model))
+        self.last_model = None
+    
+    def _initialize_client(self) -> anthropic.AsyncAnthropic:
+        """Initialize and return the async Anthropic client."""
+        
+        if not self.api_key:
+            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+        return anthropic.AsyncAnthropic(
+            api_key=self.api_key,
+            http_client=get_shared_http_client(),
+            # Retries are up to the scheduler
+            max_retries=0
+        )
+    
+    async def get_response(self, max_tokens: int, model: str, prompt: str, tools: list=[]) -> dict:
+        """Get a response from the Claude model."""
+        
+        args = self._request_args(max_tokens, model, prompt, tools)
+        
+        async def request(provider: str, model: str):
+            raw = await self.anthropic_client.messages.with_raw_response.create(**{**args, "model": model})
+            return raw.parse(), raw.headers
+        
+        # Call the Claude API to get a response
+        (_, self.last_model), response = await self.scheduler.call([("anthropic", model), *self.fallbacks], request)
+        self._record_usage(response.usage)
+        
+        # Append the user history to the Claude model
+        self.update_llm_history(
+            role="assistant",
+            content=response.content
+        )
+        
+        return response
+    
+    async def stream_response(self, max_tokens: int, model: str, prompt: str, tools: list=[]) -> AsyncIterator[dict]:
+        """
+        Stream a response from the Claude model.
+        Yields {"type": "text"} events for every text delta, a {"type": "tool_use"} event as soon as
+        each tool_use block is complete, and a final {"type": "message"} event with the full message.
+        """
+        
+        start = time.perf_counter()
+        self.last_ttft = None
+        args = self._request_args(max_tokens, model, prompt, tools)
+        
+        async def open_stream(provider: str, model: str):
+            stream = await self.anthropic_client.messages.stream(**{**args, "model": model}).__aenter__()
+            return stream, stream.response.headers
+        
+        # Only opening the stream is retried or hedged, once text has been forwarded it cannot be taken back
+        (_, self.last_model), stream = await self.scheduler.call(
+            [("anthropic", model), *self.fallbacks],
+            open_stream,
+            discard=lambda stream: stream.close()
+        )
+        try:
+            async for event in stream:
+                if self.last_ttft is None and event.type in ("text", "content_block_start"):
+                    self.last_ttft = time.perf_counter() - start
+                
+                if event.type == "text":
+                    yield {"type": "text", "text": event.text}
+                elif event.type == "content_block_stop":
+                    block = stream.current_message_snapshot.content[event.index]
+                    if block.type == "tool_use":
+                        yield {"type": "tool_use", "block": block}
+            
+            response = await stream.get_final_message()
+        finally:
+            await stream.close()
+        self._record_usage(response.usage)
+        
+        # Append the user history to the Claude model
+        self.update_llm_history(
+            role="assistant",
+            content=response.content
+        )
+        
+        yield {"type": "message", "message": response}
@@ -1,16 +1,25 @@
-from openai import OpenAI
-from k8s_assistant.llms.LLM import LLM
+from openai import OpenAI, AsyncOpenAI
+from openai.types.chat import ChatCompletion
+import anthropic
+from k8s_assistant.llms.LLM import LLM, AsyncLLM, get_shared_http_client
+from k8s_assistant.llms.history import HistoryManager
+from k8s_assistant.llms.scheduler import get_scheduler, parse_targets
+from k8s_assistant.output_store import resolve, resolve_messages
 import os
+import time
+from typing import AsyncIterator
 
 class GPT(LLM):
     """GPT class for interacting with the OpenAI GPT model."""
     
-    def __init__(self):
+    def __init__(self, history_token_budget: int = 20000):
         
         self.api_key = os.getenv("GPT_API_KEY")
         if not self.api_key:
             raise ValueError("GPT_API_KEY environment variable not set")
         self.user_history = []
+        # Tool outputs are added as plain user messages here, so each one counts as a turn
+        self.history_manager = HistoryManager(token_budget=history_token_budget, keep_recent_turns=8)
         self.gpt_client = self._initialize_client()
         
         
@@ -36,7 +45,7 @@ class GPT(LLM):
             model=model,
             max_tokens=max_tokens,
             messages=[
-                *self.user_history,
+                *resolve_messages(self.user_history),
                 {"role": "developer", "content": prompt}
             ],
             tools=tools
@@ -69,3 +78,147 @@ class GPT(LLM):
                 "content": formatted_content
             }
         )
+        
+        # Keep the history within the token budget, so prompts do not grow with the session
+        self.history_manager.compact(self.user_history)
+
+
+class AsyncGPT(GPT, AsyncLLM):
+    """
+    GPT variant backed by the async OpenAI client and the shared connection pool.
+    Requests go through the shared LLM scheduler, which paces, retries and hedges them, and fails over
+    to the models in K8S_ASSISTANT_GPT_FALLBACK. The summary is plain text, so it can also fail over
+    to an Anthropic model, e.g. "anthropic:claude-3-5-haiku-20241022".
+    """
+    
+    def __init__(self, history_token_budget: int = 20000):
+        
+        super().__init__(history_token_budget)
+        self.scheduler = get_scheduler()
+        self.fallbacks = parse_targets(os.getenv("K8S_ASSISTANT_GPT_FALLBACK"), "openai")
+        self.anthropic_client = None
+        self.last_model = None
+    
+    def _initialize_client(self) -> AsyncOpenAI:
+        """Initialize and return the async OpenAI client."""
+        
+        if not self.api_key:
+            raise ValueError("GPT_API_KEY environment variable not set")
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=get_shared_http_client(),
+            # Retries are up to the scheduler
+            max_retries=0
+        )
+    
+    def _claude_args(self, max_tokens: int, model: str, prompt: str) -> dict:
+        """Build an Anthropic request for the same conversation, to fail over to a Claude model."""
+        
+        if self.anthropic_client is None:
+            self.anthropic_client = anthropic.AsyncAnthropic(http_client=get_shared_http_client(), max_retries=0)
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "system": prompt,
+            "messages": [
+                {"role": message["role"], "content": resolve(message["content"])}
+                for message in self.user_history if message["role"] in ("user", "assistant") and message["content"]
+            ],
+        }
+    
+    async def get_response(self, max_tokens: int, model: str, prompt: str, tools: list=[]) -> dict:
+        """Get a response from the GPT model."""
+        
+        async def request(provider: str, model: str):
+            if provider == "anthropic":
+                args = self._claude_args(max_tokens, model, prompt)
+                raw = await self.anthropic_client.messages.with_raw_response.create(**args)
+                return _as_completion(raw.parse()), raw.headers
+            raw = await self.gpt_client.chat.completions.with_raw_response.create(
+                model=model,
+                max_tokens=max_tokens,
+                messages=[
+                    *resolve_messages(self.user_history),
+                    {"role": "developer", "content": prompt}
+                ],
+                tools=tools
+            )
+            return raw.parse(), raw.headers
+        
+        # Call the GPT API to get a response
+        (_, self.last_model), response = await self.scheduler.call([("openai", model), *self.fallbacks], request)
+        
+        return response
+    
+    async def stream_response(self, max_tokens: int, model: str, prompt: str, tools: list=[]) -> AsyncIterator[dict]:
+        """
+        Stream a response from the GPT model.
+        Yields {"type": "text"} events for every text delta and a final {"type": "message"} event with the full text.
+        """
+        
+        start = time.perf_counter()
+        self.last_ttft = None
+        chunks = []
+        
+        async def open_stream(provider: str, model: str):
+            if provider == "anthropic":
+                args = self._claude_args(max_tokens, model, prompt)
+                stream = await self.anthropic_client.messages.stream(**args).__aenter__()
+            else:
+                stream = await self.gpt_client.chat.completions.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    messages=[
+                        *resolve_messages(self.user_history),
+                        {"role": "developer", "content": prompt}
+                    ],
+                    stream=True,
+                    **({"tools": tools} if tools else {})
+                )
+            return stream, stream.response.headers
+        
+        # Only opening the stream is retried or hedged, once text has been forwarded it cannot be taken back
+        (provider, self.last_model), stream = await self.scheduler.call(
+            [("openai", model), *self.fallbacks],
+            open_stream,
+            discard=lambda stream: stream.close()
+        )
+        try:
+            async for text in stream.text_stream if provider == "anthropic" else _text_deltas(stream):
+                if self.last_ttft is None:
+                    self.last_ttft = time.perf_counter() - start
+                chunks.append(text)
+                yield {"type": "text", "text": text}
+        finally:
+            await stream.close()
+        
+        yield {"type": "message", "message": "".join(chunks)}
+
+
+async def _text_deltas(stream) -> AsyncIterator[str]:
+    """Get the text deltas of an OpenAI chat completion stream."""
+    
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _as_completion(message) -> ChatCompletion:
+    """Wrap an Anthropic message in a chat completion, so a failed over summary reads like a GPT one."""
+    
+    return ChatCompletion(
+        id=message.id,
+        object="chat.completion",
+        created=int(time.time()),
+        model=message.model,
+        choices=[{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "".join(block.text for block in message.content if block.type == "text")},
+        }],
+        usage={
+            "prompt_tokens": message.usage.input_tokens,
+            "completion_tokens": message.usage.output_tokens,
+            "total_tokens": message.usage.input_tokens + message.usage.output_tokens,
+        }
+    )
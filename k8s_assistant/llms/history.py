@@ -0,0 +1,167 @@
+import json
+from typing import Any
+
+from k8s_assistant.output_store import OutputRef
+
+
+class HistoryManager:
+    """
+    Keep an LLM conversation history within a token budget.
+    The most recent turns are kept verbatim. Older tool outputs are replaced with a short head/tail summary,
+    and if that is not enough the oldest turns are dropped.
+    A turn starts at every user message with plain text content.
+    Contents may be OutputRef handles to stored outputs; they are sized without reading them,
+    and only read when they are compacted.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 30000,
+        keep_recent_turns: int = 2,
+        min_compact_chars: int = 1500,
+        head_lines: int = 5,
+        tail_lines: int = 3
+    ):
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.min_compact_chars = min_compact_chars
+        self.head_lines = head_lines
+        self.tail_lines = tail_lines
+        self.last_tokens = 0
+        self.compacted = 0
+        self.dropped_turns = 0
+
+    def compact(self, history: list) -> None:
+        """Compact the history in place until it fits the token budget."""
+
+        sizes = [self.estimate_tokens(message["content"]) for message in history]
+        total = sum(sizes)
+
+        turn_starts = [idx for idx, message in enumerate(history) if self._is_turn_start(message)]
+        if total <= self.token_budget or len(turn_starts) <= self.keep_recent_turns:
+            self.last_tokens = total
+            return
+        recent_start = turn_starts[-self.keep_recent_turns] if self.keep_recent_turns else len(history)
+
+        # First pass: summarize large tool outputs of older turns, oldest first
+        for idx in range(recent_start):
+            if total <= self.token_budget:
+                break
+            content = self._compact_content(history[idx]["content"])
+            if content is not None:
+                history[idx]["content"] = content
+                new_size = self.estimate_tokens(content)
+                total -= sizes[idx] - new_size
+                sizes[idx] = new_size
+
+        # Second pass: drop whole turns from the start, so tool_use/tool_result pairs stay together
+        older_turns = [start for start in turn_starts if start < recent_start]
+        drop_until = 0
+        for next_start in older_turns[1:] + [recent_start]:
+            if total <= self.token_budget:
+                break
+            total -= sum(sizes[drop_until:next_start])
+            drop_until = next_start
+            self.dropped_turns += 1
+        if drop_until:
+            del history[:drop_until]
+
+        self.last_tokens = total
+
+    def estimate_tokens(self, content: Any) -> int:
+        """Estimate the token count of a message content, at roughly four characters per token."""
+        return self._size(content) // 4 + 4
+
+    def stats(self) -> dict:
+        return {
+            "history_tokens": self.last_tokens,
+            "token_budget": self.token_budget,
+            "compacted_outputs": self.compacted,
+            "dropped_turns": self.dropped_turns,
+        }
+
+    def summarize(self, text: str) -> str:
+        """Build the compact replacement for a large output."""
+
+        self.compacted += 1
+
+        lines = text.splitlines()
+        kept = [line[:200] for line in lines[:self.head_lines]]
+        if len(lines) > self.head_lines + self.tail_lines:
+            kept.append(f"... {len(lines) - self.head_lines - self.tail_lines} lines omitted ...")
+            kept.extend(line[:200] for line in lines[-self.tail_lines:])
+        else:
+            kept.extend(line[:200] for line in lines[self.head_lines:])
+
+        # The full text is not kept, so the model is pointed at the tool call instead
+        header = f"[Earlier output compacted: {len(lines)} lines, {len(text)} chars. Repeat the tool call for the full output]"
+        return "\n".join([header, *kept])
+
+    def _compact_content(self, content: Any) -> Any:
+        """Return the compacted form of a message content, or None when there is nothing to compact."""
+
+        if isinstance(content, OutputRef):
+            return self.summarize(str(content)) if content.chars >= self.min_compact_chars else None
+
+        if isinstance(content, str):
+            if len(content) < self.min_compact_chars or content.startswith("[Earlier output compacted"):
+                return None
+            return self.summarize(content)
+
+        if isinstance(content, list):
+            changed = False
+            blocks = []
+            for block in content:
+                if isinstance(block, dict) and block.get("type") == "tool_result":
+                    inner = block.get("content")
+                    if isinstance(inner, OutputRef):
+                        if inner.chars >= self.min_compact_chars:
+                            block = {**block, "content": self.summarize(str(inner))}
+                            changed = True
+                        blocks.append(block)
+                        continue
+                    text = inner if isinstance(inner, str) else self._text(inner)
+                    if len(text) >= self.min_compact_chars and not text.startswith("[Earlier output compacted"):
+                        block = {**block, "content": self.summarize(text)}
+                        changed = True
+                blocks.append(block)
+            return blocks if changed else None
+
+        return None
+
+    def _is_turn_start(self, message: dict) -> bool:
+        return message.get("role") == "user" and isinstance(message.get("content"), (str, OutputRef))
+
+    def _size(self, content: Any) -> int:
+        """Get the length of a message content as text, without reading stored outputs."""
+
+        if isinstance(content, OutputRef):
+            return content.chars
+        if isinstance(content, str):
+            return len(content)
+        if isinstance(content, list):
+            return sum(self._size(block) for block in content)
+        if isinstance(content, dict) and "text" not in content and "content" in content:
+            return self._size(content["content"])
+        return len(self._text(content))
+
+    def _text(self, content: Any) -> str:
+        """Flatten a message content (string, content blocks or SDK objects) into text."""
+
+        if content is None:
+            return ""
+        if isinstance(content, (str, OutputRef)):
+            return str(content)
+        if isinstance(content, list):
+            return "".join(self._text(block) for block in content)
+        if isinstance(content, dict):
+            if "text" in content:
+                return str(content["text"])
+            if "content" in content:
+                return self._text(content["content"])
+            return json.dumps(content, default=str)
+        if hasattr(content, "text"):
+            return str(content.text)
+        if hasattr(content, "input"):
+            return json.dumps(content.input, default=str)
+        return str(content)
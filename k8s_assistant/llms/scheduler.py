@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import anthropic
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: timeouts, conflicts, rate limits, server errors and Anthropic's "overloaded"
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Statuses that will not get better for this model, but may work with the next one, e.g. an unknown model
+FAILOVER_STATUSES = {403, 404}
+
+TRANSIENT_ERRORS = (anthropic.APIConnectionError, openai.APIConnectionError, httpx.TransportError, asyncio.TimeoutError)
+
+# Request limit headers per provider: (limit, remaining, reset)
+RATE_LIMIT_HEADERS = {
+    "anthropic": ("anthropic-ratelimit-requests-limit", "anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+    "openai": ("x-ratelimit-limit-requests", "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+}
+
+# OpenAI reset durations look like "20ms", "1s" or "6m0s"
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+Target = Tuple[str, str]
+
+
+def parse_reset(value: str | None) -> float | None:
+    """Get the seconds until a rate limit resets, from an RFC 3339 timestamp or a duration like "6m0s"."""
+
+    if not value:
+        return None
+    if "T" in value:
+        try:
+            reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(headers) -> float | None:
+    """Get the back off the provider asked for, in seconds."""
+
+    if headers is None:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def parse_targets(value: str | None, provider: str) -> List[Target]:
+    """
+    Parse a comma separated list of fallback models into (provider, model) targets.
+    Models are for the given provider unless prefixed with "anthropic:" or "openai:".
+    """
+
+    targets = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        prefix, _, model = item.partition(":")
+        targets.append((prefix, model) if model and prefix in RATE_LIMIT_HEADERS else (provider, item))
+    return targets
+
+
+class TokenBucket:
+    """
+    Pace the requests sent to one model with the request limit its provider reports.
+    Until the provider has sent its limits the bucket lets everything through. Afterwards it refills at the
+    per minute limit, trusts the remaining count the provider reports, and holds every request until the
+    reset time when the limit is used up, or for as long as a 429 asked.
+    """
+
+    def __init__(self):
+        self.capacity = None
+        self.rate = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Get the seconds until the next request may be sent."""
+
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.rate is not None and self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+
+        if self.delay() > 0:
+            return False
+        if self.rate is not None:
+            self.tokens -= 1
+        return True
+
+    async def acquire(self) -> float:
+        """Wait for a token and take it. Returns the seconds spent waiting."""
+
+        start = time.monotonic()
+        # Waiters queue on the lock, so they are released in order and one at a time
+        async with self.lock:
+            while not self.try_acquire():
+                await asyncio.sleep(self.delay())
+        return time.monotonic() - start
+
+    def update(self, provider: str, headers) -> None:
+        """Update the bucket from the rate limit headers of a response."""
+
+        if headers is None:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        limit_header, remaining_header, reset_header = RATE_LIMIT_HEADERS[provider]
+        try:
+            limit = int(headers.get(limit_header))
+            remaining = int(headers.get(remaining_header))
+        except (TypeError, ValueError):
+            limit = remaining = None
+        if limit:
+            self.capacity = float(limit)
+            self.rate = limit / 60
+            self.tokens = float(remaining)
+            reset = parse_reset(headers.get(reset_header))
+            if remaining <= 0 and reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+        backoff = retry_after(headers)
+        if backoff:
+            self.blocked_until = max(self.blocked_until, now + backoff)
+
+
+class LLMScheduler:
+    """
+    Send LLM requests with rate limit pacing, retries, hedging and failover.
+    Each request is tried against a list of (provider, model) targets in order. A target is retried on rate
+    limits, server errors and timeouts with jittered exponential back off, and given up for the next one when
+    its retries run out or the model is not available. A target that failed is tried last for a while.
+    With hedge_after set, a second copy of a request that has not answered by then is sent, and the first
+    answer wins. Latency and retry, hedge and failover events are kept per target for stats(). A target's latency
+    runs from its first attempt, so time lost on the targets before it is only in the end to end latency.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        attempt_timeout: float | None = 60.0,
+        hedge_after: float | None = None,
+        down_seconds: float = 30.0,
+        max_samples: int = 1000,
+        max_events: int = 50
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.hedge_after = hedge_after
+        self.down_seconds = down_seconds
+        self.max_samples = max_samples
+        self.buckets: Dict[Target, TokenBucket] = {}
+        self.down_until: Dict[Target, float] = {}
+        self.targets: Dict[Target, Dict[str, Any]] = {}
+        self.events: deque = deque(maxlen=max_events)
+        self.latencies: deque = deque(maxlen=max_samples)
+
+    def bucket(self, target: Target) -> TokenBucket:
+        # Providers set their limits per model, so the fallback model is not held up by the one that ran out
+        if target not in self.buckets:
+            self.buckets[target] = TokenBucket()
+        return self.buckets[target]
+
+    async def call(
+        self,
+        targets: List[Target],
+        request: Callable[[str, str], Awaitable[Tuple[Any, Any]]],
+        discard: Callable[[Any], Awaitable] | None = None
+    ) -> Tuple[Target, Any]:
+        """
+        Send a request, retrying and failing over as needed, and return the target that answered with its result.
+        request(provider, model) sends one attempt and returns its result and the response headers.
+        discard releases a result that lost a hedge race, such as an opened stream.
+        """
+
+        now = time.monotonic()
+        order = sorted(dict.fromkeys(targets), key=lambda target: self.down_until.get(target, 0) > now)
+        start = time.perf_counter()
+        error = None
+        for position, target in enumerate(order):
+            stats = self._stats(target)
+            target_start = None
+            for attempt in range(self.max_retries + 1):
+                stats["paced_seconds"] += await self.bucket(target).acquire()
+                stats["attempts"] += 1
+                if target_start is None:
+                    target_start = time.perf_counter()
+                try:
+                    result = await self._attempt(target, request, discard)
+                except Exception as e:
+                    error = e
+                    status = getattr(e, "status_code", None)
+                    headers = getattr(getattr(e, "response", None), "headers", None)
+                    self.bucket(target).update(target[0], headers)
+                    if status == 429:
+                        stats["rate_limited"] += 1
+                    if status in FAILOVER_STATUSES:
+                        break
+                    # Rather than wait out a long back off, move on when there is somewhere to go
+                    if status == 429 and (retry_after(headers) or 0) > self.max_delay and position + 1 < len(order):
+                        break
+                    if status not in RETRY_STATUSES and not isinstance(e, TRANSIENT_ERRORS):
+                        raise
+                    if attempt < self.max_retries:
+                        stats["retries"] += 1
+                        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                        logger.info(f"Retrying {target[1]} in {delay:.2f}s after {status or type(e).__name__}")
+                        await asyncio.sleep(delay)
+                    continue
+                now = time.perf_counter()
+                stats["requests"] += 1
+                stats["latencies"].append(now - target_start)
+                self.latencies.append(now - start)
+                return target, result
+
+            self.down_until[target] = time.monotonic() + self.down_seconds
+            stats["failures"] += 1
+            reason = f"{getattr(error, 'status_code', None) or type(error).__name__}"
+            if position + 1 < len(order):
+                following = order[position + 1]
+                stats["failovers"] += 1
+                self.events.append({
+                    "time": time.time(),
+                    "event": "failover",
+                    "from": f"{target[0]}:{target[1]}",
+                    "to": f"{following[0]}:{following[1]}",
+                    "reason": reason,
+                })
+                logger.warning(f"Failing over from {target[1]} to {following[1]} after {reason}")
+        raise error
+
+    async def _attempt(self, target: Target, request, discard) -> Any:
+        """Send one attempt, and a hedged copy when the first is slower than hedge_after."""
+
+        first = asyncio.ensure_future(self._send(target, request))
+        if self.hedge_after is None:
+            return await first
+
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done and self.bucket(target).try_acquire():
+                self._stats(target)["hedges"] += 1
+                tasks.add(asyncio.ensure_future(self._send(target, request)))
+
+            error = None
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                if not winners:
+                    error = error or next(iter(done)).exception()
+                    continue
+                for task in winners[1:]:
+                    if discard is not None:
+                        await discard(task.result())
+                if winners[0] is not first:
+                    self._stats(target)["hedge_wins"] += 1
+                return winners[0].result()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _send(self, target: Target, request) -> Any:
+        result, headers = await asyncio.wait_for(request(*target), timeout=self.attempt_timeout)
+        self.bucket(target).update(target[0], headers)
+        return result
+
+    def _stats(self, target: Target) -> Dict[str, Any]:
+        if target not in self.targets:
+            self.targets[target] = {
+                "requests": 0,
+                "attempts": 0,
+                "retries": 0,
+                "rate_limited": 0,
+                "hedges": 0,
+                "hedge_wins": 0,
+                "failures": 0,
+                "failovers": 0,
+                "paced_seconds": 0.0,
+                "latencies": deque(maxlen=self.max_samples),
+            }
+        return self.targets[target]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the counters and the p50/p95/p99 latency in seconds per target, the p50/p95/p99 end to end latency
+        of the calls including retries and failovers, and the recent failover events.
+        """
+
+        targets = {}
+        for (provider, model), stats in self.targets.items():
+            report = {name: value for name, value in stats.items() if name != "latencies"}
+            report["paced_seconds"] = round(report["paced_seconds"], 3)
+            report.update(_percentiles(stats["latencies"]))
+            targets[f"{provider}:{model}"] = report
+        return {"targets": targets, "end_to_end": _percentiles(self.latencies), "events": list(self.events)}
+
+
+def _percentiles(samples) -> Dict[str, float | None]:
+    latencies = sorted(samples)
+    return {
+        f"p{pct}": round(latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))], 3) if latencies else None
+        for pct in (50, 95, 99)
+    }
+
+
+# Scheduler shared by all LLM clients in the process, so every session paces against the same limits
+_scheduler: LLMScheduler | None = None
+
+
+def get_scheduler() -> LLMScheduler:
+    """Get the process wide LLM scheduler, configured from the environment."""
+
+    global _scheduler
+    if _scheduler is None:
+        hedge_after = os.getenv("K8S_ASSISTANT_LLM_HEDGE_AFTER")
+        _scheduler = LLMScheduler(
+            max_retries=int(os.getenv("K8S_ASSISTANT_LLM_RETRIES", "4")),
+            attempt_timeout=float(os.getenv("K8S_ASSISTANT_LLM_TIMEOUT", "60")),
+            hedge_after=float(hedge_after) if hedge_after else None
+        )
+    return _scheduler
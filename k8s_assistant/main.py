@@ -1,5 +1,39 @@
 import sys
+import argparse
 import asyncio
+import time
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line: no subcommand starts the interactive assistant, `serve` starts the HTTP API
+    and `batch` answers queries from a file.
+    """
+    
+    parser = argparse.ArgumentParser(description="Kubernetes assistant")
+    parser.add_argument(
+        "--server-url",
+        help="Connect to a running MCP server (e.g. http://localhost:8080/mcp/) instead of starting one"
+    )
+    parser.add_argument("--timing", action="store_true", help="Print a breakdown of the startup time")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    serve = subparsers.add_parser("serve", help="Serve many concurrent conversations over a local HTTP API")
+    serve.add_argument("--server-url", default=argparse.SUPPRESS, help="Same as the top level --server-url")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8081)
+    serve.add_argument("--max-sessions", type=int, default=256, help="Conversations kept in memory")
+    serve.add_argument("--idle-timeout", type=float, default=1800, help="Seconds before an idle conversation is dropped")
+    serve.add_argument("--max-concurrent", type=int, default=8, help="Queries running at once across all sessions")
+    
+    batch = subparsers.add_parser("batch", help="Answer the queries in a JSONL file without prompting")
+    batch.add_argument("input", help='JSONL file with one {"id": ..., "query": ...} per line')
+    batch.add_argument("-o", "--output", required=True, help="JSONL file the results are appended to")
+    batch.add_argument("--server-url", default=argparse.SUPPRESS, help="Same as the top level --server-url")
+    batch.add_argument("--workers", type=int, default=4, help="Queries running at once")
+    batch.add_argument("--timeout", type=float, default=None, help="Seconds allowed per query")
+    batch.add_argument("--no-resume", dest="resume", action="store_false", help="Overwrite the output instead of skipping answered ids")
+    return parser.parse_args(argv)
 
 
 # Main entry point for the CLI when installed as a package
@@ -7,11 +41,37 @@ def cli_entry_point():
     """
     Entry point for the CLI tool when installed via pip
     """
+    started = time.perf_counter()
+    args = parse_args()
+    
     # Import here to avoid circular imports
-    from k8s_assistant.client import async_main
+    from k8s_assistant.client import async_main, server_parameters
     
     try:
-        asyncio.run(async_main())
+        if args.command == "serve":
+            from k8s_assistant.daemon import serve
+            asyncio.run(serve(
+                server_parameters(args.server_url),
+                host=args.host,
+                port=args.port,
+                max_sessions=args.max_sessions,
+                idle_timeout=args.idle_timeout,
+                max_concurrent=args.max_concurrent
+            ))
+        elif args.command == "batch":
+            from k8s_assistant.batch import run_batch
+            stats = asyncio.run(run_batch(
+                server_parameters(args.server_url),
+                args.input,
+                args.output,
+                workers=args.workers,
+                timeout=args.timeout,
+                resume=args.resume
+            ))
+            print(f"Batch finished: {stats}")
+            sys.exit(1 if stats["error"] else 0)
+        else:
+            asyncio.run(async_main(args.server_url, timing=args.timing, started=started))
     except KeyboardInterrupt:
         print("\nExiting...")
         sys.exit(0)
@@ -0,0 +1,129 @@
+# output_store.py
+import logging
+import mmap
+import os
+import tempfile
+import weakref
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class OutputRef:
+    """
+    Handle to one output held in an OutputStore: a byte range of its spool file.
+    It stands in for the text in histories and is turned back into text with str() when a request is sent.
+    """
+
+    __slots__ = ("store", "offset", "length", "chars")
+
+    def __init__(self, store: "OutputStore", offset: int, length: int, chars: int):
+        self.store = store
+        self.offset = offset
+        self.length = length
+        self.chars = chars
+
+    def __str__(self) -> str:
+        return self.store.read(self)
+
+    def __bool__(self) -> bool:
+        return self.chars > 0
+
+    def __repr__(self) -> str:
+        return f"OutputRef(offset={self.offset}, length={self.length})"
+
+
+class OutputStore:
+    """
+    Session scoped, append only store of tool outputs.
+    Each output is written once to a spool file and read back through a memory map, so a long session keeps
+    small handles in its histories instead of several copies of every large output. Outputs under
+    inline_bytes are not worth a handle and stay plain strings. The spool file is removed with the store.
+    """
+
+    def __init__(self, inline_bytes: int = 2048, directory: str | None = None):
+        self.inline_bytes = inline_bytes
+        fd, path = tempfile.mkstemp(prefix="k8s-assistant-outputs-", dir=directory)
+        self._state: Dict[str, Any] = {"file": os.fdopen(fd, "w+b", buffering=0), "map": None, "path": path}
+        if os.name == "posix":
+            # The open file stays readable, and nothing is left behind if the process dies
+            os.unlink(path)
+            self._state["path"] = None
+        self.size = 0
+        self.outputs = 0
+        self.inline = 0
+        self.reads = 0
+        weakref.finalize(self, _release, self._state)
+
+    def put(self, text: str) -> "OutputRef | str":
+        """Store an output and get its handle, or the text itself when it is small."""
+
+        data = text.encode("utf-8", "surrogatepass")
+        if len(data) < self.inline_bytes:
+            self.inline += 1
+            return text
+        self._state["file"].write(data)
+        ref = OutputRef(self, self.size, len(data), len(text))
+        self.size += len(data)
+        self.outputs += 1
+        return ref
+
+    def read(self, ref: OutputRef) -> str:
+        """Materialize the text of a handle."""
+
+        if self._state["file"] is None:
+            raise ValueError("output store is closed")
+        view = self._state["map"]
+        if view is None or len(view) < ref.offset + ref.length:
+            # The map covers the file as it was when mapped, so map it again once it has grown
+            if view is not None:
+                view.close()
+            view = self._state["map"] = mmap.mmap(self._state["file"].fileno(), 0, access=mmap.ACCESS_READ)
+        self.reads += 1
+        return view[ref.offset:ref.offset + ref.length].decode("utf-8", "surrogatepass")
+
+    def close(self) -> None:
+        _release(self._state)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"outputs": self.outputs, "inline": self.inline, "spooled_bytes": self.size, "reads": self.reads}
+
+
+def _release(state: Dict[str, Any]) -> None:
+    """Close the map and the spool file, and remove the file if it is still there."""
+
+    if state["map"] is not None:
+        state["map"].close()
+        state["map"] = None
+    if state["file"] is not None:
+        state["file"].close()
+        state["file"] = None
+    if state["path"] is not None:
+        try:
+            os.unlink(state["path"])
+        except OSError as e:
+            logger.debug(f"Could not remove output spool {state['path']}: {e}")
+        state["path"] = None
+
+
+def resolve(content: Any) -> Any:
+    """Materialize the output handles in a message content, directly or in tool_result blocks."""
+
+    if isinstance(content, OutputRef):
+        return str(content)
+    if isinstance(content, list) and any(isinstance(block, dict) and isinstance(block.get("content"), OutputRef) for block in content):
+        return [
+            {**block, "content": str(block["content"])} if isinstance(block, dict) and isinstance(block.get("content"), OutputRef) else block
+            for block in content
+        ]
+    return content
+
+
+def resolve_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy a history for sending, with every output handle materialized. Messages without handles are not copied."""
+
+    resolved = []
+    for message in messages:
+        content = resolve(message.get("content"))
+        resolved.append(message if content is message.get("content") else {**message, "content": content})
+    return resolved
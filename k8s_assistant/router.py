@@ -0,0 +1,108 @@
+# router.py
+import logging
+import re
+from typing import Any, Dict
+
+from k8s_assistant.tools.command import RESOURCE_ALIASES, normalize_resource
+
+logger = logging.getLogger(__name__)
+
+# Small talk patterns and their canned replies, matched against the whole normalized query
+SMALL_TALK = [
+    (
+        re.compile(r"(hi|hello|hey|hiya|howdy|yo|good (morning|afternoon|evening))( there)?( assistant| bot)?"),
+        "Hello! I'm your Kubernetes assistant. How can I help you with your Kubernetes cluster today?"
+    ),
+    (
+        re.compile(r"(thanks|thank you|thx|ty|cheers)( (a lot|so much|very much))?"),
+        "You're welcome! Let me know if there's anything else I can check in your cluster."
+    ),
+    (
+        re.compile(r"(ok|okay|cool|great|nice|got it)"),
+        "Great! Let me know if there's anything else I can help you with."
+    ),
+    (
+        re.compile(r"(help|what can you do|who are you|what are you)"),
+        "I'm your Kubernetes assistant. Ask me about your cluster in plain English, for example "
+        "\"list pods in kube-system\", \"why is checkout crashing in payments?\" or \"show me warning events\". "
+        "I only run read-only commands, so I can investigate your cluster but never change it."
+    ),
+]
+
+# "list pods in kube-system", "show me all deployments in the payments namespace", "get pods across all namespaces"
+DIRECT_COMMAND = re.compile(
+    r"(list|show|get|display)( me)?( all| the)? (?P<resource>[a-z]+)"
+    r"( (in|from|across)( the)? ((?P<all>all namespaces)|(?P<namespace>[a-z0-9][-a-z0-9]*)( namespace)?))?"
+)
+
+KNOWN_RESOURCES = set(RESOURCE_ALIASES.values())
+
+CLUSTER_SCOPED = {"nodes", "namespaces", "persistentvolumes"}
+
+
+def normalize(query: str) -> str:
+    """Lower case a query, drop punctuation and collapse whitespace."""
+    return re.sub(r"\s+", " ", re.sub(r"[,.!?]", " ", query.lower())).strip()
+
+
+class IntentRouter:
+    """
+    Answers trivial queries locally, in front of the LLMs.
+    Small talk gets a canned reply, and a query that maps to exactly one "kubectl get" runs that command directly.
+    Anything else goes to the LLMs. Counts and timings of both paths are kept to report the time saved.
+    """
+
+    def __init__(self):
+        self.counts = {"small_talk": 0, "command": 0, "llm": 0}
+        self.seconds = {"small_talk": 0.0, "command": 0.0, "llm": 0.0}
+
+    def route(self, query: str) -> Dict[str, Any] | None:
+        """
+        Classify a query as {"intent": "small_talk", "reply": ...} or {"intent": "command", "command": ..., "namespace": ...}.
+        Returns None when the query needs the LLMs.
+        """
+
+        text = normalize(query)
+        for pattern, reply in SMALL_TALK:
+            if pattern.fullmatch(text):
+                return {"intent": "small_talk", "reply": reply}
+
+        match = DIRECT_COMMAND.fullmatch(text)
+        if not match:
+            return None
+        resource = normalize_resource(match.group("resource"))
+        namespace = match.group("namespace") or "default"
+        if resource not in KNOWN_RESOURCES or namespace == "all":
+            return None
+        if match.group("all"):
+            return {"intent": "command", "command": f"get {resource} --all-namespaces", "namespace": ""}
+        return {
+            "intent": "command",
+            "command": f"get {resource}",
+            "namespace": "" if resource in CLUSTER_SCOPED else namespace
+        }
+
+    def record(self, intent: str, seconds: float) -> None:
+        """Record how long a query took on its path, "llm" for queries that went to the LLMs."""
+
+        self.counts[intent] += 1
+        self.seconds[intent] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the routed and LLM query counts and the hit rate.
+        Time saved is estimated from the average LLM path latency, once one query has taken it.
+        """
+
+        routed = self.counts["small_talk"] + self.counts["command"]
+        total = routed + self.counts["llm"]
+        average_llm = self.seconds["llm"] / self.counts["llm"] if self.counts["llm"] else None
+        saved = None
+        if average_llm is not None:
+            saved = round(max(0.0, average_llm * routed - self.seconds["small_talk"] - self.seconds["command"]), 3)
+        return {
+            **self.counts,
+            "hit_rate": round(routed / total, 3) if total else 0.0,
+            "average_llm_seconds": round(average_llm, 3) if average_llm is not None else None,
+            "time_saved_seconds": saved,
+        }
@@ -1,12 +1,67 @@
 # mcp_k8s_server.py
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 # from Tools.kubectl import KubectlTool
+import argparse
+import asyncio
+import functools
+import inspect
+import os
 import sys
+from k8s_assistant.tools.cache import get_tool_calls
 from k8s_assistant.tools.tool_config import tools
+from k8s_assistant import tracing
 
 sys.stdout.reconfigure(line_buffering=True)
 
 
+def make_async(func, name: str = "", normalize=None):
+    """
+    Wrap a blocking tool function so it runs in a worker thread.
+    This keeps the server event loop free, so concurrent tool calls from the client are served in parallel.
+    With normalize, calls whose normalized arguments match one in flight, from any session, share its execution.
+    Each call is traced as a server.tool span, continuing the trace context sent by the client in the request _meta.
+    """
+    if inspect.iscoroutinefunction(func):
+        return func
+    
+    @functools.wraps(func)
+    async def wrapper(*args, ctx: Context = None, **kwargs):
+        with tracing.span("server.tool", parent=_trace_context(ctx), tool=name) as span:
+            try:
+                key = normalize(*args, **kwargs) if normalize is not None else None
+            except Exception:
+                key = None
+            if key is None:
+                result, shared, age = await asyncio.to_thread(func, *args, **kwargs), False, None
+            else:
+                result, shared, age = await get_tool_calls().do((name, key), lambda: asyncio.to_thread(func, *args, **kwargs))
+            if age is not None and isinstance(result, dict):
+                # Let the model know this result was read a moment ago, like a result cache hit
+                age += result.get("cache_age_seconds", 0)
+                result = {**result, "cached": True, "cache_age_seconds": round(age, 1)}
+            if span:
+                span.set(status=result.get("status", "") if isinstance(result, dict) else "", shared=shared)
+            return result
+    
+    # Expose the tool arguments plus the FastMCP context, so the server injects the request context
+    signature = inspect.signature(func)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("ctx", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Context)
+    ])
+    return wrapper
+
+
+def _trace_context(ctx: Context | None) -> dict:
+    """Get the trace context headers the client sent in the request _meta."""
+    
+    try:
+        meta = ctx.request_context.meta if ctx is not None else None
+    except ValueError:
+        return {}
+    return {"traceparent": getattr(meta, "traceparent", None) or ""}
+
+
 def register_tools(server: FastMCP):
     """
     Load all tools.
@@ -20,13 +75,13 @@ def register_tools(server: FastMCP):
         print(f"Loaded tool: {tool_instance.name}")
         # Register the tool with the server
         server.add_tool(
-            tool_instance.run,
+            make_async(tool_instance.run, tool_instance.name, tool_instance.normalize_args),
             name=tool_instance.name,
             description=tool_instance.description
         )
 
 
-def initialize_server():
+def initialize_server(host: str = "localhost", port: int = 8080):
     """
     Initialize the FastMCP server.
     This function can be used to initialize any additional settings in the future.
@@ -34,15 +89,28 @@ def initialize_server():
     server = FastMCP(
         name="MCP Server",
         instructions="This is an MCP Server for Cloud Operations tools.",
-        settings={
-            "host": "localhost",
-            "port": 8080,
-        }
+        host=host,
+        port=port,
     )
     return server
 
 
-def run_server():
+def parse_args(argv=None):
+    """Parse the server command line. stdio is the default, so the client can still spawn the server itself."""
+    
+    parser = argparse.ArgumentParser(description="MCP server for Kubernetes operations tools")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "streamable-http", "sse"],
+        default=os.getenv("K8S_ASSISTANT_TRANSPORT", "stdio"),
+        help="stdio for a per-client server, streamable-http to serve many clients from one long running server"
+    )
+    parser.add_argument("--host", default=os.getenv("K8S_ASSISTANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("K8S_ASSISTANT_PORT", "8080")))
+    return parser.parse_args(argv)
+
+
+def run_server(transport: str = "stdio"):
     
     # # Initialize the kubectl tool
     # kubectl = KubectlTool()
@@ -55,19 +123,25 @@ def run_server():
     # )
     
     # Start the server
-    print(f"Starting server {server.name} on {server.settings.host}:{server.settings.port}...")
-    server.run(transport="stdio")
+    if transport == "stdio":
+        print(f"Starting server {server.name} over stdio...")
+    else:
+        path = server.settings.streamable_http_path if transport == "streamable-http" else server.settings.sse_path
+        print(f"Starting server {server.name} on http://{server.settings.host}:{server.settings.port}{path}...")
+    server.run(transport=transport)
     print("Server started. Listening for requests...")
     
 if __name__ == "__main__":
     
+    args = parse_args()
     print("Starting MCP server...")
+    tracing.configure("k8s-assistant-server")
     
     # Initialize the server
-    server = initialize_server()
+    server = initialize_server(args.host, args.port)
     
     # Register all tools
     register_tools(server)
     
     # Run the server
-    run_server()
+    run_server(args.transport)
@@ -0,0 +1,500 @@
+# cluster_state_index.py
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Set, Tuple
+import httpx
+from k8s_assistant.tools.command import KubectlCommand
+from k8s_assistant.tools.k8s_api import KubeAPIBackend, format_rows, human_age
+
+logger = logging.getLogger(__name__)
+
+
+# Kinds that are listed and watched, with their API path and the object count kept in memory
+INDEXED_KINDS = {
+    "pods": {"path": "/api/v1/pods", "max_objects": 100000},
+    "events": {"path": "/api/v1/events", "max_objects": 20000},
+    "deployments": {"path": "/apis/apps/v1/deployments", "max_objects": 20000},
+    "nodes": {"path": "/api/v1/nodes", "max_objects": 10000},
+    "services": {"path": "/api/v1/services", "max_objects": 20000},
+}
+
+HEADERS = {
+    "pods": (["NAME", "READY", "STATUS", "RESTARTS", "AGE"], ["IP", "NODE"]),
+    "events": (["LAST SEEN", "TYPE", "REASON", "OBJECT", "MESSAGE"], []),
+    "deployments": (["NAME", "READY", "UP-TO-DATE", "AVAILABLE", "AGE"], ["CONTAINERS", "IMAGES", "SELECTOR"]),
+    "nodes": (["NAME", "STATUS", "ROLES", "AGE", "VERSION"], ["INTERNAL-IP", "OS-IMAGE", "KERNEL-VERSION"]),
+    "services": (["NAME", "TYPE", "CLUSTER-IP", "EXTERNAL-IP", "PORT(S)", "AGE"], ["SELECTOR"]),
+}
+
+# Field selectors that can be answered from the index
+FIELD_SELECTORS = {"metadata.name", "metadata.namespace", "spec.nodeName", "status.phase"}
+
+
+class IndexedObject:
+    """
+    Slim copy of an API object.
+    Only the fields needed to filter and print it are kept, so large clusters stay within a small memory budget.
+    """
+
+    __slots__ = ("namespace", "name", "labels", "owner", "node", "phase", "created", "cells", "wide_cells")
+
+    def __init__(self, namespace, name, labels, owner, node, phase, created, cells, wide_cells):
+        self.namespace = namespace
+        self.name = name
+        self.labels = labels
+        self.owner = owner
+        self.node = node
+        self.phase = phase
+        self.created = created
+        self.cells = cells
+        self.wide_cells = wide_cells
+
+
+class KindIndex:
+    """In-memory store of one kind, with secondary indexes by namespace, label, owner and node."""
+
+    def __init__(self, kind: str, max_objects: int):
+        self.kind = kind
+        self.max_objects = max_objects
+        self.objects: Dict[Tuple[str, str], IndexedObject] = {}
+        self.by_namespace: Dict[str, Set[Tuple[str, str]]] = {}
+        self.by_label: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+        self.by_owner: Dict[str, Set[Tuple[str, str]]] = {}
+        self.by_node: Dict[str, Set[Tuple[str, str]]] = {}
+        self.resource_version = ""
+        self.synced = False
+        self.overflow = False
+        self.last_contact = 0.0
+        self.lock = threading.RLock()
+
+    def upsert(self, obj: IndexedObject) -> None:
+        key = (obj.namespace, obj.name)
+        with self.lock:
+            if key in self.objects:
+                self._unlink(key, self.objects[key])
+            elif len(self.objects) >= self.max_objects:
+                # A partial index would give wrong answers, so stop serving this kind instead, events included
+                self.overflow = True
+                return
+            self.objects[key] = obj
+            self._link(key, obj)
+
+    def delete(self, namespace: str, name: str) -> None:
+        key = (namespace, name)
+        with self.lock:
+            obj = self.objects.pop(key, None)
+            if obj is not None:
+                self._unlink(key, obj)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.objects.clear()
+            self.by_namespace.clear()
+            self.by_label.clear()
+            self.by_owner.clear()
+            self.by_node.clear()
+            self.overflow = False
+
+    def select(
+        self,
+        namespace: str = "*",
+        labels: Dict[str, str] | None = None,
+        owner: str | None = None,
+        node: str | None = None
+    ) -> List[IndexedObject]:
+        """Get objects matching all given filters, using the smallest secondary index as the starting set."""
+
+        with self.lock:
+            candidates = []
+            if namespace != "*":
+                candidates.append(self.by_namespace.get(namespace, set()))
+            for label in (labels or {}).items():
+                candidates.append(self.by_label.get(label, set()))
+            if owner:
+                candidates.append(self.by_owner.get(owner, set()))
+            if node:
+                candidates.append(self.by_node.get(node, set()))
+
+            if not candidates:
+                return list(self.objects.values())
+            candidates.sort(key=len)
+            keys = set(candidates[0]).intersection(*candidates[1:])
+            return [self.objects[key] for key in keys]
+
+    def _link(self, key, obj: IndexedObject) -> None:
+        self.by_namespace.setdefault(obj.namespace, set()).add(key)
+        for label in obj.labels.items():
+            self.by_label.setdefault(label, set()).add(key)
+        if obj.owner:
+            self.by_owner.setdefault(obj.owner, set()).add(key)
+        if obj.node:
+            self.by_node.setdefault(obj.node, set()).add(key)
+
+    def _unlink(self, key, obj: IndexedObject) -> None:
+        for index, value in [(self.by_namespace, obj.namespace), (self.by_owner, obj.owner), (self.by_node, obj.node)]:
+            _discard(index, value, key)
+        for label in obj.labels.items():
+            _discard(self.by_label, label, key)
+
+
+class ClusterStateIndex:
+    """
+    Informer style cache of common kinds.
+    Each kind is listed once and then kept up to date by a watch running in a background thread.
+    Matching 'get' queries are answered from memory; anything else returns None so the caller runs a live call.
+    """
+
+    def __init__(self, backend: KubeAPIBackend, kinds: Iterable[str] | None = None, stale_after: float = 60, page_size: int = 500):
+        self.backend = backend
+        self.stale_after = stale_after
+        self.page_size = page_size
+        self.kinds = {
+            kind: KindIndex(kind, INDEXED_KINDS[kind]["max_objects"])
+            for kind in (kinds or INDEXED_KINDS)
+        }
+        self.served = 0
+        self.fallbacks = 0
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start one list/watch thread per kind."""
+
+        for kind in self.kinds:
+            thread = threading.Thread(target=self._run_informer, args=(kind,), name=f"informer-{kind}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def is_fresh(self, kind: str) -> bool:
+        """Check if a kind is synced, complete and was heard from recently."""
+
+        index = self.kinds.get(kind)
+        return bool(
+            index and index.synced and not index.overflow
+            and time.monotonic() - index.last_contact < self.stale_after
+        )
+
+    def query(self, parsed: KubectlCommand) -> Dict[str, Any] | None:
+        """Answer a parsed 'get' command from the index, or return None when it must be served live."""
+
+        if not self._can_serve(parsed):
+            self.fallbacks += 1
+            return None
+
+        labels = _parse_label_selector(parsed.flags.get("--selector", ""))
+        fields = _parse_field_selector(parsed.flags.get("--field-selector", ""))
+        if labels is None or fields is None:
+            self.fallbacks += 1
+            return None
+
+        equal_labels = {key: value for key, (op, value) in labels.items() if op == "="}
+        index = self.kinds[parsed.resource]
+        namespace = fields.pop("metadata.namespace", parsed.namespace) if parsed.resource != "nodes" else "*"
+        objects = index.select(namespace=namespace, labels=equal_labels, node=fields.pop("spec.nodeName", None))
+
+        names = set(parsed.names)
+        if "metadata.name" in fields:
+            names.add(fields.pop("metadata.name"))
+        phase = fields.pop("status.phase", None)
+        objects = [
+            obj for obj in objects
+            if (not names or obj.name in names)
+            and (phase is None or obj.phase == phase)
+            and all(obj.labels.get(key) != value for key, (op, value) in labels.items() if op == "!=")
+        ]
+        self.served += 1
+
+        if parsed.names and not objects:
+            return {
+                "stdout": "",
+                "stderr": f'Error from server (NotFound): {parsed.resource} "{parsed.names[0]}" not found\n',
+                "status": "error",
+                "code": 1
+            }
+        if not objects:
+            where = "" if namespace == "*" else f" in {namespace} namespace"
+            return {"stdout": "", "stderr": f"No resources found{where}.\n", "status": "success", "code": 0}
+
+        output = parsed.flags.get("--output", "")
+        if output == "name":
+            singular = parsed.resource[:-1]
+            stdout = "".join(f"{singular}/{obj.name}\n" for obj in sorted(objects, key=lambda obj: obj.name))
+        else:
+            stdout = self._render(parsed.resource, objects, wide=output == "wide", with_namespace=parsed.namespace == "*")
+        return {"stdout": stdout, "stderr": "", "status": "success", "code": 0, "source": "state-index"}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "served": self.served,
+            "fallbacks": self.fallbacks,
+            "objects": {kind: len(index.objects) for kind, index in self.kinds.items()},
+            "fresh": {kind: self.is_fresh(kind) for kind in self.kinds},
+        }
+
+    def _can_serve(self, parsed: KubectlCommand) -> bool:
+        allowed_flags = {"--namespace", "--all-namespaces", "--selector", "--field-selector", "--output", "--context"}
+        return (
+            parsed.verb == "get"
+            and parsed.resource in self.kinds
+            and self.is_fresh(parsed.resource)
+            and set(parsed.flags) <= allowed_flags
+            and parsed.flags.get("--output", "") in ("", "wide", "name")
+            and parsed.context == self.backend.context
+        )
+
+    def _render(self, kind: str, objects: List[IndexedObject], wide: bool, with_namespace: bool) -> str:
+        header, wide_header = HEADERS[kind]
+        header = list(header) + (list(wide_header) if wide else [])
+        if with_namespace and kind != "nodes":
+            header.insert(0, "NAMESPACE")
+
+        if kind == "events":
+            objects = sorted(objects, key=lambda obj: obj.created or "")
+        else:
+            objects = sorted(objects, key=lambda obj: (obj.namespace, obj.name))
+
+        rows = []
+        for obj in objects:
+            # Ages are computed at render time, as they change without any watch event
+            cells = [human_age(cell[1]) if isinstance(cell, tuple) else cell for cell in obj.cells]
+            if wide:
+                cells.extend(obj.wide_cells)
+            if with_namespace and kind != "nodes":
+                cells.insert(0, obj.namespace)
+            rows.append(cells)
+        return format_rows(header, rows)
+
+    # Informer loop
+
+    def _run_informer(self, kind: str) -> None:
+        index = self.kinds[kind]
+        path = INDEXED_KINDS[kind]["path"]
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                if not index.synced:
+                    self._list(kind, index, path)
+                self._watch(kind, index, path)
+                backoff = 1.0
+            except Exception as e:
+                logger.warning(f"Informer for {kind} failed: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _list(self, kind: str, index: KindIndex, path: str) -> None:
+        objects, resource_version, token = [], "", None
+        while True:
+            params = {"limit": str(self.page_size)}
+            if token:
+                params["continue"] = token
+            response = self.backend.http.get(path, params=params)
+            response.raise_for_status()
+            body = response.json()
+            objects.extend(_slim(kind, item) for item in body.get("items", []))
+            resource_version = body.get("metadata", {}).get("resourceVersion", "")
+            token = body.get("metadata", {}).get("continue")
+            if not token:
+                break
+
+        with index.lock:
+            index.clear()
+            for obj in objects:
+                index.upsert(obj)
+            index.resource_version = resource_version
+            index.synced = True
+            index.last_contact = time.monotonic()
+        logger.info(f"Indexed {len(index.objects)} {kind}")
+
+    def _watch(self, kind: str, index: KindIndex, path: str) -> None:
+        params = {
+            "watch": "1",
+            "resourceVersion": index.resource_version,
+            "allowWatchBookmarks": "true",
+            "timeoutSeconds": str(int(self.stale_after / 2) or 1),
+        }
+        timeout = httpx.Timeout(10, read=self.stale_after)
+        with self.backend.http.stream("GET", path, params=params, timeout=timeout) as response:
+            if response.status_code == 410:
+                index.synced = False
+                return
+            response.raise_for_status()
+            index.last_contact = time.monotonic()
+            for line in response.iter_lines():
+                if self._stop.is_set():
+                    return
+                if not line:
+                    continue
+                event = json.loads(line)
+                obj = event.get("object", {})
+                metadata = obj.get("metadata", {})
+                index.last_contact = time.monotonic()
+
+                if event.get("type") == "ERROR":
+                    # Usually 410 Gone: the resource version is too old, so relist
+                    index.synced = False
+                    return
+                if metadata.get("resourceVersion"):
+                    index.resource_version = metadata["resourceVersion"]
+                if event.get("type") == "BOOKMARK":
+                    continue
+                if event.get("type") == "DELETED":
+                    index.delete(metadata.get("namespace", ""), metadata.get("name", ""))
+                else:
+                    index.upsert(_slim(kind, obj))
+        index.last_contact = time.monotonic()
+
+
+def _slim(kind: str, obj: Dict[str, Any]) -> IndexedObject:
+    """Reduce an API object to an IndexedObject with precomputed table cells."""
+
+    metadata = obj.get("metadata", {})
+    spec = obj.get("spec", {}) or {}
+    status = obj.get("status", {}) or {}
+    namespace = sys.intern(metadata.get("namespace", ""))
+    labels = {sys.intern(key): sys.intern(value) for key, value in (metadata.get("labels") or {}).items()}
+    owners = metadata.get("ownerReferences") or []
+    owner = sys.intern(f"{owners[0]['kind']}/{owners[0]['name']}") if owners else ""
+    created = metadata.get("creationTimestamp", "")
+    node, phase, wide_cells = "", "", ()
+
+    if kind == "pods":
+        statuses = status.get("containerStatuses") or []
+        ready = sum(1 for container in statuses if container.get("ready"))
+        restarts = sum(container.get("restartCount", 0) for container in statuses)
+        node = sys.intern(spec.get("nodeName") or "")
+        phase = sys.intern(status.get("phase", ""))
+        cells = (
+            metadata.get("name", ""),
+            f"{ready}/{len(spec.get('containers') or statuses)}",
+            _pod_status(metadata, status),
+            str(restarts),
+            ("age", created),
+        )
+        wide_cells = (status.get("podIP") or "<none>", node or "<none>")
+    elif kind == "events":
+        involved = obj.get("involvedObject", {})
+        owner = sys.intern(f"{involved.get('kind', '')}/{involved.get('name', '')}")
+        created = obj.get("lastTimestamp") or obj.get("eventTime") or created
+        cells = (
+            ("age", created),
+            obj.get("type", ""),
+            obj.get("reason", ""),
+            f"{involved.get('kind', '').lower()}/{involved.get('name', '')}",
+            " ".join((obj.get("message") or "").split()),
+        )
+    elif kind == "deployments":
+        containers = ((spec.get("template") or {}).get("spec") or {}).get("containers") or []
+        cells = (
+            metadata.get("name", ""),
+            f"{status.get('readyReplicas', 0)}/{spec.get('replicas', 0)}",
+            str(status.get("updatedReplicas", 0)),
+            str(status.get("availableReplicas", 0)),
+            ("age", created),
+        )
+        wide_cells = (
+            ",".join(container.get("name", "") for container in containers),
+            ",".join(container.get("image", "") for container in containers),
+            ",".join(f"{key}={value}" for key, value in ((spec.get("selector") or {}).get("matchLabels") or {}).items()),
+        )
+    elif kind == "nodes":
+        conditions = {condition.get("type"): condition.get("status") for condition in status.get("conditions") or []}
+        node_status = "Ready" if conditions.get("Ready") == "True" else "NotReady"
+        if spec.get("unschedulable"):
+            node_status += ",SchedulingDisabled"
+        roles = sorted(key.split("/", 1)[1] for key in labels if key.startswith("node-role.kubernetes.io/"))
+        info = status.get("nodeInfo") or {}
+        addresses = {address.get("type"): address.get("address") for address in status.get("addresses") or []}
+        cells = (
+            metadata.get("name", ""),
+            node_status,
+            ",".join(roles) or "<none>",
+            ("age", created),
+            info.get("kubeletVersion", ""),
+        )
+        wide_cells = (addresses.get("InternalIP", "<none>"), info.get("osImage", ""), info.get("kernelVersion", ""))
+    else:
+        ingress = (status.get("loadBalancer") or {}).get("ingress") or []
+        external = ",".join(item.get("ip") or item.get("hostname", "") for item in ingress) or ",".join(spec.get("externalIPs") or [])
+        if not external:
+            external = "<pending>" if spec.get("type") == "LoadBalancer" else "<none>"
+        ports = ",".join(
+            f"{port.get('port')}:{port['nodePort']}/{port.get('protocol', 'TCP')}" if port.get("nodePort")
+            else f"{port.get('port')}/{port.get('protocol', 'TCP')}"
+            for port in spec.get("ports") or []
+        )
+        cells = (
+            metadata.get("name", ""),
+            spec.get("type", "ClusterIP"),
+            spec.get("clusterIP") or "<none>",
+            external,
+            ports or "<none>",
+            ("age", created),
+        )
+        wide_cells = (",".join(f"{key}={value}" for key, value in (spec.get("selector") or {}).items()) or "<none>",)
+
+    return IndexedObject(namespace, metadata.get("name", ""), labels, owner, node, phase, created, cells, wide_cells)
+
+
+def _pod_status(metadata: Dict[str, Any], status: Dict[str, Any]) -> str:
+    """Compute the STATUS column of a pod the way kubectl does, preferring container waiting/terminated reasons."""
+
+    if metadata.get("deletionTimestamp"):
+        return "Terminating"
+    reason = status.get("reason") or status.get("phase", "")
+    for container in status.get("initContainerStatuses") or []:
+        state = container.get("state") or {}
+        if state.get("waiting", {}).get("reason") and state["waiting"]["reason"] != "PodInitializing":
+            return f"Init:{state['waiting']['reason']}"
+        if state.get("terminated", {}).get("exitCode"):
+            return f"Init:{state['terminated'].get('reason', 'Error')}"
+    for container in status.get("containerStatuses") or []:
+        state = container.get("state") or {}
+        if state.get("waiting", {}).get("reason"):
+            reason = state["waiting"]["reason"]
+        elif state.get("terminated", {}).get("reason"):
+            reason = state["terminated"]["reason"]
+    return reason
+
+
+def _parse_label_selector(selector: str) -> Dict[str, Tuple[str, str]] | None:
+    """Parse an equality based label selector. Returns None for set based selectors the index cannot answer."""
+
+    labels = {}
+    for term in filter(None, (part.strip() for part in selector.split(","))):
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            labels[key.strip()] = ("!=", value.strip())
+        elif "=" in term:
+            key, value = term.replace("==", "=").split("=", 1)
+            labels[key.strip()] = ("=", value.strip())
+        else:
+            return None
+    return labels
+
+
+def _parse_field_selector(selector: str) -> Dict[str, str] | None:
+    """Parse a field selector. Returns None when it uses fields or operators the index cannot answer."""
+
+    fields = {}
+    for term in filter(None, (part.strip() for part in selector.split(","))):
+        if "!=" in term or "=" not in term:
+            return None
+        key, value = term.replace("==", "=").split("=", 1)
+        if key.strip() not in FIELD_SELECTORS:
+            return None
+        fields[key.strip()] = value.strip()
+    return fields
+
+
+def _discard(index: Dict[Any, Set], value: Any, key: Tuple[str, str]) -> None:
+    keys = index.get(value)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del index[value]
@@ -0,0 +1,79 @@
+# tool_cache.py
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def cache_dir() -> str:
+    """Directory for the assistant's on-disk caches, K8S_ASSISTANT_CACHE_DIR or ~/.cache/k8s-assistant."""
+
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.getenv("K8S_ASSISTANT_CACHE_DIR") or os.path.join(base, "k8s-assistant")
+
+
+def server_fingerprint(server_params) -> str:
+    """
+    Identify a tool server version before it is running.
+    A URL is used as is. For a spawned server the command line and the size and mtime of server.py and
+    the tool modules are hashed, so editing or upgrading the tools invalidates the cached list.
+    None stands for the bundled server.py run by this interpreter.
+    """
+
+    if isinstance(server_params, str):
+        return server_params
+    if server_params is None:
+        parts = [sys.executable, os.path.join(PACKAGE_DIR, "server.py")]
+    else:
+        parts = [server_params.command, *server_params.args]
+    for path in sorted([os.path.join(PACKAGE_DIR, "server.py"), *glob.glob(os.path.join(PACKAGE_DIR, "tools", "*.py"))]):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class ToolListCache:
+    """
+    Tool lists of the servers seen in earlier runs, so the assistant can be ready before its server is.
+    Entries also record the version the server reported, and are refreshed when the live list differs.
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int = 16):
+        self.path = path or os.path.join(cache_dir(), "tools.json")
+        self.max_entries = max_entries
+
+    def get(self, fingerprint: str) -> List[Dict[str, Any]] | None:
+        entry = self._load().get(fingerprint)
+        return entry["tools"] if entry else None
+
+    def put(self, fingerprint: str, server_version: str, tools: List[Dict[str, Any]]) -> None:
+        entries = self._load()
+        entries.pop(fingerprint, None)
+        entries[fingerprint] = {"server_version": server_version, "tools": tools}
+        # Keep only the most recently written servers
+        entries = dict(list(entries.items())[-self.max_entries:])
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write the tool list cache {self.path}: {e}")
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
@@ -0,0 +1,71 @@
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from k8s_assistant import tracing
+from k8s_assistant.tools.Tool import Tool
+from k8s_assistant.tools.health import (
+    DEPLOYMENT_COLUMNS, EVENT_COLUMNS, NODE_COLUMNS, POD_COLUMNS, custom_columns, health_report
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ClusterHealthTool(Tool):
+    """
+    Class to summarize the health of a cluster or namespace in one small report.
+    Pods, nodes, deployments and warning events are read in parallel as narrow custom-columns tables,
+    and aggregated on the server, so the model never reads the raw pod list.
+    """
+
+    def __init__(self, timeout: float = 30):
+        super().__init__("ClusterHealthTool")
+        self.timeout = timeout
+
+    def run(
+        self,
+        namespace: str = "",
+        top: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Report unhealthy pods, restarts, pending pods by node, node conditions, failing rollouts and warning events.
+        """
+
+        scope = ["-n", namespace] if namespace else ["--all-namespaces"]
+        reads = {
+            "pods": ["get", "pods", *scope, "--no-headers", "-o", custom_columns(POD_COLUMNS)],
+            "nodes": ["get", "nodes", "--no-headers", "-o", custom_columns(NODE_COLUMNS)],
+            "deployments": ["get", "deployments", *scope, "--no-headers", "-o", custom_columns(DEPLOYMENT_COLUMNS)],
+            "events": ["get", "events", *scope, "--field-selector=type=Warning", "--no-headers", "-o", custom_columns(EVENT_COLUMNS)],
+        }
+        print(f"Checking cluster health in {namespace or 'all namespaces'}")
+
+        with tracing.span("health.snapshot", namespace=namespace or "*") as span:
+            with ThreadPoolExecutor(max_workers=len(reads)) as pool:
+                outputs = dict(zip(reads, pool.map(self._read, reads.values())))
+            failed = [f"  {kind}: {error}" for kind, (_, error) in outputs.items() if error]
+            if outputs["pods"][1]:
+                return {"error": f"Could not list pods: {outputs['pods'][1]}", "status": "error"}
+
+            report = health_report(*(outputs[kind][0] for kind in reads), top=max(1, min(top, 50)))
+            if span:
+                span.set(pods=len(outputs["pods"][0]), report_bytes=len(report))
+
+        return {
+            "stdout": report,
+            "stderr": "Partial report, these reads failed:\n" + "\n".join(failed) if failed else "",
+            "status": "success",
+        }
+
+    def _read(self, args: List[str]) -> tuple:
+        """
+        Run one kubectl read and return its output lines, or an error.
+        """
+
+        try:
+            result = subprocess.run(["kubectl", *args], capture_output=True, text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return [], f"timed out after {self.timeout:g} seconds"
+        if result.returncode != 0:
+            return [], (result.stderr.strip().splitlines() or [f"kubectl exited with {result.returncode}"])[0]
+        return result.stdout.splitlines(), None
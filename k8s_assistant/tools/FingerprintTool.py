@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import subprocess
+from typing import Any, Dict, Hashable, List
+from k8s_assistant.tools.Tool import Tool
+from k8s_assistant.tools.command import KubectlCommand
+from k8s_assistant.tools.k8s_api import KubeAPIBackend, UnsupportedCommand
+
+logger = logging.getLogger(__name__)
+
+
+class FingerprintTool(Tool):
+    """
+    Class to fingerprint the cluster state that kubectl read commands depend on.
+    Used by the client to check whether a cached answer is still current; it is not offered to the model.
+    """
+
+    def __init__(self, backend: KubeAPIBackend | None = None):
+        super().__init__("FingerprintTool")
+        self.backend = backend
+        if backend is None and os.getenv("K8S_ASSISTANT_BACKEND", "kubectl") == "api":
+            try:
+                self.backend = KubeAPIBackend.from_env()
+            except Exception as e:
+                logger.warning(f"API backend unavailable, fingerprinting with kubectl: {e}")
+
+    def run(
+        self,
+        calls: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """
+        Fingerprint the objects read by each kubectl call, given as {"command": ..., "namespace": ...}.
+        A fingerprint is None when the command's output cannot be tied to object versions.
+        """
+
+        fingerprints = []
+        for call in calls:
+            parsed = KubectlCommand(call.get("command", ""), call.get("namespace") or "default")
+            try:
+                fingerprints.append(self._fingerprint(parsed) if parsed.is_read_only() else None)
+            except Exception as e:
+                logger.debug(f"Could not fingerprint '{parsed.raw}': {e}")
+                fingerprints.append(None)
+
+        return {"fingerprints": fingerprints, "status": "success"}
+
+    def normalize_args(self, calls: List[Dict[str, str]]) -> Hashable | None:
+        # A cached answer is only served while the cluster matches it now, so never reuse a fingerprint
+        return None
+
+    def _fingerprint(self, parsed: KubectlCommand) -> str | None:
+        """
+        Fingerprint with the API backend when enabled, falling back to a metadata-only kubectl get.
+        """
+
+        if self.backend is not None:
+            try:
+                return self.backend.fingerprint(parsed)
+            except UnsupportedCommand as e:
+                logger.debug(f"Falling back to kubectl: {e}")
+
+        if parsed.verb in ("get", "describe"):
+            targets = [([parsed.resource, *parsed.names], not parsed.names)]
+            if parsed.verb == "describe":
+                # The Events section changes without the described objects changing, so their events count as well
+                if parsed.names:
+                    targets += [(["events", f"--field-selector=involvedObject.name={name}"], False) for name in parsed.names]
+                else:
+                    targets.append((["events"], False))
+        elif parsed.verb == "events":
+            targets = [(["events"], False)]
+        else:
+            return None
+
+        versions = []
+        for target, with_selectors in targets:
+            lines = self._versions(parsed, target, with_selectors)
+            if lines is None:
+                return None
+            versions.extend(lines)
+        return hashlib.sha256("\n".join(sorted(versions)).encode()).hexdigest()
+
+    def _versions(self, parsed: KubectlCommand, target: List[str], with_selectors: bool) -> List[str] | None:
+        """
+        List the namespace, name and resourceVersion of the objects of one kubectl get, or None when it failed.
+        """
+
+        argv = ["kubectl", "get", *target, "--no-headers", "-o",
+                "custom-columns=NAMESPACE:.metadata.namespace,NAME:.metadata.name,VERSION:.metadata.resourceVersion"]
+        argv += ["--all-namespaces"] if parsed.namespace == "*" else ["-n", parsed.namespace]
+        for flag in ("--selector", "--field-selector", "--context"):
+            if parsed.flags.get(flag) and (flag == "--context" or with_selectors):
+                argv.append(f"{flag}={parsed.flags[flag]}")
+
+        result = subprocess.run(argv, capture_output=True, text=True, timeout=10)
+        if result.returncode != 0:
+            if "NotFound" not in result.stderr:
+                return None
+            return [f"absent:{' '.join(argv)}"]
+        return result.stdout.splitlines()
@@ -1,6 +1,18 @@
+import logging
+import os
 import subprocess
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List
+from k8s_assistant import tracing
 from k8s_assistant.tools.Tool import Tool
+from k8s_assistant.tools.cache import ResultCache
+from k8s_assistant.tools.capture import bound_text, run_captured
+from k8s_assistant.tools.command import KubectlCommand
+from k8s_assistant.tools.fanout import kube_contexts, merge_results
+from k8s_assistant.tools.k8s_api import KubeAPIBackend, UnsupportedCommand
+from k8s_assistant.tools.prefetch import Prefetcher
+
+logger = logging.getLogger(__name__)
 
 
 class KubectlTool(Tool):
@@ -8,16 +20,59 @@ class KubectlTool(Tool):
     Class to interact with Kubernetes using kubectl.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache: ResultCache | None = None,
+        backend: KubeAPIBackend | None = None,
+        index: Any = None,
+        prefetcher: Prefetcher | None = None,
+        max_output_bytes: int = 32768
+    ):
         super().__init__("KubectlTool")
+        # Read results are cached in process, so repeated lookups in one investigation skip kubectl
+        self.cache = cache if cache is not None else ResultCache()
+        # Optional native API backend for read verbs, enabled with K8S_ASSISTANT_BACKEND=api
+        self.backend = backend
+        if backend is None and os.getenv("K8S_ASSISTANT_BACKEND", "kubectl") == "api":
+            try:
+                self.backend = KubeAPIBackend.from_env()
+            except Exception as e:
+                logger.warning(f"API backend unavailable, using kubectl: {e}")
+        # Optional watch driven index of common kinds, enabled with K8S_ASSISTANT_STATE_INDEX=1
+        self.index = index
+        if index is None and os.getenv("K8S_ASSISTANT_STATE_INDEX") == "1":
+            self.index = self._start_index()
+        # Optional speculative reads of the usual follow ups, e.g. logs of crashing pods, enabled with K8S_ASSISTANT_PREFETCH=1
+        self.prefetcher = prefetcher
+        if prefetcher is None and os.getenv("K8S_ASSISTANT_PREFETCH") == "1":
+            self.prefetcher = Prefetcher(
+                self.cache,
+                self._execute_read,
+                max_workers=int(os.getenv("K8S_ASSISTANT_PREFETCH_WORKERS", "2")),
+                max_pods=int(os.getenv("K8S_ASSISTANT_PREFETCH_PODS", "3"))
+            )
+        # Commands run across several contexts use a pool of their own, and fail fast per context
+        self.fanout_timeout = float(os.getenv("K8S_ASSISTANT_FANOUT_TIMEOUT", "5"))
+        self._fanout_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("K8S_ASSISTANT_FANOUT_CONCURRENCY", "8")),
+            thread_name_prefix="kubectl-fanout"
+        )
+        # Output beyond this size is cut to its head and tail, the rest is spooled to disk for read_output
+        self.output_limits = {
+            "max_bytes": max_output_bytes,
+            "head_bytes": max_output_bytes // 2,
+            "tail_bytes": max_output_bytes // 4,
+        }
     
     def run(
         self,
         command: str, 
-        namespace: str = "default"
+        namespace: str = "default",
+        contexts: List[str] | None = None
     ) -> Dict[str, Any]:
         """
         Execute a kubectl command against the Kubernetes cluster.
+        With contexts, a read-only command runs in each of those kube contexts ("*" for all of them) instead.
         """
         
         forbidden_keywords = ["delete", "apply", "patch", "scale", "edit", "rollout restart", "cordon", "uncordon", "drain"]
@@ -29,27 +84,169 @@ class KubectlTool(Tool):
                 "status": "forbidden"
             }
         
+        if contexts:
+            return self._fan_out(command, namespace, contexts)
+        
         cmd = f"kubectl {command}"
         
-        if namespace and '-n' not in command:
+        parsed = KubectlCommand(command, namespace)
+        # Checked on the parsed flags, as a substring check also matches e.g. "--no-headers"
+        if namespace and "--namespace" not in parsed.flags and "--all-namespaces" not in parsed.flags:
             cmd += f" -n {namespace}"
         print(f"Executing command: {cmd}")
         
-        try:
-            result = subprocess.run(
-                cmd.split(), 
-                capture_output=True, 
-                text=True,
-                check=False,
-                timeout=10  # Timeout after 10 seconds
-            )
+        if not parsed.is_read_only() or parsed.is_streaming():
+            return self._execute(cmd)
+        
+        result = self._read(parsed, cmd)
+        if self.prefetcher is not None:
+            self.prefetcher.observe(parsed, result)
+            logger.debug(f"kubectl prefetch stats: {self.prefetcher.stats()}")
+        return result
+    
+    def normalize_args(
+        self,
+        command: str,
+        namespace: str = "default",
+        contexts: List[str] | None = None
+    ) -> Hashable | None:
+        """
+        Key a call by its normalized command, so "get po -n x -o wide" and "get pods -o wide --namespace=x" match.
+        Only read-only commands that complete are shared.
+        """
+        
+        parsed = KubectlCommand(command, namespace)
+        if not parsed.is_read_only() or parsed.is_streaming():
+            return None
+        return parsed.key(), tuple(sorted(contexts or []))
+    
+    def _read(self, parsed: KubectlCommand, cmd: str, timeout: float = 10) -> Dict[str, Any]:
+        """
+        Serve a read command from the state index, the result cache or the cluster.
+        """
+        
+        with tracing.span("kubectl.read", command=cmd) as span:
+            if self.index is not None:
+                indexed = self.index.query(parsed)
+                if indexed is not None:
+                    if span:
+                        span.set(source="state-index", stdout_bytes=len(indexed["stdout"]))
+                    return self._bound(indexed)
             
+            prefetched = self.prefetcher is not None and self.prefetcher.claim(parsed.key())
+            result, age = self.cache.get_or_compute(
+                parsed.key(),
+                lambda: self._execute_read(parsed, cmd, timeout),
+                kind=parsed.resource or parsed.verb,
+                should_cache=lambda value: value.get("status") == "success"
+            )
+            if span:
+                span.set(cache="hit" if age is not None else "miss", prefetched=prefetched, stdout_bytes=len(result.get("stdout", "")))
+        logger.debug(f"kubectl cache stats: {self.cache.stats()}")
+        
+        if age is not None:
+            # Let the model know this is a recent, cached view of the cluster
+            return {**result, "cached": True, "cache_age_seconds": round(age, 1)}
+        return result
+    
+    def _fan_out(self, command: str, namespace: str, contexts: List[str]) -> Dict[str, Any]:
+        """
+        Run a read-only command in several kube contexts in parallel, and merge the results into one cluster-labelled result.
+        Every context gets its own timeout, so a slow or unreachable cluster is reported without holding up the rest.
+        """
+        
+        parsed = KubectlCommand(command, namespace)
+        if not parsed.is_read_only() or parsed.is_streaming():
             return {
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "status": "success" if result.returncode == 0 else "error",
-                "code": result.returncode
+                "stderr": "Only read-only commands that complete can run across contexts.",
+                "stdout": "",
+                "code": 400,
+                "status": "error"
             }
+        if "*" in contexts:
+            contexts = kube_contexts()
+        contexts = list(dict.fromkeys(contexts))
+        print(f"Executing command: kubectl {command} in {len(contexts)} contexts")
+        
+        def read_in(context: str) -> Dict[str, Any]:
+            in_context = f"{command} --context={context}"
+            parsed_in_context = KubectlCommand(in_context, namespace)
+            cmd = f"kubectl {in_context}"
+            # Same check as in run(), so the command runs in the namespace its cache key records
+            if namespace and "--namespace" not in parsed_in_context.flags and "--all-namespaces" not in parsed_in_context.flags:
+                cmd += f" -n {namespace}"
+            try:
+                return self._read(parsed_in_context, cmd, timeout=self.fanout_timeout)
+            except Exception as e:
+                return {"error": str(e), "status": "exception"}
+        
+        with tracing.span("kubectl.fanout", command=command, contexts=len(contexts)) as span:
+            results = dict(zip(contexts, self._fanout_pool.map(read_in, contexts)))
+            merged = merge_results(results, tabular=parsed.verb in ("get", "top", "events") and parsed.flags.get("--output", "wide") == "wide")
+            if span:
+                span.set(failed=sum(1 for result in results.values() if result.get("status") != "success"))
+        return self._bound(merged)
+    
+    def _start_index(self):
+        """
+        Start the cluster state index on top of the API backend.
+        """
+        
+        from k8s_assistant.state_index import ClusterStateIndex
+        
+        try:
+            backend = self.backend or KubeAPIBackend.from_env()
+            index = ClusterStateIndex(backend)
+            index.start()
+            return index
+        except Exception as e:
+            logger.warning(f"Cluster state index unavailable: {e}")
+            return None
+    
+    def _execute_read(self, parsed: KubectlCommand, cmd: str, timeout: float = 10) -> Dict[str, Any]:
+        """
+        Serve a read command from the API backend when enabled, falling back to kubectl for anything it does not support.
+        """
+        
+        if self.backend is not None:
+            try:
+                with tracing.span("kubectl.api", verb=parsed.verb, resource=parsed.resource):
+                    return self._bound(self.backend.run(parsed))
+            except UnsupportedCommand as e:
+                logger.debug(f"Falling back to kubectl: {e}")
+            except Exception as e:
+                logger.warning(f"API backend failed, falling back to kubectl: {e}")
+        return self._execute(cmd, timeout)
+    
+    def _bound(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply the output cap to a result produced in memory by the API backend or the state index.
+        """
+        
+        output = bound_text(result.get("stdout", ""), **self.output_limits)
+        if output["truncated"] is None:
+            return result
+        return {**result, "stdout": output["text"], "truncated": output["truncated"]}
+    
+    def _execute(self, cmd: str, timeout: float = 10) -> Dict[str, Any]:
+        """
+        Run the kubectl command in a subprocess.
+        """
+        
+        try:
+            # Stream stdout with a byte cap instead of loading huge outputs (logs, -o yaml) into memory
+            with tracing.span("kubectl.subprocess", command=cmd) as span:
+                result = run_captured(
+                    cmd.split(),
+                    timeout=timeout,  # Timeout after 10 seconds by default
+                    **self.output_limits
+                )
+                if span:
+                    span.set(
+                        code=result["code"],
+                        stdout_bytes=result.get("truncated", {}).get("total_bytes", len(result["stdout"]))
+                    )
+                return result
         
         except subprocess.TimeoutExpired:
             return {"error": "Command timed out", "status": "timeout"}
@@ -0,0 +1,161 @@
+import logging
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from k8s_assistant import tracing
+from k8s_assistant.tools.Tool import Tool
+from k8s_assistant.tools.capture import LineStream, bound_text
+from k8s_assistant.tools.logs import LEVELS, LogAnalyzer, summarize
+
+logger = logging.getLogger(__name__)
+
+MAX_PODS = 20
+
+
+class LogTool(Tool):
+    """
+    Class to analyze pod logs on the server, so the model gets a digest of a few KB instead of the raw output.
+    Logs are streamed line by line and never held whole, and the pods are read in parallel.
+    """
+
+    def __init__(self, max_workers: int = 8, max_report_bytes: int = 16384):
+        super().__init__("LogTool")
+        self.max_workers = max_workers
+        # Many pods and containers can still add up to a large report, so it gets the same head/tail cut as kubectl output
+        self.report_limits = {
+            "max_bytes": max_report_bytes,
+            "head_bytes": max_report_bytes // 2,
+            "tail_bytes": max_report_bytes // 4,
+        }
+        # Logs still streaming after this many seconds are cut off, and analyzed as far as they were read
+        self.timeout = float(os.getenv("K8S_ASSISTANT_LOG_TIMEOUT", "20"))
+
+    def run(
+        self,
+        pods: List[str] | None = None,
+        namespace: str = "default",
+        selector: str = "",
+        container: str = "",
+        pattern: str = "",
+        level: str = "",
+        since: str = "",
+        previous: bool = False,
+        max_templates: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Stream the logs of pods, filter them by regex, minimum level and time window,
+        and return repeated lines grouped into templates with counts, plus the first and last error bursts.
+        """
+
+        if level and level.lower() not in LEVELS:
+            return {"error": f"Unknown level '{level}', use one of debug, info, warn, error, fatal", "status": "error"}
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            return {"error": f"Invalid pattern: {e}", "status": "error"}
+
+        pods = list(pods or [])
+        if selector and not pods:
+            pods = self._select(selector, namespace)
+        if not pods:
+            return {"error": "No pods given, or none matched the selector", "status": "error"}
+        if len(pods) > MAX_PODS:
+            logger.info(f"Analyzing the first {MAX_PODS} of {len(pods)} pods")
+            pods = pods[:MAX_PODS]
+
+        options = {
+            "namespace": namespace,
+            "container": container,
+            "since": since,
+            "previous": previous,
+            "pattern": pattern,
+            "min_level": LEVELS[level.lower()] if level else 0,
+        }
+        print(f"Analyzing logs of {len(pods)} pods in {namespace}")
+        with tracing.span("logs.analyze", pods=len(pods)) as span:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pods))) as pool:
+                streams = list(pool.map(lambda pod: self._analyze(pod, **options), pods))
+            analyzers, problems = {}, []
+            for pod, (pod_analyzers, problem) in zip(pods, streams):
+                analyzers.update(pod_analyzers)
+                if problem:
+                    problems.append(f"  {pod}: {problem}")
+            report = summarize(analyzers, max(1, min(max_templates, 100))) if analyzers else ""
+            output = bound_text(report, **self.report_limits)
+            if span:
+                span.set(
+                    lines=sum(analyzer.lines for analyzer in analyzers.values()),
+                    log_bytes=sum(analyzer.bytes for analyzer in analyzers.values()),
+                    report_bytes=len(report),
+                    truncated=output["truncated"] is not None
+                )
+
+        result = {
+            "stdout": output["text"],
+            "stderr": "Problems:\n" + "\n".join(problems) if problems else "",
+            "status": "success" if analyzers else "error",
+        }
+        if output["truncated"] is not None:
+            result["truncated"] = output["truncated"]
+        return result
+
+    def _select(self, selector: str, namespace: str) -> List[str]:
+        """
+        Get the names of the pods matching a label selector.
+        """
+
+        result = subprocess.run(
+            ["kubectl", "get", "pods", "-n", namespace, "-l", selector, "-o", "name"],
+            capture_output=True, text=True, timeout=10
+        )
+        return [line.split("/", 1)[-1] for line in result.stdout.split()] if result.returncode == 0 else []
+
+    def _analyze(
+        self,
+        pod: str,
+        namespace: str,
+        container: str,
+        since: str,
+        previous: bool,
+        pattern: str,
+        min_level: int
+    ) -> tuple:
+        """
+        Stream one pod's logs through analyzers, one per container.
+        Returns the analyzers by source, and a note when the stream failed or was cut off.
+        """
+
+        argv = ["kubectl", "logs", pod, "-n", namespace]
+        if container == "*":
+            argv += ["--all-containers=true", "--prefix=true"]
+        elif container:
+            argv += ["-c", container]
+        if since:
+            argv.append(f"--since={since}")
+        if previous:
+            argv.append("--previous")
+
+        default_source = f"pod/{pod}" + (f"/{container}" if container and container != "*" else "")
+        analyzers: Dict[str, LogAnalyzer] = {}
+        try:
+            with LineStream(argv, timeout=self.timeout) as stream:
+                for line in stream:
+                    source = default_source
+                    # With --prefix every line starts with "[pod/name/container] "
+                    if line.startswith("[pod/"):
+                        prefix, _, line = line.partition("] ")
+                        source = prefix[1:]
+                    analyzer = analyzers.get(source)
+                    if analyzer is None:
+                        analyzer = analyzers[source] = LogAnalyzer(pattern, min_level)
+                    analyzer.feed(line)
+        except Exception as e:
+            return analyzers, str(e)
+
+        if stream.timed_out:
+            return analyzers, f"stopped reading after {self.timeout:g} seconds"
+        if stream.returncode != 0:
+            return analyzers, (stream.stderr.strip().splitlines() or [f"kubectl exited with {stream.returncode}"])[0]
+        return analyzers, None
@@ -0,0 +1,33 @@
+from typing import Any, Dict
+from k8s_assistant.tools.Tool import Tool
+from k8s_assistant.tools.capture import read_spool
+
+
+class OutputTool(Tool):
+    """
+    Class to page through spooled outputs of commands that were truncated.
+    """
+
+    def __init__(self, max_page_bytes: int = 32768):
+        super().__init__("OutputTool")
+        # Same size as the kubectl output cap, so one page never sends more than the truncated output did
+        self.max_page_bytes = max_page_bytes
+    
+    def run(
+        self,
+        spool_id: str,
+        offset: int = 0,
+        limit: int = 200
+    ) -> Dict[str, Any]:
+        """
+        Read more lines of an earlier command output that was truncated.
+        A page ends at limit lines or max_page_bytes, whichever comes first; next_offset is where the next one starts.
+        """
+        
+        limit = max(1, min(limit, 1000))
+        try:
+            page = read_spool(spool_id, max(offset, 0), limit, self.max_page_bytes)
+        except (ValueError, OSError) as e:
+            return {"error": f"Output not available: {e}", "status": "error"}
+        
+        return {**page, "status": "success"}
@@ -0,0 +1,24 @@
+from typing import Any, Dict, Hashable
+from k8s_assistant.tools.Tool import Tool
+from k8s_assistant.tools.cache import get_tool_calls
+
+
+class ServerStatsTool(Tool):
+    """
+    Class to report how the tool server is doing, such as how many tool calls were shared with an identical one.
+    Used by the client for its logs and health report; it is not offered to the model.
+    """
+
+    def __init__(self):
+        super().__init__("ServerStatsTool")
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Get the executed and shared tool calls and the dedup ratios, overall and per tool.
+        """
+
+        return {"dedup": get_tool_calls().stats(), "status": "success"}
+
+    def normalize_args(self) -> Hashable | None:
+        # Always report the current numbers, and keep these calls out of them
+        return None
@@ -1,5 +1,7 @@
+import inspect
+import json
 from abc import abstractmethod
-from typing import Any
+from typing import Any, Hashable
 
 
 class Params:
@@ -37,4 +39,14 @@ class Tool():
         This method should contain the logic to execute the tool's functionality.
         """
         pass
+    
+    def normalize_args(self, *args, **kwargs) -> Hashable | None:
+        """
+        Build a key that is the same for equivalent calls, so the server can share one execution between them.
+        By default these are the arguments with their defaults filled in. Return None for calls that must always run.
+        """
+        
+        bound = inspect.signature(self.run).bind(*args, **kwargs)
+        bound.apply_defaults()
+        return json.dumps(bound.arguments, sort_keys=True, default=str)
     
\ No newline at end of file
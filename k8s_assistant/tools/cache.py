@@ -0,0 +1,262 @@
+import asyncio
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+# Seconds a result stays fresh, per resource kind. Fast moving kinds expire sooner.
+DEFAULT_TTLS = {
+    "events": 5,
+    "logs": 5,
+    "pods": 10,
+    "top": 10,
+    "deployments": 30,
+    "replicasets": 30,
+    "statefulsets": 30,
+    "daemonsets": 30,
+    "services": 60,
+    "nodes": 60,
+    "namespaces": 120,
+    "api-resources": 600,
+    "api-versions": 600,
+    "explain": 3600,
+}
+
+
+class SingleFlight:
+    """
+    Coalesce identical calls that are in flight at the same time.
+    The first caller for a key runs the function, every other caller waits for and shares its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run func for key, unless the same key is already running."""
+
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of executed and shared calls."""
+
+        total = self.executed + self.shared
+        return {
+            "executed": self.executed,
+            "shared": self.shared,
+            "dedup_ratio": round(self.shared / total, 3) if total else 0.0,
+        }
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce identical calls on an event loop, such as the tool calls dispatched by the server.
+    Callers for a key that is in flight share its result. A finished result that passes should_keep is also shared
+    for `window` seconds, to catch a repeat that arrives just after, e.g. from the next turn of an agent loop.
+    Keys are (name, key) pairs, so the stats can be broken down by name.
+    """
+
+    def __init__(self, window: float = 0.0, should_keep: Callable[[Any], bool] = lambda result: True):
+        self.window = window
+        self.should_keep = should_keep
+        self._calls: Dict[Hashable, Tuple[asyncio.Future, float | None]] = {}
+        self.executed = Counter()
+        self.shared = Counter()
+
+    async def do(self, key: Tuple[str, Hashable], func: Callable[[], Awaitable]) -> Tuple[Any, bool, float | None]:
+        """
+        Await func() for key, unless the same key is in flight or just finished.
+        Returns the result, whether it was shared, and for a result that had already finished, its age in seconds.
+        """
+
+        now = time.monotonic()
+        call = self._calls.get(key)
+        if call is not None and (call[1] is None or now < call[1]):
+            self.shared[key[0]] += 1
+            # A kept result expires a window after it finished
+            age = None if call[1] is None else now - (call[1] - self.window)
+            # Shielded, so a caller that gives up does not cancel the call for the others
+            return await asyncio.shield(call[0]), True, age
+
+        self.executed[key[0]] += 1
+        task = asyncio.ensure_future(func())
+        self._calls[key] = (task, None)
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), False, None
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        """Keep a successful result around for the window, and drop failed or expired calls."""
+
+        if self._calls.get(key, (None,))[0] is not task:
+            return
+        if self.window > 0 and not task.cancelled() and task.exception() is None and self.should_keep(task.result()):
+            self._calls[key] = (task, time.monotonic() + self.window)
+        else:
+            del self._calls[key]
+        now = time.monotonic()
+        for stale in [call for call, (_, expires_at) in self._calls.items() if expires_at is not None and expires_at <= now]:
+            del self._calls[stale]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of executed and shared calls, and the dedup ratio, overall and by name."""
+
+        def ratio(executed: int, shared: int) -> float:
+            return round(shared / (executed + shared), 3) if executed + shared else 0.0
+
+        executed, shared = sum(self.executed.values()), sum(self.shared.values())
+        return {
+            "executed": executed,
+            "shared": shared,
+            "dedup_ratio": ratio(executed, shared),
+            "by_name": {
+                name: {"executed": self.executed[name], "shared": self.shared[name], "dedup_ratio": ratio(self.executed[name], self.shared[name])}
+                for name in sorted(set(self.executed) | set(self.shared))
+            },
+        }
+
+
+# Single flight for the tool calls dispatched by the server, shared by all sessions connected to it
+_tool_calls: AsyncSingleFlight | None = None
+
+
+def get_tool_calls() -> AsyncSingleFlight:
+    """Get the server wide single flight for tool calls. Successful results are shared for K8S_ASSISTANT_DEDUP_WINDOW seconds."""
+
+    global _tool_calls
+    if _tool_calls is None:
+        _tool_calls = AsyncSingleFlight(
+            window=float(os.getenv("K8S_ASSISTANT_DEDUP_WINDOW", "5")),
+            should_keep=lambda result: not isinstance(result, dict) or result.get("status") == "success"
+        )
+    return _tool_calls
+
+
+class ResultCache:
+    """
+    Thread safe read-through cache for tool results.
+    Entries expire after a per kind TTL and the least recently used entry is evicted once max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int = 256, ttls: Dict[str, float] | None = None, default_ttl: float = 15):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, kind: str) -> float:
+        """Get the TTL in seconds for a resource kind."""
+        return self.ttls.get(kind, self.default_ttl)
+
+    def get(self, key: Hashable) -> Tuple[Any, float] | None:
+        """Get a fresh value and its age in seconds, or None when missing or expired."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, stored_at, value = entry
+            now = time.monotonic()
+            if now >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, now - stored_at
+
+    def put(self, key: Hashable, value: Any, kind: str = "", ttl: float | None = None) -> None:
+        """Store a value with the TTL of its resource kind, unless a TTL is given."""
+
+        if ttl is None:
+            ttl = self.ttl_for(kind)
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + ttl, now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        kind: str = "",
+        should_cache: Callable[[Any], bool] = lambda value: True,
+        ttl: float | None = None
+    ) -> Tuple[Any, float | None]:
+        """
+        Get the cached value for key, or compute and store it.
+        Concurrent misses for the same key run compute only once.
+        Returns the value and its age in seconds, or None as age when it was just computed.
+        """
+
+        cached = self.get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        with self._lock:
+            self.misses += 1
+
+        def load():
+            value = compute()
+            if should_cache(value):
+                self.put(key, value, kind, ttl)
+            return value
+
+        return self._flight.do(key, load), None
+
+    def invalidate(self) -> None:
+        """Drop all cached entries."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the current size of the cache."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "coalesced": self._flight.shared,
+            }
@@ -0,0 +1,307 @@
+import atexit
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, List
+
+
+# Directory holding the full output of truncated commands, so it can be paged in later
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), f"k8s-assistant-spool-{os.getpid()}")
+MAX_SPOOLS = 32
+
+_spools: "deque[str]" = deque()
+_spool_lock = threading.Lock()
+
+# Spooled outputs can hold whole -o yaml dumps, so nothing is left behind when the server exits
+atexit.register(shutil.rmtree, SPOOL_DIR, ignore_errors=True)
+
+
+class OutputCapture:
+    """
+    Capture a stream of output with bounded memory.
+    Up to max_bytes are kept in memory. Beyond that only the first head_bytes and the last tail_bytes
+    are kept, and the full stream is written to a spool file that can be paged in on request.
+    """
+
+    def __init__(self, max_bytes: int = 32768, head_bytes: int = 16384, tail_bytes: int = 8192):
+        self.max_bytes = max_bytes
+        self.head_bytes = min(head_bytes, max_bytes)
+        self.tail_bytes = tail_bytes
+        self.total_bytes = 0
+        self.total_lines = 0
+        self._buffer = bytearray()
+        self._tail: "deque[bytes]" = deque()
+        self._tail_size = 0
+        self._spool = None
+        self.spool_id = None
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.total_bytes += len(chunk)
+        self.total_lines += chunk.count(b"\n")
+
+        if self._spool is None:
+            self._buffer.extend(chunk)
+            if len(self._buffer) > self.max_bytes:
+                self._start_spool()
+            return
+
+        self._spool.write(chunk)
+        self._tail.append(chunk)
+        self._tail_size += len(chunk)
+        while self._tail and self._tail_size - len(self._tail[0]) >= self.tail_bytes:
+            self._tail_size -= len(self._tail.popleft())
+
+    def finish(self) -> Dict[str, Any]:
+        """Close the spool and return the text to hand to the model, plus truncation stats when it was cut."""
+
+        if self._buffer and not self._buffer.endswith(b"\n"):
+            self.total_lines += 1
+        if self._spool is None:
+            return {"text": self._buffer.decode("utf-8", "replace"), "truncated": None}
+
+        self.close()
+        tail = b"".join(self._tail)[-self.tail_bytes:] if self.tail_bytes else b""
+        head_text = _cut_to_line(self._buffer.decode("utf-8", "replace"), from_start=True)
+        tail_text = _cut_to_line(tail.decode("utf-8", "replace"), from_start=False) if tail else ""
+        head_lines = head_text.count("\n")
+        tail_lines = tail_text.count("\n") + (1 if tail_text and not tail_text.endswith("\n") else 0)
+        omitted_lines = max(self.total_lines - head_lines - tail_lines, 0)
+        omitted_bytes = max(self.total_bytes - len(head_text.encode()) - len(tail_text.encode()), 0)
+
+        marker = (
+            f"\n... [output truncated: {omitted_lines} lines ({omitted_bytes} bytes) omitted. "
+            f"Use the read_output tool with spool_id={self.spool_id} and offset={head_lines} to read them] ...\n"
+        )
+        return {
+            "text": head_text + marker + tail_text,
+            "truncated": {
+                "total_bytes": self.total_bytes,
+                "total_lines": self.total_lines,
+                "omitted_bytes": omitted_bytes,
+                "omitted_lines": omitted_lines,
+                "head_lines": head_lines,
+                "spool_id": self.spool_id,
+            },
+        }
+
+    def close(self) -> None:
+        """Close the spool file, if one was opened. Safe to call more than once."""
+
+        if self._spool is not None and not self._spool.closed:
+            self._spool.close()
+
+    def _start_spool(self) -> None:
+        self.spool_id = uuid.uuid4().hex
+        os.makedirs(SPOOL_DIR, mode=0o700, exist_ok=True)
+        self._spool = open(spool_path(self.spool_id), "wb")
+        self._spool.write(self._buffer)
+        _register_spool(self.spool_id)
+
+        # Keep the head in memory and start the tail window from what was buffered past it
+        rest = bytes(self._buffer[self.head_bytes:])
+        del self._buffer[self.head_bytes:]
+        if self.tail_bytes and rest:
+            self._tail.append(rest[-self.tail_bytes:])
+            self._tail_size = len(self._tail[0])
+
+
+def run_captured(argv: List[str], timeout: float = 10, **limits) -> Dict[str, Any]:
+    """
+    Run a command and stream its stdout through an OutputCapture, so huge outputs never sit in memory whole.
+    Returns the same shape as the kubectl subprocess result, with a 'truncated' entry when the output was cut.
+    """
+
+    process = _start(argv)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        _kill(process)
+
+    timer = threading.Timer(timeout, kill)
+    stderr_chunks = []
+
+    def read_stderr():
+        # Drain stderr so the process never blocks on it, but only keep the first 64KB
+        kept = 0
+        for chunk in iter(lambda: process.stderr.read1(65536), b""):
+            if kept < 65536:
+                stderr_chunks.append(chunk[:65536 - kept])
+                kept += len(stderr_chunks[-1])
+
+    stderr_reader = threading.Thread(target=read_stderr, daemon=True)
+    timer.start()
+    stderr_reader.start()
+
+    capture = OutputCapture(**limits)
+    try:
+        for chunk in iter(lambda: process.stdout.read1(65536), b""):
+            capture.write(chunk)
+        process.wait()
+    finally:
+        timer.cancel()
+        stderr_reader.join(timeout=1)
+        process.stdout.close()
+        process.stderr.close()
+        # finish() closes the spool too, but a timeout or a read error never gets there
+        capture.close()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(argv, timeout)
+
+    output = capture.finish()
+    result = {
+        "stdout": output["text"],
+        "stderr": b"".join(stderr_chunks).decode("utf-8", "replace"),
+        "status": "success" if process.returncode == 0 else "error",
+        "code": process.returncode
+    }
+    if output["truncated"]:
+        result["truncated"] = output["truncated"]
+    return result
+
+
+class LineStream:
+    """
+    Run a command and iterate over its stdout line by line as it arrives, so output can be processed without holding it.
+    The command is killed after timeout seconds; iteration then ends early and timed_out is set.
+    Use as a context manager, then check returncode and stderr.
+    """
+
+    def __init__(self, argv: List[str], timeout: float = 10):
+        self.argv = argv
+        self.timeout = timeout
+        self.timed_out = False
+        self.returncode = None
+        self.stderr = ""
+        self._stderr_chunks = []
+
+    def __enter__(self) -> "LineStream":
+        self._process = _start(self.argv)
+        self._timer = threading.Timer(self.timeout, self._expire)
+        self._stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self._timer.start()
+        self._stderr_reader.start()
+        return self
+
+    def __iter__(self):
+        for line in self._process.stdout:
+            yield line.decode("utf-8", "replace").rstrip("\r\n")
+
+    def __exit__(self, *exc_info) -> None:
+        # Closing stdout stops a command that is still writing, e.g. when the caller stopped reading early
+        self._process.stdout.close()
+        try:
+            self.returncode = self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            _kill(self._process)
+            self.returncode = self._process.wait()
+        self._timer.cancel()
+        self._stderr_reader.join(timeout=1)
+        self._process.stderr.close()
+        self.stderr = b"".join(self._stderr_chunks).decode("utf-8", "replace")
+
+    def _expire(self) -> None:
+        self.timed_out = True
+        _kill(self._process)
+
+    def _read_stderr(self) -> None:
+        # Only keep the first 64KB of stderr
+        kept = 0
+        for chunk in iter(lambda: self._process.stderr.read1(65536), b""):
+            if kept < 65536:
+                self._stderr_chunks.append(chunk[:65536 - kept])
+                kept += len(self._stderr_chunks[-1])
+
+
+def _start(argv: List[str]) -> subprocess.Popen:
+    # On POSIX the command gets its own process group, so a timeout also kills its children,
+    # e.g. exec credential plugins, which would otherwise hold stdout open
+    return subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=os.name == "posix")
+
+
+def _kill(process: subprocess.Popen) -> None:
+    if os.name != "posix":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+
+def bound_text(text: str, **limits) -> Dict[str, Any]:
+    """Apply the same head/tail bound and spooling to output that is already in memory."""
+
+    capture = OutputCapture(**limits)
+    data = text.encode("utf-8", "replace")
+    for start in range(0, len(data), 65536):
+        capture.write(data[start:start + 65536])
+    return capture.finish()
+
+
+def spool_path(spool_id: str) -> str:
+    if not re.fullmatch(r"[0-9a-f]{32}", spool_id or ""):
+        raise ValueError(f"Invalid spool id: {spool_id}")
+    return os.path.join(SPOOL_DIR, spool_id)
+
+
+def read_spool(spool_id: str, offset: int = 0, limit: int = 200, max_bytes: int = 32768) -> Dict[str, Any]:
+    """
+    Read a page of lines from a spooled output, of at most limit lines and max_bytes bytes.
+    A single line longer than max_bytes is cut, and the page then ends after it.
+    """
+
+    lines, size, more, cut = [], 0, False, False
+    with open(spool_path(spool_id), "r", encoding="utf-8", errors="replace") as f:
+        for line in islice(f, offset, None):
+            length = len(line.encode("utf-8", "replace"))
+            if len(lines) >= limit or (lines and size + length > max_bytes):
+                more = True
+                break
+            if length > max_bytes:
+                line = line.encode("utf-8", "replace")[:max_bytes].decode("utf-8", "ignore") + "\n"
+                length, cut = len(line.encode()), True
+            lines.append(line)
+            size += length
+    page = {
+        "text": "".join(lines),
+        "offset": offset,
+        "lines": len(lines),
+        "bytes": size,
+        "next_offset": offset + len(lines) if more else None,
+    }
+    if cut:
+        page["line_truncated"] = f"line {offset} was cut to its first {max_bytes} bytes"
+    return page
+
+
+def _register_spool(spool_id: str) -> None:
+    """Track a new spool file and delete the oldest ones beyond MAX_SPOOLS."""
+
+    with _spool_lock:
+        _spools.append(spool_id)
+        while len(_spools) > MAX_SPOOLS:
+            try:
+                os.remove(spool_path(_spools.popleft()))
+            except OSError:
+                pass
+
+
+def _cut_to_line(text: str, from_start: bool) -> str:
+    """Trim a head to its last full line, or a tail to its first full line."""
+
+    if from_start:
+        cut = text.rfind("\n")
+        return text[:cut + 1] if cut >= 0 else text
+    cut = text.find("\n")
+    return text[cut + 1:] if 0 <= cut < len(text) - 1 else text
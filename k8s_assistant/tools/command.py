@@ -0,0 +1,185 @@
+import os
+import re
+import shlex
+from typing import Any, Dict, List, Tuple
+
+
+# Short resource names and singular forms accepted by kubectl, mapped to their plural name
+RESOURCE_ALIASES = {
+    "po": "pods", "pod": "pods",
+    "ev": "events", "event": "events",
+    "deploy": "deployments", "deployment": "deployments",
+    "rs": "replicasets", "replicaset": "replicasets",
+    "sts": "statefulsets", "statefulset": "statefulsets",
+    "ds": "daemonsets", "daemonset": "daemonsets",
+    "svc": "services", "service": "services",
+    "no": "nodes", "node": "nodes",
+    "ns": "namespaces", "namespace": "namespaces",
+    "cm": "configmaps", "configmap": "configmaps",
+    "secret": "secrets",
+    "ep": "endpoints",
+    "ing": "ingresses", "ingress": "ingresses",
+    "pvc": "persistentvolumeclaims", "persistentvolumeclaim": "persistentvolumeclaims",
+    "pv": "persistentvolumes", "persistentvolume": "persistentvolumes",
+    "sa": "serviceaccounts", "serviceaccount": "serviceaccounts",
+    "job": "jobs",
+    "cj": "cronjobs", "cronjob": "cronjobs",
+    "hpa": "horizontalpodautoscalers", "horizontalpodautoscaler": "horizontalpodautoscalers",
+}
+
+# Flag aliases, so that "-n x" and "--namespace=x" produce the same normalized command
+FLAG_ALIASES = {
+    "-n": "--namespace",
+    "-l": "--selector",
+    "-o": "--output",
+    "-c": "--container",
+    "-A": "--all-namespaces",
+    "-p": "--previous",
+    "-f": "--filename",
+    "-w": "--watch",
+    "-L": "--label-columns",
+}
+
+# Long flags that take the next token as their value when not written as --flag=value
+VALUE_FLAGS = {
+    "--namespace", "--selector", "--output", "--container", "--context", "--field-selector",
+    "--sort-by", "--tail", "--since", "--since-time", "--filename", "--label-columns",
+    "--limit-bytes", "--cluster", "--user", "--kubeconfig", "--chunk-size", "--template",
+}
+
+# Verbs that only read from the cluster
+READ_VERBS = {"get", "describe", "logs", "top", "events", "explain", "api-resources", "api-versions", "version", "cluster-info"}
+
+
+class KubectlCommand:
+    """
+    Parsed form of the command string passed to the kubectl tool.
+    Used to build normalized keys, so equivalent commands can share cached results.
+    """
+
+    def __init__(self, command: str, namespace: str = "default"):
+
+        self.raw = command
+        self.verb = ""
+        self.resource = ""
+        self.names: List[str] = []
+        self.flags: Dict[str, Any] = {}
+
+        try:
+            tokens = shlex.split(command)
+        except ValueError:
+            tokens = command.split()
+
+        positionals = []
+        idx = 0
+        while idx < len(tokens):
+            token = tokens[idx]
+            if token.startswith("-") and token != "-":
+                name, value = token, True
+                if not token.startswith("--") and len(token) > 2 and FLAG_ALIASES.get(token[:2]) in VALUE_FLAGS:
+                    # Short flags with an attached value, e.g. "-owide", "-nkube-system" or "-lapp=web"
+                    name, value = token[:2], token[2:].removeprefix("=")
+                elif "=" in token:
+                    name, value = token.split("=", 1)
+                name = FLAG_ALIASES.get(name, name)
+                if value is True and name in VALUE_FLAGS and idx + 1 < len(tokens):
+                    idx += 1
+                    value = tokens[idx]
+                self.flags[name] = value
+            else:
+                positionals.append(token)
+            idx += 1
+
+        if positionals:
+            self.verb = positionals[0]
+
+        # "top pods", "get pods x y", "get pods/x", "logs pod-x"
+        rest = positionals[1:]
+        if self.verb in ("get", "describe", "top", "explain") and rest:
+            resource = rest[0]
+            if "/" in resource:
+                resource, name = resource.split("/", 1)
+                rest = [name] + rest[1:]
+            else:
+                rest = rest[1:]
+            self.resource = normalize_resource(resource)
+            self.names = rest
+        elif self.verb == "logs":
+            self.resource = "logs"
+            self.names = [name.split("/", 1)[1] if name.startswith(("pod/", "pods/")) else name for name in rest]
+        elif self.verb == "events":
+            self.resource = "events"
+            self.names = rest
+        else:
+            self.names = rest
+
+        if self.flags.get("--all-namespaces"):
+            self.namespace = "*"
+        else:
+            self.namespace = self.flags.get("--namespace") or namespace or "default"
+
+        self.context = self.flags.get("--context") or current_kube_context()
+
+    def is_read_only(self) -> bool:
+        """Check if the command only reads from the cluster."""
+        return self.verb in READ_VERBS
+
+    def is_streaming(self) -> bool:
+        """Check if the command follows or watches, so its output never completes."""
+        return bool(
+            self.flags.get("--watch") or self.flags.get("--follow") or self.flags.get("--watch-only")
+        )
+
+    def key(self) -> Tuple:
+        """Build a normalized key that is identical for equivalent commands."""
+
+        flags = tuple(sorted(
+            (name, str(value)) for name, value in self.flags.items()
+            if name not in ("--namespace", "--all-namespaces", "--context")
+        ))
+        return (self.context, self.namespace, self.verb, self.resource, tuple(self.names), flags)
+
+
+def normalize_resource(resource: str) -> str:
+    """Map a kubectl resource name, alias or singular form to its plural lower case name."""
+
+    resource = resource.lower()
+    if "," in resource:
+        return ",".join(normalize_resource(part) for part in resource.split(","))
+    kind, _, group = resource.partition(".")
+    kind = RESOURCE_ALIASES.get(kind, kind)
+    return f"{kind}.{group}" if group else kind
+
+
+_context_cache: Dict[str, Tuple[float, str]] = {}
+
+
+def current_kube_context() -> str:
+    """
+    Get the current kube context from the kubeconfig file.
+    The file is only read again when it changes, so this is cheap enough to call on every command.
+    """
+
+    paths = os.environ.get("KUBECONFIG") or os.path.join(os.path.expanduser("~"), ".kube", "config")
+    for path in paths.split(os.pathsep):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+
+        cached = _context_cache.get(path)
+        if cached and cached[0] == mtime:
+            context = cached[1]
+        else:
+            context = ""
+            try:
+                with open(path, "r") as f:
+                    match = re.search(r"^current-context:\s*\"?([^\s\"]*)", f.read(), re.MULTILINE)
+                    context = match.group(1) if match else ""
+            except OSError:
+                pass
+            _context_cache[path] = (mtime, context)
+
+        if context:
+            return context
+    return ""
@@ -0,0 +1,53 @@
+import subprocess
+from typing import Any, Dict, List
+
+
+def kube_contexts() -> List[str]:
+    """List the context names in the kubeconfig."""
+
+    result = subprocess.run(
+        ["kubectl", "config", "get-contexts", "-o", "name"],
+        capture_output=True, text=True, timeout=10
+    )
+    return result.stdout.split() if result.returncode == 0 else []
+
+
+def merge_results(results: Dict[str, Dict[str, Any]], tabular: bool) -> Dict[str, Any]:
+    """
+    Merge the results of one command run in several contexts into one result, labelled by context.
+    Tables with the same columns share one header with a leading CONTEXT column; other output gets a section per context.
+    Contexts where nothing was found are listed on one line, and failed ones with their error.
+    """
+
+    outputs, empty, failed = {}, [], []
+    for context, result in results.items():
+        if result.get("status") != "success":
+            error = result.get("error") or result.get("stderr") or result.get("status", "failed")
+            failed.append(f"  {context}: {error.strip().splitlines()[0] if error.strip() else result.get('status')}")
+        elif result.get("stdout", "").strip():
+            outputs[context] = result["stdout"].rstrip("\n").splitlines()
+        else:
+            empty.append(context)
+
+    lines = []
+    headers = {tuple(output[0].split()) for output in outputs.values()}
+    if tabular and len(headers) == 1:
+        width = max(len("CONTEXT"), *(len(context) for context in outputs)) + 3
+        lines.append("CONTEXT".ljust(width) + next(iter(outputs.values()))[0])
+        for context, output in outputs.items():
+            lines.extend(context.ljust(width) + line for line in output[1:])
+    else:
+        for context, output in outputs.items():
+            lines.append(f"--- context: {context} ---")
+            lines.extend(output)
+    if empty:
+        lines.append(f"No resources found in contexts: {', '.join(empty)}")
+
+    succeeded = len(outputs) + len(empty)
+    return {
+        "stdout": "\n".join(lines) + "\n" if lines else "",
+        "stderr": "Failed contexts:\n" + "\n".join(failed) if failed else "",
+        "code": 0 if succeeded else 1,
+        "status": "success" if succeeded else "error",
+        "contexts": {context: result.get("status", "error") for context, result in results.items()},
+    }
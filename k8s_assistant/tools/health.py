@@ -0,0 +1,256 @@
+import heapq
+from array import array
+from collections import Counter
+from itertools import compress
+from typing import Dict, Iterable, List, Tuple
+
+
+# custom-columns specs for the kubectl reads behind the health snapshot. List fields come back comma separated.
+POD_COLUMNS = [
+    ("namespace", ".metadata.namespace"),
+    ("name", ".metadata.name"),
+    ("phase", ".status.phase"),
+    ("node", ".spec.nodeName"),
+    ("reason", ".status.reason"),
+    ("restarts", ".status.containerStatuses[*].restartCount"),
+    ("ready", ".status.containerStatuses[*].ready"),
+    ("waiting", ".status.containerStatuses[*].state.waiting.reason"),
+    ("terminated", ".status.containerStatuses[*].lastState.terminated.reason"),
+]
+
+NODE_COLUMNS = [
+    ("name", ".metadata.name"),
+    ("ready", ".status.conditions[?(@.type==\"Ready\")].status"),
+    ("memory", ".status.conditions[?(@.type==\"MemoryPressure\")].status"),
+    ("disk", ".status.conditions[?(@.type==\"DiskPressure\")].status"),
+    ("pid", ".status.conditions[?(@.type==\"PIDPressure\")].status"),
+    ("unschedulable", ".spec.unschedulable"),
+]
+
+DEPLOYMENT_COLUMNS = [
+    ("namespace", ".metadata.namespace"),
+    ("name", ".metadata.name"),
+    ("replicas", ".spec.replicas"),
+    ("updated", ".status.updatedReplicas"),
+    ("available", ".status.availableReplicas"),
+    ("progressing", ".status.conditions[?(@.type==\"Progressing\")].reason"),
+]
+
+EVENT_COLUMNS = [
+    ("namespace", ".metadata.namespace"),
+    ("reason", ".reason"),
+    ("kind", ".involvedObject.kind"),
+    ("name", ".involvedObject.name"),
+    ("count", ".count"),
+]
+
+NONE = "<none>"
+
+
+def custom_columns(columns: List[Tuple[str, str]]) -> str:
+    return "custom-columns=" + ",".join(f"{name.upper()}:{path}" for name, path in columns)
+
+
+class ColumnarTable:
+    """
+    Rows stored column by column in compact arrays.
+    Integer columns are array('l'); string columns are array('I') codes into a per column table of distinct values,
+    so a 50k row table takes a few hundred KB, and histograms and filters run over the arrays in C.
+    """
+
+    def __init__(self, int_columns: Iterable[str] = (), str_columns: Iterable[str] = ()):
+        self.ints: Dict[str, array] = {name: array("l") for name in int_columns}
+        self.codes: Dict[str, array] = {name: array("I") for name in str_columns}
+        self.values: Dict[str, List[str]] = {name: [] for name in self.codes}
+        self._lookup: Dict[str, Dict[str, int]] = {name: {} for name in self.codes}
+        self.rows = 0
+
+    def append(self, **row) -> None:
+        for name, column in self.ints.items():
+            column.append(row[name])
+        for name, column in self.codes.items():
+            column.append(self.code(name, row[name]))
+        self.rows += 1
+
+    def code(self, column: str, value: str) -> int:
+        """Get the code of a string value, adding it to the column's value table."""
+
+        lookup = self._lookup[column]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.values[column])
+            self.values[column].append(value)
+        return code
+
+    def get(self, column: str, row: int):
+        if column in self.ints:
+            return self.ints[column][row]
+        return self.values[column][self.codes[column][row]]
+
+    def histogram(self, column: str, where: Iterable | None = None) -> Counter:
+        """Count the rows per value of a string column, optionally only the rows selected by a 0/1 mask."""
+
+        codes = self.codes[column] if where is None else compress(self.codes[column], where)
+        values = self.values[column]
+        return Counter({values[code]: count for code, count in Counter(codes).items()})
+
+    def top(self, column: str, n: int, where: Iterable | None = None) -> List[int]:
+        """Get the rows with the n largest values of an integer column."""
+
+        rows = range(self.rows) if where is None else compress(range(self.rows), where)
+        return heapq.nlargest(n, rows, key=self.ints[column].__getitem__)
+
+
+def first_value(field: str) -> str:
+    """Get the first set value of a comma separated custom-columns list field, or an empty string."""
+
+    for value in field.split(","):
+        if value and value != NONE:
+            return value
+    return ""
+
+
+def to_int(field: str) -> int:
+    """Sum a comma separated list of integers, where <none> counts as 0."""
+
+    if field == NONE:
+        return 0
+    if "," not in field:
+        return int(field)
+    return sum(int(value) for value in field.split(",") if value != NONE)
+
+
+def load_pods(lines: Iterable[str]) -> Tuple[ColumnarTable, array]:
+    """
+    Load "kubectl get pods -o custom-columns" rows into a columnar table, and a 0/1 mask of the unhealthy pods.
+    A pod's problem is its eviction reason, else its first waiting reason, else NotReady when running with unready
+    containers, or its phase when it is neither running nor succeeded.
+    """
+
+    pods = ColumnarTable(["restarts"], ["namespace", "name", "phase", "node", "problem", "terminated"])
+    unhealthy = array("b")
+    for line in lines:
+        fields = line.split()
+        if len(fields) != len(POD_COLUMNS):
+            continue
+        namespace, name, phase, node, reason, restarts, ready, waiting, terminated = fields
+        problem = (reason if reason != NONE else "") or first_value(waiting)
+        if not problem and phase == "Running" and "false" in ready:
+            problem = "NotReady"
+        elif not problem and phase not in ("Running", "Succeeded"):
+            problem = phase
+        pods.append(
+            restarts=to_int(restarts),
+            namespace=namespace,
+            name=name,
+            phase=phase,
+            node=node if node != NONE else "<unscheduled>",
+            problem=problem,
+            terminated=first_value(terminated)
+        )
+        unhealthy.append(1 if problem else 0)
+    return pods, unhealthy
+
+
+def rows(lines: Iterable[str], columns: List[Tuple[str, str]]) -> Iterable[Dict[str, str]]:
+    """Parse custom-columns rows into dicts, skipping malformed ones."""
+
+    names = [name for name, _ in columns]
+    for line in lines:
+        fields = line.split()
+        if len(fields) == len(names):
+            yield dict(zip(names, fields))
+
+
+def format_counts(counter: Counter, limit: int = 8) -> str:
+    return ", ".join(f"{value} {count}" for value, count in counter.most_common(limit)) or "none"
+
+
+def health_report(
+    pod_lines: Iterable[str],
+    node_lines: Iterable[str],
+    deployment_lines: Iterable[str],
+    event_lines: Iterable[str],
+    top: int = 10
+) -> str:
+    """Aggregate pods, nodes, deployments and warning events into a short report, worst first."""
+
+    pods, unhealthy = load_pods(pod_lines)
+    nodes = list(rows(node_lines, NODE_COLUMNS))
+    deployments = list(rows(deployment_lines, DEPLOYMENT_COLUMNS))
+    events = list(rows(event_lines, EVENT_COLUMNS))
+
+    not_ready = [node["name"] for node in nodes if node["ready"] != "True"]
+    pressure = [
+        f"{node['name']} ({', '.join(kind for kind in ('memory', 'disk', 'pid') if node[kind] == 'True')})"
+        for node in nodes if "True" in (node["memory"], node["disk"], node["pid"])
+    ]
+    cordoned = [node["name"] for node in nodes if node["unschedulable"] == "true"]
+
+    failing = []
+    for deployment in deployments:
+        replicas = to_int(deployment["replicas"])
+        updated, available = to_int(deployment["updated"]), to_int(deployment["available"])
+        stalled = deployment["progressing"] == "ProgressDeadlineExceeded"
+        if stalled or updated < replicas or available < replicas:
+            failing.append((replicas - available, deployment, updated, available, replicas))
+    failing.sort(key=lambda item: -item[0])
+
+    unhealthy_count = sum(unhealthy)
+    lines = [
+        f"Cluster health: {pods.rows} pods in {len(pods.values['namespace'])} namespaces, {len(nodes)} nodes. "
+        f"{unhealthy_count} unhealthy pods, {len(not_ready)} nodes not ready, {len(failing)} failing rollouts, "
+        f"{sum(to_int(event['count']) or 1 for event in events)} warning events."
+    ]
+
+    lines.append(f"\nPod phases: {format_counts(pods.histogram('phase'))}")
+    problems = pods.histogram("problem", unhealthy)
+    problems.pop("", None)
+    lines.append(f"Pod problems: {format_counts(problems)}")
+    terminations = pods.histogram("terminated")
+    terminations.pop("", None)
+    if terminations:
+        lines.append(f"Last termination reasons: {format_counts(terminations)}")
+    if unhealthy_count:
+        lines.append(f"Unhealthy pods by namespace: {format_counts(pods.histogram('namespace', unhealthy))}")
+        pending = pods.histogram("node", map(pods.code("phase", "Pending").__eq__, pods.codes["phase"]))
+        if pending:
+            lines.append(f"Pending pods by node: {format_counts(pending)}")
+
+    restarted = pods.top("restarts", top, map(bool, pods.ints["restarts"]))
+    if restarted:
+        lines.append("\nMost restarted pods:")
+        for row in restarted:
+            lines.append(
+                f"  {pods.get('namespace', row)}/{pods.get('name', row)}  restarts={pods.get('restarts', row)}  "
+                f"{pods.get('problem', row) or pods.get('phase', row)}  last={pods.get('terminated', row) or '-'}  node={pods.get('node', row)}"
+            )
+
+    if not_ready or pressure or cordoned:
+        lines.append("\nNodes:")
+        if not_ready:
+            lines.append(f"  Not ready: {', '.join(not_ready[:top])}" + (f" and {len(not_ready) - top} more" if len(not_ready) > top else ""))
+        if pressure:
+            lines.append(f"  Under pressure: {', '.join(pressure[:top])}")
+        if cordoned:
+            lines.append(f"  Cordoned: {', '.join(cordoned[:top])}")
+
+    if failing:
+        lines.append("\nFailing rollouts:")
+        for _, deployment, updated, available, replicas in failing[:top]:
+            reason = deployment["progressing"] if deployment["progressing"] != NONE else ""
+            lines.append(
+                f"  {deployment['namespace']}/{deployment['name']}  updated {updated}/{replicas}, available {available}/{replicas}  {reason}".rstrip()
+            )
+
+    if events:
+        by_reason, by_object = Counter(), Counter()
+        for event in events:
+            count = to_int(event["count"]) or 1
+            by_reason[event["reason"]] += count
+            by_object[f"{event['kind']} {event['namespace']}/{event['name']} ({event['reason']})"] += count
+        lines.append(f"\nWarning events by reason: {format_counts(by_reason)}")
+        lines.append("Noisiest objects:")
+        lines.extend(f"  {name} x{count}" for name, count in by_object.most_common(top))
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,614 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+import httpx
+from k8s_assistant.tools.command import KubectlCommand, current_kube_context
+
+logger = logging.getLogger(__name__)
+
+METADATA_ACCEPT = "application/json;as=PartialObjectMetadataList;v=v1;g=meta.k8s.io,application/json;as=PartialObjectMetadata;v=v1;g=meta.k8s.io,application/json"
+TABLE_ACCEPT = "application/json;as=Table;v=v1;g=meta.k8s.io,application/json;as=Table;v=v1beta1;g=meta.k8s.io,application/json"
+
+# Flags the API backend understands, anything else is served by the kubectl subprocess
+SUPPORTED_FLAGS = {
+    "get": {"--namespace", "--all-namespaces", "--selector", "--field-selector", "--output", "--context"},
+    "describe": {"--namespace", "--context"},
+    "logs": {"--namespace", "--container", "--tail", "--previous", "--since", "--timestamps", "--context", "--limit-bytes"},
+    "top": {"--namespace", "--all-namespaces", "--selector", "--context"},
+    "events": {"--namespace", "--all-namespaces", "--context"},
+}
+
+
+class UnsupportedCommand(Exception):
+    """Raised when a command cannot be served by the API backend and must fall back to kubectl."""
+    pass
+
+
+class KubeAPIBackend:
+    """
+    Serve read-only kubectl verbs directly over the Kubernetes HTTP API.
+    The kubeconfig is parsed once and requests reuse a pool of keep-alive connections,
+    so there is no process spawn, discovery or TLS handshake per command.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        token: str | None = None,
+        verify: Any = True,
+        cert: Tuple[str, str] | None = None,
+        context: str = "",
+        timeout: float = 10
+    ):
+        self.server = server.rstrip("/")
+        self.context = context
+        headers = {"User-Agent": "k8s-assistant"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self.http = httpx.Client(
+            base_url=self.server,
+            headers=headers,
+            verify=verify,
+            cert=cert,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120)
+        )
+        self._resources: Dict[str, Dict[str, Any]] = {}
+        self._discovered_groups = False
+        self._discovery_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "KubeAPIBackend":
+        """
+        Build a backend from K8S_ASSISTANT_API_SERVER (e.g. a kubectl proxy or a local fake API server),
+        or from the active kubeconfig when it is not set.
+        """
+
+        server = os.getenv("K8S_ASSISTANT_API_SERVER")
+        if server:
+            return cls(server, token=os.getenv("K8S_ASSISTANT_API_TOKEN"), context=current_kube_context())
+        return cls.from_kubeconfig()
+
+    @classmethod
+    def from_kubeconfig(cls, context: str | None = None) -> "KubeAPIBackend":
+        """
+        Build a backend from the active kubeconfig.
+        kubectl is asked once for the merged, flattened config, which handles KUBECONFIG lists the same way kubectl does.
+        """
+
+        output = subprocess.run(
+            ["kubectl", "config", "view", "--raw", "--flatten", "-o", "json"],
+            capture_output=True, text=True, check=True, timeout=10
+        ).stdout
+        config = json.loads(output)
+
+        context_name = context or config.get("current-context", "")
+        contexts = {item["name"]: item.get("context", {}) for item in config.get("contexts") or []}
+        clusters = {item["name"]: item.get("cluster", {}) for item in config.get("clusters") or []}
+        users = {item["name"]: item.get("user", {}) for item in config.get("users") or []}
+        if context_name not in contexts:
+            raise ValueError(f"Context '{context_name}' not found in kubeconfig")
+
+        cluster = clusters.get(contexts[context_name].get("cluster"), {})
+        user = users.get(contexts[context_name].get("user"), {})
+        if "exec" in user or "auth-provider" in user:
+            raise ValueError("Exec and auth-provider credentials are only supported through kubectl")
+
+        token = user.get("token")
+        if not token and user.get("tokenFile"):
+            with open(user["tokenFile"], "r") as f:
+                token = f.read().strip()
+
+        return cls(cluster["server"], token=token, verify=_ssl_context(cluster, user), context=context_name)
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.http.close()
+
+    def run(self, parsed: KubectlCommand) -> Dict[str, Any]:
+        """
+        Execute a parsed kubectl command and return it in the same shape as the kubectl subprocess result.
+        Raises UnsupportedCommand for anything this backend does not serve.
+        """
+
+        supported = SUPPORTED_FLAGS.get(parsed.verb)
+        if supported is None:
+            raise UnsupportedCommand(f"verb '{parsed.verb}' is not served by the API backend")
+        unsupported = set(parsed.flags) - supported
+        if unsupported:
+            raise UnsupportedCommand(f"flags {sorted(unsupported)} are not served by the API backend")
+        self._check_context(parsed)
+
+        try:
+            if parsed.verb == "get":
+                stdout = self._get(parsed)
+            elif parsed.verb == "describe":
+                stdout = self._describe(parsed)
+            elif parsed.verb == "logs":
+                stdout = self._logs(parsed)
+            elif parsed.verb == "top":
+                stdout = self._top(parsed)
+            else:
+                stdout = self._events(parsed)
+        except ApiError as e:
+            return {"stdout": "", "stderr": str(e), "status": "error", "code": 1}
+
+        if not stdout and parsed.verb in ("get", "top", "events"):
+            where = "" if parsed.namespace == "*" else f" in {parsed.namespace} namespace"
+            return {"stdout": "", "stderr": f"No resources found{where}.\n", "status": "success", "code": 0}
+        return {"stdout": stdout, "stderr": "", "status": "success", "code": 0}
+
+    def fingerprint(self, parsed: KubectlCommand) -> str | None:
+        """
+        Hash the names and resourceVersions of the objects a read command depends on, fetching metadata only.
+        The hash changes when any of them is created, changed or deleted. Returns None for commands whose output
+        changes without any object changing (logs, top), so answers built on them are never treated as current.
+        """
+
+        self._check_context(parsed)
+        if parsed.verb in ("get", "describe"):
+            info = self.resource_info(parsed.resource)
+            if parsed.names:
+                paths = [(self._path(info, parsed.namespace, name), None) for name in parsed.names]
+            else:
+                paths = [(self._path(info, parsed.namespace), self._selectors(parsed))]
+            if parsed.verb == "describe":
+                # The Events section changes without the described objects changing, so their events count as well
+                events = "/api/v1/events" if parsed.namespace == "*" or not info["namespaced"] else f"/api/v1/namespaces/{parsed.namespace}/events"
+                if parsed.names:
+                    paths += [(events, {"fieldSelector": f"involvedObject.name={name}"}) for name in parsed.names]
+                else:
+                    paths.append((events, None))
+        elif parsed.verb == "events":
+            paths = [("/api/v1/events" if parsed.namespace == "*" else f"/api/v1/namespaces/{parsed.namespace}/events", None)]
+        else:
+            return None
+
+        versions = []
+        for path, params in paths:
+            try:
+                body = self._request(path, params=params, accept=METADATA_ACCEPT).json()
+            except ApiError as e:
+                if e.status != 404:
+                    raise
+                versions.append(f"{path}:absent")
+                continue
+            for item in body.get("items", [body]):
+                metadata = item.get("metadata", {})
+                versions.append(f"{metadata.get('namespace', '')}/{metadata.get('name', '')}:{metadata.get('resourceVersion', '')}")
+        return hashlib.sha256("\n".join(sorted(versions)).encode()).hexdigest()
+
+    def _check_context(self, parsed: KubectlCommand) -> None:
+        """
+        Refuse commands for any context but the one this backend was built for.
+        parsed.context is the --context flag or else the current kubeconfig context, so this also catches a
+        'kubectl config use-context' made after the backend was built.
+        """
+
+        if parsed.context != self.context:
+            raise UnsupportedCommand(f"command targets context '{parsed.context}', not '{self.context}'")
+
+    # Discovery
+
+    def resource_info(self, resource: str) -> Dict[str, Any]:
+        """Resolve a resource name to its API path prefix, kind and scope. Discovery runs once per backend."""
+
+        resource = resource.lower()
+        with self._discovery_lock:
+            if not self._resources:
+                self._discover("/api/v1", "v1")
+            if resource not in self._resources and not self._discovered_groups:
+                self._discovered_groups = True
+                groups = self._request("/apis").json().get("groups", [])
+                for group in groups:
+                    version = group.get("preferredVersion", {}).get("groupVersion")
+                    if version:
+                        try:
+                            self._discover(f"/apis/{version}", version)
+                        except ApiError as e:
+                            logger.debug(f"Skipping API group {version}: {e}")
+
+        if "," in resource or resource not in self._resources:
+            raise UnsupportedCommand(f"resource '{resource}' is not known to the API backend")
+        return self._resources[resource]
+
+    def _discover(self, prefix: str, group_version: str) -> None:
+        """Register all resources of one API group version under their plural, singular and short names."""
+
+        group = group_version.split("/")[0] if "/" in group_version else ""
+        for item in self._request(prefix).json().get("resources", []):
+            if "/" in item["name"] or "get" not in item.get("verbs", []):
+                continue
+            info = {"prefix": prefix, "name": item["name"], "kind": item["kind"], "namespaced": item["namespaced"]}
+            names = [item["name"], item.get("singularName") or item["kind"].lower(), *item.get("shortNames", [])]
+            for name in names:
+                self._resources.setdefault(name, info)
+                if group:
+                    self._resources.setdefault(f"{name}.{group}", info)
+
+    # Verbs
+
+    def _get(self, parsed: KubectlCommand) -> str:
+        output = parsed.flags.get("--output", "")
+        if output not in ("", "wide", "json", "name"):
+            raise UnsupportedCommand(f"output format '{output}' is not served by the API backend")
+        if len(parsed.names) > 1:
+            raise UnsupportedCommand("multiple names are not served by the API backend")
+
+        info = self.resource_info(parsed.resource)
+        path = self._path(info, parsed.namespace, parsed.names[0] if parsed.names else None)
+        params = self._selectors(parsed)
+
+        if output == "json":
+            return json.dumps(self._request(path, params=params).json(), indent=4) + "\n"
+        if output == "name":
+            body = self._request(path, params=params).json()
+            items = body.get("items", [body])
+            return "".join(f"{info['kind'].lower()}/{item['metadata']['name']}\n" for item in items)
+
+        table = self._request(path, params=params, accept=TABLE_ACCEPT).json()
+        return render_table(table, wide=output == "wide", with_namespace=parsed.namespace == "*")
+
+    def _describe(self, parsed: KubectlCommand) -> str:
+        info = self.resource_info(parsed.resource)
+        if parsed.names:
+            objects = [self._request(self._path(info, parsed.namespace, name)).json() for name in parsed.names]
+        else:
+            objects = self._request(self._path(info, parsed.namespace), params=self._selectors(parsed)).json().get("items", [])
+
+        sections = []
+        for obj in objects:
+            metadata = obj.get("metadata", {})
+            lines = [f"Name:         {metadata.get('name', '')}"]
+            if metadata.get("namespace"):
+                lines.append(f"Namespace:    {metadata['namespace']}")
+            lines.append(f"Labels:       {_format_map(metadata.get('labels'))}")
+            annotations = {
+                key: value for key, value in (metadata.get("annotations") or {}).items()
+                if key != "kubectl.kubernetes.io/last-applied-configuration"
+            }
+            lines.append(f"Annotations:  {_format_map(annotations)}")
+            lines.append(f"Created:      {metadata.get('creationTimestamp', '')}")
+            for field in ("spec", "status", "data"):
+                if obj.get(field):
+                    lines.append(f"{field.capitalize()}:")
+                    lines.extend(_describe_value(obj[field], 1))
+
+            events = self._object_events(obj)
+            lines.append("Events:" + ("" if events else "       <none>"))
+            if events:
+                lines.append(_indent(events))
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections) + ("\n" if sections else "")
+
+    def _logs(self, parsed: KubectlCommand) -> str:
+        if len(parsed.names) != 1 or "/" in parsed.names[0]:
+            raise UnsupportedCommand("only 'logs <pod>' is served by the API backend")
+
+        params = {}
+        if parsed.flags.get("--container"):
+            params["container"] = parsed.flags["--container"]
+        if parsed.flags.get("--tail"):
+            params["tailLines"] = parsed.flags["--tail"]
+        if parsed.flags.get("--previous"):
+            params["previous"] = "true"
+        if parsed.flags.get("--timestamps"):
+            params["timestamps"] = "true"
+        if parsed.flags.get("--limit-bytes"):
+            params["limitBytes"] = parsed.flags["--limit-bytes"]
+        if parsed.flags.get("--since"):
+            params["sinceSeconds"] = str(_parse_duration(parsed.flags["--since"]))
+
+        namespace = "default" if parsed.namespace == "*" else parsed.namespace
+        return self._request(f"/api/v1/namespaces/{namespace}/pods/{parsed.names[0]}/log", params=params).text
+
+    def _top(self, parsed: KubectlCommand) -> str:
+        if parsed.resource not in ("pods", "nodes"):
+            raise UnsupportedCommand("only 'top pods' and 'top nodes' are served by the API backend")
+
+        params = self._selectors(parsed)
+        if parsed.resource == "nodes":
+            metrics = self._request("/apis/metrics.k8s.io/v1beta1/nodes", params=params).json().get("items", [])
+            nodes = {
+                node["metadata"]["name"]: node.get("status", {}).get("allocatable", {})
+                for node in self._request("/api/v1/nodes").json().get("items", [])
+            }
+            rows = []
+            for item in metrics:
+                if parsed.names and item["metadata"]["name"] not in parsed.names:
+                    continue
+                cpu = _parse_cpu(item["usage"]["cpu"])
+                memory = _parse_memory(item["usage"]["memory"])
+                allocatable = nodes.get(item["metadata"]["name"], {})
+                cpu_total = _parse_cpu(allocatable.get("cpu", "0"))
+                memory_total = _parse_memory(allocatable.get("memory", "0"))
+                rows.append([
+                    item["metadata"]["name"],
+                    f"{int(cpu * 1000)}m",
+                    f"{int(cpu * 100 / cpu_total)}%" if cpu_total else "<unknown>",
+                    f"{int(memory / 2**20)}Mi",
+                    f"{int(memory * 100 / memory_total)}%" if memory_total else "<unknown>",
+                ])
+            return format_rows(["NAME", "CPU(cores)", "CPU%", "MEMORY(bytes)", "MEMORY%"], rows)
+
+        path = "/apis/metrics.k8s.io/v1beta1/pods" if parsed.namespace == "*" else f"/apis/metrics.k8s.io/v1beta1/namespaces/{parsed.namespace}/pods"
+        rows = []
+        for item in self._request(path, params=params).json().get("items", []):
+            if parsed.names and item["metadata"]["name"] not in parsed.names:
+                continue
+            cpu = sum(_parse_cpu(c["usage"]["cpu"]) for c in item.get("containers", []))
+            memory = sum(_parse_memory(c["usage"]["memory"]) for c in item.get("containers", []))
+            row = [item["metadata"]["name"], f"{int(cpu * 1000)}m", f"{int(memory / 2**20)}Mi"]
+            if parsed.namespace == "*":
+                row.insert(0, item["metadata"]["namespace"])
+            rows.append(row)
+        header = ["NAME", "CPU(cores)", "MEMORY(bytes)"]
+        if parsed.namespace == "*":
+            header.insert(0, "NAMESPACE")
+        return format_rows(header, rows)
+
+    def _events(self, parsed: KubectlCommand) -> str:
+        path = "/api/v1/events" if parsed.namespace == "*" else f"/api/v1/namespaces/{parsed.namespace}/events"
+        items = self._request(path).json().get("items", [])
+        return render_events(items, with_namespace=parsed.namespace == "*")
+
+    def _object_events(self, obj: Dict[str, Any]) -> str:
+        metadata = obj.get("metadata", {})
+        namespace = metadata.get("namespace")
+        path = f"/api/v1/namespaces/{namespace}/events" if namespace else "/api/v1/events"
+        params = {"fieldSelector": f"involvedObject.name={metadata.get('name')},involvedObject.kind={obj.get('kind', '')}"}
+        try:
+            items = self._request(path, params=params).json().get("items", [])
+        except ApiError:
+            return ""
+        return render_events(items, with_object=False)
+
+    # HTTP helpers
+
+    def _path(self, info: Dict[str, Any], namespace: str, name: str | None = None) -> str:
+        path = info["prefix"]
+        if info["namespaced"] and namespace != "*":
+            path += f"/namespaces/{namespace}"
+        path += f"/{info['name']}"
+        if name:
+            path += f"/{name}"
+        return path
+
+    def _selectors(self, parsed: KubectlCommand) -> Dict[str, str]:
+        params = {}
+        if parsed.flags.get("--selector"):
+            params["labelSelector"] = parsed.flags["--selector"]
+        if parsed.flags.get("--field-selector"):
+            params["fieldSelector"] = parsed.flags["--field-selector"]
+        return params
+
+    def _request(self, path: str, params: Dict[str, str] | None = None, accept: str = "application/json") -> httpx.Response:
+        response = self.http.get(path, params=params, headers={"Accept": accept})
+        if response.status_code >= 400:
+            raise ApiError.from_response(response)
+        return response
+
+
+class ApiError(Exception):
+    """Error returned by the API server, formatted like the kubectl error message."""
+
+    def __init__(self, message: str, status: int = 0):
+        super().__init__(message)
+        self.status = status
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "ApiError":
+        try:
+            status = response.json()
+            return cls(f"Error from server ({status.get('reason', response.reason_phrase)}): {status.get('message', '')}", response.status_code)
+        except ValueError:
+            return cls(f"Error from server ({response.reason_phrase}): {response.text.strip()}", response.status_code)
+
+
+def render_table(table: Dict[str, Any], wide: bool = False, with_namespace: bool = False) -> str:
+    """Render a meta.k8s.io Table response the way kubectl prints it."""
+
+    columns = [
+        (idx, column) for idx, column in enumerate(table.get("columnDefinitions", []))
+        if wide or column.get("priority", 0) == 0
+    ]
+    header = [column["name"].upper() for _, column in columns]
+    if with_namespace:
+        header.insert(0, "NAMESPACE")
+
+    rows = []
+    for row in table.get("rows", []):
+        cells = []
+        for idx, column in columns:
+            value = row["cells"][idx] if idx < len(row["cells"]) else ""
+            if column.get("type") == "date":
+                value = human_age(value)
+            cells.append("<none>" if value is None else str(value))
+        if with_namespace:
+            cells.insert(0, ((row.get("object") or {}).get("metadata") or {}).get("namespace", ""))
+        rows.append(cells)
+
+    if not rows:
+        return ""
+    return format_rows(header, rows)
+
+
+def render_events(items: List[Dict[str, Any]], with_namespace: bool = False, with_object: bool = True) -> str:
+    """Render core/v1 events as a LAST SEEN / TYPE / REASON / OBJECT / MESSAGE table, oldest first."""
+
+    def last_seen(event):
+        return event.get("lastTimestamp") or event.get("eventTime") or event.get("metadata", {}).get("creationTimestamp") or ""
+
+    rows = []
+    for event in sorted(items, key=last_seen):
+        involved = event.get("involvedObject", {})
+        row = [human_age(last_seen(event)), event.get("type", ""), event.get("reason", "")]
+        if with_object:
+            row.append(f"{involved.get('kind', '').lower()}/{involved.get('name', '')}")
+        row.append(" ".join((event.get("message") or "").split()))
+        if with_namespace:
+            row.insert(0, event.get("metadata", {}).get("namespace", ""))
+        rows.append(row)
+
+    if not rows:
+        return ""
+    header = ["LAST SEEN", "TYPE", "REASON"] + (["OBJECT"] if with_object else []) + ["MESSAGE"]
+    if with_namespace:
+        header.insert(0, "NAMESPACE")
+    return format_rows(header, rows)
+
+
+def human_age(timestamp: Any) -> str:
+    """Convert an RFC3339 timestamp to the short age format kubectl uses (e.g. 5m, 3h20m, 12d)."""
+
+    if not timestamp or not isinstance(timestamp, str):
+        return "<unknown>"
+    try:
+        then = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return timestamp
+    seconds = int((datetime.now(timezone.utc) - then).total_seconds())
+    if seconds < 0:
+        return "<invalid>"
+    minutes, hours, days = seconds // 60, seconds // 3600, seconds // 86400
+    if seconds < 120:
+        return f"{seconds}s"
+    if minutes < 10:
+        return f"{minutes}m{seconds % 60}s" if seconds % 60 else f"{minutes}m"
+    if minutes < 180:
+        return f"{minutes}m"
+    if hours < 8:
+        return f"{hours}h{minutes % 60}m" if minutes % 60 else f"{hours}h"
+    if hours < 48:
+        return f"{hours}h"
+    if hours < 24 * 8:
+        return f"{days}d{hours % 24}h" if hours % 24 else f"{days}d"
+    if days < 365 * 2:
+        return f"{days}d"
+    if days < 365 * 8:
+        return f"{days // 365}y{days % 365}d" if days % 365 else f"{days // 365}y"
+    return f"{days // 365}y"
+
+
+def format_rows(header: List[str], rows: List[List[str]]) -> str:
+    widths = [max(len(str(row[idx])) for row in [header, *rows]) for idx in range(len(header))]
+    lines = []
+    for row in [header, *rows]:
+        lines.append("   ".join(str(cell).ljust(widths[idx]) for idx, cell in enumerate(row)).rstrip())
+    return "\n".join(lines) + "\n"
+
+
+def _format_map(values: Dict[str, str] | None) -> str:
+    if not values:
+        return "<none>"
+    return "\n              ".join(f"{key}={value}" for key, value in values.items())
+
+
+def _describe_value(value: Any, depth: int) -> List[str]:
+    pad = "  " * depth
+    lines = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f"{pad}{key}:")
+                lines.extend(_describe_value(item, depth + 1))
+            else:
+                lines.append(f"{pad}{key}: {item if item not in (None, '', [], {}) else '<none>'}")
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                nested = _describe_value(item, depth + 1)
+                if nested:
+                    lines.append(f"{pad}- {nested[0].strip()}")
+                    lines.extend(nested[1:])
+            else:
+                lines.append(f"{pad}- {item}")
+    else:
+        lines.append(f"{pad}{value}")
+    return lines
+
+
+def _indent(text: str) -> str:
+    return "\n".join(f"  {line}" for line in text.rstrip("\n").split("\n"))
+
+
+def _parse_cpu(value: str) -> float:
+    """Parse a CPU quantity (e.g. 250m, 1, 12345n) into cores."""
+
+    units = {"n": 1e-9, "u": 1e-6, "m": 1e-3}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value or 0)
+
+
+def _parse_memory(value: str) -> float:
+    """Parse a memory quantity (e.g. 128Mi, 1Gi, 1000k) into bytes."""
+
+    units = {
+        "Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40,
+        "k": 10**3, "M": 10**6, "G": 10**9, "T": 10**12,
+    }
+    for suffix in sorted(units, key=len, reverse=True):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * units[suffix]
+    return float(value or 0)
+
+
+def _parse_duration(value: str) -> int:
+    """Parse a kubectl duration (e.g. 1h, 30m, 1h30m, 45s) into seconds."""
+
+    seconds, number = 0, ""
+    for char in value:
+        if char.isdigit():
+            number += char
+        elif char in "hms" and number:
+            seconds += int(number) * {"h": 3600, "m": 60, "s": 1}[char]
+            number = ""
+        else:
+            raise UnsupportedCommand(f"duration '{value}' is not served by the API backend")
+    return seconds + int(number or 0)
+
+
+def _ssl_context(cluster: Dict[str, Any], user: Dict[str, Any]) -> ssl.SSLContext:
+    """
+    Build the TLS context for a kubeconfig cluster and user.
+    CA data is loaded from memory. ssl only loads client certificates from disk, so inline ones are written to a
+    private temp directory that is removed as soon as they are loaded, and no copy of the key outlives this call.
+    """
+
+    # Like kubectl, a cluster CA replaces the system trust store rather than adding to it
+    if cluster.get("certificate-authority-data"):
+        context = ssl.create_default_context(cadata=base64.b64decode(cluster["certificate-authority-data"]).decode())
+    elif cluster.get("certificate-authority"):
+        context = ssl.create_default_context(cafile=cluster["certificate-authority"])
+    else:
+        context = ssl.create_default_context()
+    if cluster.get("insecure-skip-tls-verify"):
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    if user.get("client-certificate-data") and user.get("client-key-data"):
+        directory = tempfile.mkdtemp(prefix="k8s-assistant-")
+        try:
+            paths = []
+            for field in ("client-certificate-data", "client-key-data"):
+                path = os.path.join(directory, field)
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(base64.b64decode(user[field]))
+                paths.append(path)
+            context.load_cert_chain(*paths)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    elif user.get("client-certificate") and user.get("client-key"):
+        context.load_cert_chain(user["client-certificate"], user["client-key"])
+    return context
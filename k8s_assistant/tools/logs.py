@@ -0,0 +1,155 @@
+import re
+from collections import deque
+from typing import Any, Dict, List
+
+
+# Severity of the level words found in log lines
+LEVELS = {
+    "trace": 10, "debug": 10,
+    "info": 20, "notice": 20,
+    "warn": 30, "warning": 30,
+    "error": 40, "err": 40, "exception": 40,
+    "critical": 50, "crit": 50, "fatal": 50, "panic": 50,
+}
+
+ERROR = LEVELS["error"]
+
+LEVEL_WORD = re.compile(r"\b(trace|debug|info|notice|warn|warning|error|err|exception|critical|crit|fatal|panic)\b", re.IGNORECASE)
+
+# klog lines start with the level letter, e.g. "E0501 10:00:00.000000 1 main.go:42] ..."
+KLOG_LEVEL = re.compile(r"^([IWEF])\d{4} ")
+KLOG_LEVELS = {"I": 20, "W": 30, "E": 40, "F": 50}
+
+# Variable parts of a log line: any run containing a digit, so timestamps, addresses, ids and durations each collapse
+# into one placeholder. A single pattern with a plain replacement keeps masking cheap on millions of lines.
+VARIABLE = re.compile(r"[\d.:-]*\d[\w.:-]*")
+
+MAX_LINE_CHARS = 300
+
+
+def line_level(line: str) -> int:
+    """Get the severity of a log line, or 0 when it names no level."""
+
+    match = KLOG_LEVEL.match(line)
+    if match:
+        return KLOG_LEVELS[match.group(1)]
+    match = LEVEL_WORD.search(line, 0, 200)
+    return LEVELS[match.group(1).lower()] if match else 0
+
+
+def template_of(line: str) -> str:
+    """Mask the variable parts of a log line, so repeated lines map to the same template."""
+    return VARIABLE.sub("<*>", line[:MAX_LINE_CHARS])
+
+
+class LogAnalyzer:
+    """
+    Digest a log stream line by line with bounded memory.
+    Lines passing the filters are counted per template, and the first and the last burst of errors are kept
+    in ring buffers. The first burst starts with a few lines of context and ends after burst_gap lines without
+    an error. Templates beyond max_templates are counted as other.
+    """
+
+    def __init__(
+        self,
+        pattern: str = "",
+        min_level: int = 0,
+        burst_lines: int = 10,
+        context_lines: int = 3,
+        burst_gap: int = 50,
+        max_templates: int = 1000
+    ):
+        self.pattern = re.compile(pattern) if pattern else None
+        self.min_level = min_level
+        self.burst_lines = burst_lines
+        self.burst_gap = burst_gap
+        self.max_templates = max_templates
+        self.lines = 0
+        self.bytes = 0
+        self.matched = 0
+        self.errors = 0
+        self.other = 0
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self.first_errors: List[str] = []
+        self.first_error_count = 0
+        self._first_burst_open = True
+        self._since_error = 0
+        self.last_errors: "deque[str]" = deque(maxlen=burst_lines)
+        self._recent: "deque[str]" = deque(maxlen=context_lines)
+
+    def feed(self, line: str) -> None:
+        self.lines += 1
+        self.bytes += len(line) + 1
+        level = line_level(line)
+        if (self.pattern is None or self.pattern.search(line)) and level >= self.min_level:
+            self.matched += 1
+            self._count(line, level)
+            if level >= ERROR:
+                self._error(line)
+                self._since_error = 0
+        self._since_error += 1
+        if self.first_error_count and self._since_error > self.burst_gap:
+            self._first_burst_open = False
+        self._recent.append(line[:MAX_LINE_CHARS])
+
+    def _count(self, line: str, level: int) -> None:
+        template = template_of(line)
+        entry = self.templates.get(template)
+        if entry is None:
+            if len(self.templates) >= self.max_templates:
+                self.other += 1
+                return
+            entry = self.templates[template] = {"count": 0, "level": level, "example": line[:MAX_LINE_CHARS]}
+        entry["count"] += 1
+
+    def _error(self, line: str) -> None:
+        self.errors += 1
+        line = line[:MAX_LINE_CHARS]
+        if self._first_burst_open and self.first_error_count < self.burst_lines:
+            # The first burst starts with the lines leading up to it
+            if not self.first_errors:
+                self.first_errors.extend(self._recent)
+            self.first_errors.append(line)
+            self.first_error_count += 1
+        else:
+            self.last_errors.append(line)
+
+
+def level_name(level: int) -> str:
+    return {0: "-", 10: "DEBUG", 20: "INFO", 30: "WARN", 40: "ERROR", 50: "FATAL"}.get(level, str(level))
+
+
+def summarize(analyzers: Dict[str, LogAnalyzer], max_templates: int = 20) -> str:
+    """Render the analyzers of several log streams as one compact report, with templates merged across streams."""
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for source, analyzer in analyzers.items():
+        for template, entry in analyzer.templates.items():
+            item = merged.setdefault(template, {"count": 0, "level": entry["level"], "example": entry["example"], "sources": set()})
+            item["count"] += entry["count"]
+            item["sources"].add(source)
+
+    lines = [
+        f"{len(analyzers)} log streams, {sum(a.lines for a in analyzers.values())} lines "
+        f"({sum(a.bytes for a in analyzers.values())} bytes), {sum(a.matched for a in analyzers.values())} matched the filters, "
+        f"{sum(a.errors for a in analyzers.values())} errors, {len(merged)} distinct templates."
+    ]
+    ranked = sorted(merged.values(), key=lambda item: (-item["level"], -item["count"]))[:max_templates]
+    if ranked:
+        lines.append(f"\n== Top templates (errors first, {len(ranked)} of {len(merged)}) ==")
+        lines.append("COUNT   LEVEL  STREAMS  EXAMPLE")
+        for item in ranked:
+            lines.append(f"{item['count']:<7} {level_name(item['level']):<6} {len(item['sources']):<8} {item['example']}")
+    other = sum(a.other for a in analyzers.values())
+    if other:
+        lines.append(f"{other} more lines did not fit the template table.")
+
+    for source, analyzer in analyzers.items():
+        if analyzer.first_errors:
+            lines.append(f"\n== First errors in {source} ==")
+            lines.extend(analyzer.first_errors)
+        if analyzer.last_errors:
+            skipped = analyzer.errors - analyzer.first_error_count - len(analyzer.last_errors)
+            lines.append(f"\n== Last errors in {source}" + (f" ({skipped} errors in between omitted)" if skipped > 0 else "") + " ==")
+            lines.extend(analyzer.last_errors)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,175 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+from k8s_assistant import tracing
+from k8s_assistant.tools.cache import ResultCache
+from k8s_assistant.tools.command import KubectlCommand
+
+logger = logging.getLogger(__name__)
+
+
+# Pod statuses worth investigating, and whether the previous container's logs usually explain them
+FAILING_STATUSES = {
+    "CrashLoopBackOff": True,
+    "Error": True,
+    "OOMKilled": True,
+    "Init:CrashLoopBackOff": True,
+    "Init:Error": True,
+    "ImagePullBackOff": False,
+    "ErrImagePull": False,
+    "CreateContainerConfigError": False,
+    "Pending": False,
+}
+
+
+def followups(parsed: KubectlCommand, result: Dict[str, Any], max_pods: int = 3) -> List[Tuple[str, str]]:
+    """
+    Guess the read commands an investigation asks for next, as (command, namespace) pairs.
+    For failing pods in a "get pods" table these are the namespace events, then describe and logs --previous per pod.
+    """
+
+    if parsed.verb != "get" or parsed.resource != "pods" or parsed.flags.get("--output", "wide") != "wide":
+        return []
+    if result.get("status") != "success":
+        return []
+
+    lines = result.get("stdout", "").splitlines()
+    header = lines[0].split() if lines else []
+    if "NAME" not in header or "STATUS" not in header:
+        return []
+    name_column, status_column = header.index("NAME"), header.index("STATUS")
+    namespace_column = header.index("NAMESPACE") if "NAMESPACE" in header else None
+
+    commands, namespaces, pods = [], [], 0
+    for line in lines[1:]:
+        fields = line.split()
+        if len(fields) <= max(name_column, status_column) or fields[status_column] not in FAILING_STATUSES:
+            continue
+        if pods >= max_pods:
+            break
+        pods += 1
+        name = fields[name_column]
+        namespace = fields[namespace_column] if namespace_column is not None else parsed.namespace
+        if namespace not in namespaces:
+            namespaces.append(namespace)
+            commands.append(("get events", namespace))
+        commands.append((f"describe pod {name}", namespace))
+        if FAILING_STATUSES[fields[status_column]]:
+            commands.append((f"logs {name} --previous", namespace))
+    return commands
+
+
+class Prefetcher:
+    """
+    Speculatively run the read commands an investigation usually asks for next, while the model is still thinking.
+    Results go into the shared result cache, so the model's own call is a cache hit, or joins the read in flight.
+    At most max_workers reads run at a time and max_pending are queued; a new listing cancels the reads still
+    queued for the previous one. Prefetched results are kept for at least hold_seconds, so they outlive an LLM turn.
+    """
+
+    def __init__(
+        self,
+        cache: ResultCache,
+        read: Callable[[KubectlCommand, str], Dict[str, Any]],
+        max_workers: int = 2,
+        max_pending: int = 8,
+        max_pods: int = 3,
+        hold_seconds: float = 30
+    ):
+        self.cache = cache
+        self.read = read
+        self.max_pending = max_pending
+        self.max_pods = max_pods
+        self.hold_seconds = hold_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kubectl-prefetch")
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, Future] = {}
+        # Keys prefetched but not yet asked for, oldest first
+        self._unclaimed: "OrderedDict[Hashable, None]" = OrderedDict()
+        # Keys asked for while their prefetch was still running
+        self._joined = set()
+        self.issued = 0
+        self.used = 0
+        self.skipped = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def observe(self, parsed: KubectlCommand, result: Dict[str, Any]) -> None:
+        """Look at a tool result and queue the reads likely to follow it."""
+
+        suggestions = followups(parsed, result, self.max_pods)
+        if not suggestions:
+            return
+
+        with self._lock:
+            # A new listing supersedes the reads still queued for the previous one
+            for key, future in list(self._pending.items()):
+                if future.cancel():
+                    del self._pending[key]
+                    self.cancelled += 1
+
+            for command, namespace in suggestions:
+                follow_up = KubectlCommand(command, namespace)
+                key = follow_up.key()
+                if key in self._pending or len(self._pending) >= self.max_pending or self.cache.get(key) is not None:
+                    self.skipped += 1
+                    continue
+                self._pending[key] = self._executor.submit(self._prefetch, follow_up, f"kubectl {command} -n {namespace}")
+                self.issued += 1
+
+    def claim(self, key: Hashable) -> bool:
+        """Check whether a command asked for by the model was prefetched, counting it as used."""
+
+        with self._lock:
+            if key in self._pending:
+                self._joined.add(key)
+            elif key in self._unclaimed:
+                del self._unclaimed[key]
+            else:
+                return False
+            self.used += 1
+            return True
+
+    def _prefetch(self, parsed: KubectlCommand, cmd: str) -> None:
+        key = parsed.key()
+        kind = parsed.resource or parsed.verb
+        try:
+            with tracing.span("kubectl.prefetch", command=cmd):
+                result, age = self.cache.get_or_compute(
+                    key,
+                    lambda: self.read(parsed, cmd),
+                    kind=kind,
+                    should_cache=lambda value: value.get("status") == "success",
+                    ttl=max(self.cache.ttl_for(kind), self.hold_seconds)
+                )
+            with self._lock:
+                if result.get("status") != "success":
+                    self.failed += 1
+                elif age is None and key not in self._joined:
+                    self._unclaimed[key] = None
+                    while len(self._unclaimed) > self.cache.max_entries:
+                        self._unclaimed.popitem(last=False)
+        except Exception as e:
+            logger.debug(f"Prefetch of '{cmd}' failed: {e}")
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._joined.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of issued, used, skipped, cancelled and failed prefetches."""
+
+        with self._lock:
+            return {
+                "issued": self.issued,
+                "used": self.used,
+                "skipped": self.skipped,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "pending": len(self._pending),
+                "use_ratio": round(self.used / self.issued, 3) if self.issued else 0.0,
+            }
@@ -1,7 +1,7 @@
 tools = {
     "KubectlTool": {
         "name": "kubectl",
-        "description": "Execute a kubectl command against the Kubernetes cluster.",
+        "description": "Execute a kubectl command against the Kubernetes cluster. To compare clusters, pass their kube context names in contexts, or [\"*\"] for all of them.",
         "args": {
             "command": {
                 "type": str,
@@ -14,6 +14,129 @@ tools = {
                 "required": False,
                 "default": "default"
             },
+            "contexts": {
+                "type": list,
+                "description": "Kube contexts to run a read-only command in, in parallel. The results are merged and labelled by context.",
+                "required": False,
+                "default": None
+            },
+        }
+    },
+    "OutputTool": {
+        "name": "read_output",
+        "description": "Read more lines of an earlier command output that was truncated. Use the spool_id and offset given in the truncation notice. Pages are also cut at about 32KB; continue from next_offset.",
+        "args": {
+            "spool_id": {
+                "type": str,
+                "description": "The spool_id from the truncation notice.",
+                "required": True
+            },
+            "offset": {
+                "type": int,
+                "description": "The line to start reading from.",
+                "required": False,
+                "default": 0
+            },
+            "limit": {
+                "type": int,
+                "description": "The maximum number of lines to return.",
+                "required": False,
+                "default": 200
+            },
+        }
+    },
+    "LogTool": {
+        "name": "analyze_logs",
+        "description": "Analyze pod logs on the server and return a digest: repeated lines grouped into templates with counts, plus the first and last error bursts. Prefer this over kubectl logs for large or noisy logs, or for several pods at once.",
+        "args": {
+            "pods": {
+                "type": list,
+                "description": "The pod names to analyze.",
+                "required": False,
+                "default": None
+            },
+            "namespace": {
+                "type": str,
+                "description": "The namespace of the pods.",
+                "required": False,
+                "default": "default"
+            },
+            "selector": {
+                "type": str,
+                "description": "A label selector to pick the pods when no pod names are given, e.g. app=checkout.",
+                "required": False,
+                "default": ""
+            },
+            "container": {
+                "type": str,
+                "description": "The container to read, or * for all containers.",
+                "required": False,
+                "default": ""
+            },
+            "pattern": {
+                "type": str,
+                "description": "Only keep lines matching this regular expression.",
+                "required": False,
+                "default": ""
+            },
+            "level": {
+                "type": str,
+                "description": "Only keep lines at or above this level: debug, info, warn, error or fatal.",
+                "required": False,
+                "default": ""
+            },
+            "since": {
+                "type": str,
+                "description": "Only read logs newer than this duration, e.g. 10m or 2h.",
+                "required": False,
+                "default": ""
+            },
+            "previous": {
+                "type": bool,
+                "description": "Read the logs of the previous, crashed container instance.",
+                "required": False,
+                "default": False
+            },
+            "max_templates": {
+                "type": int,
+                "description": "The maximum number of templates to return.",
+                "required": False,
+                "default": 20
+            },
+        }
+    },
+    "ClusterHealthTool": {
+        "name": "cluster_health",
+        "description": "Summarize the health of the whole cluster or one namespace in a short report: unhealthy pods by problem and namespace, most restarted pods, pending pods by node, node conditions, failing rollouts and warning events. Use this first for broad questions like \"what's unhealthy?\" instead of listing all pods.",
+        "args": {
+            "namespace": {
+                "type": str,
+                "description": "The namespace to check, or empty for all namespaces.",
+                "required": False,
+                "default": ""
+            },
+            "top": {
+                "type": int,
+                "description": "How many entries to list per section.",
+                "required": False,
+                "default": 10
+            },
+        }
+    },
+    "FingerprintTool": {
+        "name": "resource_versions",
+        "description": "Internal: fingerprint the cluster objects read by kubectl commands, to check whether a cached answer is still current.",
+        "args": {
+            "calls": {
+                "type": list,
+                "description": "The kubectl calls to fingerprint, as {\"command\": ..., \"namespace\": ...} objects.",
+                "required": True
+            },
         }
+    },
+    "ServerStatsTool": {
+        "name": "server_stats",
+        "description": "Internal: report tool server statistics, such as the share of tool calls deduplicated.",
+        "args": {}
     }
 }
\ No newline at end of file
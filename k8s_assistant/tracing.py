@@ -0,0 +1,242 @@
+# tracing.py
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+_exporter = None
+_service_name = "k8s-assistant"
+
+
+class Span:
+    """
+    A timed operation in a trace.
+    Spans nest through a context variable, so child spans started in the same task, or in threads
+    started with asyncio.to_thread, pick up their parent automatically.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set(self, **attributes) -> None:
+        """Add attributes, e.g. token counts or byte sizes, to the span."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "service": _service_name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class JsonlExporter:
+    """Append finished spans as JSON lines. Client and server processes can share one file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OtlpHttpExporter:
+    """
+    Send spans to an OTLP/HTTP collector (e.g. a local OpenTelemetry Collector or Jaeger on :4318) as OTLP JSON.
+    Spans are batched and posted from a background thread so tracing never blocks the traced code.
+    """
+
+    def __init__(self, endpoint: str, batch_size: int = 64, interval: float = 2.0):
+        self.url = endpoint.rstrip("/") + ("" if endpoint.rstrip("/").endswith("/v1/traces") else "/v1/traces")
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Span | None]" = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        batch, stopping = [], False
+        while not stopping:
+            try:
+                span = self._queue.get(timeout=self.interval)
+                if span is None:
+                    stopping = True
+                else:
+                    batch.append(span)
+            except queue.Empty:
+                pass
+            if batch and (stopping or len(batch) >= self.batch_size or self._queue.empty()):
+                self._post(batch)
+                batch = []
+
+    def _post(self, spans) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", _service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "k8s_assistant"},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+                            "status": {"code": 2 if span.status == "error" else 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logger.debug(f"Failed to export {len(spans)} spans: {e}")
+
+
+def configure(service_name: str, target: str | None = None) -> None:
+    """
+    Enable tracing for this process.
+    The target comes from K8S_ASSISTANT_TRACE when not given: "jsonl:<path>" or "otlp:<collector url>".
+    Tracing stays disabled when neither is set.
+    """
+
+    global _exporter, _service_name
+    _service_name = service_name
+    target = target if target is not None else os.getenv("K8S_ASSISTANT_TRACE", "")
+    if not target:
+        return
+
+    kind, _, location = target.partition(":")
+    if kind == "jsonl":
+        _exporter = JsonlExporter(location or "k8s_assistant_traces.jsonl")
+    elif kind == "otlp":
+        _exporter = OtlpHttpExporter(location or "http://localhost:4318")
+    else:
+        logger.warning(f"Unknown trace target: {target}")
+        return
+    atexit.register(_exporter.shutdown)
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+@contextmanager
+def span(name: str, parent: Dict[str, str] | None = None, **attributes) -> Iterator[Span | None]:
+    """
+    Start a span as a child of the current span, or of a remote parent given as propagation headers.
+    Yields None when tracing is disabled, so callers should use `if s:` before setting attributes.
+    """
+
+    if _exporter is None:
+        yield None
+        return
+
+    current = _current_span.get()
+    trace_id, parent_id = (current.trace_id, current.span_id) if current else (secrets.token_hex(16), None)
+    remote = extract(parent)
+    if remote:
+        trace_id, parent_id = remote
+
+    new_span = Span(name, trace_id, parent_id, attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.status = "error"
+        new_span.attributes["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        new_span.end_ns = time.time_ns()
+        try:
+            _exporter.export(new_span)
+        except Exception as e:
+            logger.debug(f"Failed to export span {name}: {e}")
+
+
+def inject() -> Dict[str, str]:
+    """Get W3C trace context headers for the current span, to send along with a remote call."""
+
+    current = _current_span.get()
+    if current is None:
+        return {}
+    return {"traceparent": f"00-{current.trace_id}-{current.span_id}-01"}
+
+
+def extract(carrier: Dict[str, str] | None):
+    """Parse the trace and parent span ids from W3C trace context headers."""
+
+    traceparent = (carrier or {}).get("traceparent", "")
+    parts = traceparent.split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
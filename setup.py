@@ -7,7 +7,10 @@ setup(
     install_requires=[
         "anthropic",
         "openai",
+        "httpx",
         "mcp", # Ensure this package is available
+        "starlette",
+        "uvicorn",
     ],
     entry_points={
         'console_scripts': [